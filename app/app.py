@@ -6,11 +6,10 @@ if PROJECT_ROOT not in sys.path:
 import streamlit as st
 import pandas as pd
 from f1goat.ui import render_legend
-from f1goat.naming import load_lineages, apply_lineage_grouping
-from f1goat.simdata import simulate_gp
-from f1goat.storage import load_latest_gp, get_latest_calendar_event, get_latest_results_event
+from f1goat.naming import apply_lineage_grouping
+from f1goat.app_data import load_lineages, simulate_gp, load_latest_gp, get_latest_calendar_event, get_latest_results_event
 from f1goat.compute import auto_table_height
-from f1goat import update as update_now
+from f1goat.jobs import enqueue_update, get_job
 
 st.set_page_config(page_title="F1GOAT", page_icon="app/assets/f1goat.png", layout="wide")
 
@@ -26,10 +25,30 @@ c1, c2 = st.columns([1, 0.25])
 with c1: st.title("F1GOAT — Análisis F1")
 with c2:
     if st.button("🔄 Actualizar ahora", use_container_width=True):
-        with st.spinner("Ingeriendo último GP real (puede tardar la primera vez)…"):
-            ok = update_now()
-        st.success("Actualización completada.") if ok else st.error("Fallo en actualización.")
-        st.rerun()
+        # Encola y vuelve al instante; la ingesta corre en el hilo trabajador (f1goat.jobs)
+        st.session_state["update_job"] = enqueue_update()
+
+def _update_status():
+    job_id = st.session_state.get("update_job")
+    job = get_job(job_id) if job_id is not None else None
+    if job is None:
+        return
+    if job["status"] in ("queued", "running"):
+        total, done = int(job["total"] or 0), int(job["done"] or 0)
+        st.progress(done / total if total else 0.0,
+                    text=f"Actualizando… {done}/{total or '?'} — {job['message'] or 'en cola'}")
+        return
+    # Terminado: aviso y rerun completo para leer los datos nuevos
+    del st.session_state["update_job"]
+    st.session_state["update_msg"] = (job["status"], job["message"] or "")
+    st.rerun()
+
+if hasattr(st, "fragment"):
+    _update_status = st.fragment(run_every=2)(_update_status)
+_update_status()
+if "update_msg" in st.session_state:
+    status, msg = st.session_state.pop("update_msg")
+    st.success(f"Actualización completada. {msg}") if status == "done" else st.error(f"Fallo en actualización. {msg}")
 
 # Aviso de GP nuevo en calendario sin resultados en DB
 cal = get_latest_calendar_event()
@@ -50,6 +69,7 @@ with tabs[0]:
         d_real, t_real, gp_name_real, season_real, rnd_real = load_latest_gp()
         if d_real is not None and not d_real.empty:
             gp_title = gp_name_real
+            gp_season = season_real
             drivers = d_real
             teams = t_real
     except Exception as e:
@@ -60,6 +80,7 @@ with tabs[0]:
             st.error("Modo 'solo datos reales' activo y no hay datos en la base. Ejecuta “Actualizar ahora” o `python -m f1goat update/backfill`.")
             st.stop()
         season, rnd = 2025, 22
+        gp_season = season
         drivers, teams, gp_title = simulate_gp(season, rnd)
 
     st.markdown(f"### {gp_title}")
@@ -74,7 +95,8 @@ with tabs[0]:
     tview = teams.copy()
     if st.session_state["group_lineage"]:
         tview = apply_lineage_grouping(tview, "Equipo",
-            ["Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"], True, mapping)
+            ["Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"], True, mapping,
+            season=gp_season)
     tview = tview[["Equipo","Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"]]\
             .sort_values("Puntos F1GOAT (GP)", ascending=False).copy()
     tview.index = pd.RangeIndex(1, len(tview)+1, name="Pos")
@@ -6,9 +6,8 @@ if PROJECT_ROOT not in sys.path:
 import streamlit as st
 import pandas as pd
 from f1goat.ui import render_legend
-from f1goat.naming import load_lineages, apply_lineage_grouping
-from f1goat.simdata import simulate_gp
-from f1goat.storage import list_seasons, list_rounds_with_names, load_gp
+from f1goat.naming import apply_lineage_grouping
+from f1goat.app_data import load_lineages, simulate_gp, list_seasons, list_rounds_with_names, load_gp
 from f1goat.compute import auto_table_height
 
 st.set_page_config(page_title="F1GOAT — Gran Premio", page_icon="app/assets/f1goat.png", layout="wide")
@@ -68,7 +67,7 @@ mapping = load_lineages()
 tview = teams.copy()
 if st.session_state.get("group_lineage", False):
     tview = apply_lineage_grouping(tview, "Equipo",
-        ["Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"], True, mapping)
+        ["Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"], True, mapping, season=season)
 tcols = ["Equipo","Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"]
 tview = tview[tcols].sort_values("Puntos F1GOAT (GP)", ascending=False).copy()
 tview.index = pd.RangeIndex(1, len(tview)+1, name="Pos")
@@ -6,9 +6,8 @@ if PROJECT_ROOT not in sys.path:
 import streamlit as st
 import pandas as pd
 from f1goat.ui import render_legend
-from f1goat.naming import load_lineages, apply_lineage_grouping
-from f1goat.simdata import simulate_season
-from f1goat.storage import list_seasons, load_season
+from f1goat.naming import apply_lineage_grouping
+from f1goat.app_data import load_lineages, simulate_season, list_seasons, load_season, standings_as_of
 from f1goat.compute import auto_table_height
 
 st.set_page_config(page_title="F1GOAT — Temporada", page_icon="app/assets/f1goat.png", layout="wide")
@@ -27,10 +26,11 @@ db_seasons = list_seasons()
 season = st.selectbox("Temporada", db_seasons if db_seasons else list(range(2025, 1950-1, -1)), index=0)
 
 # Intentar datos reales
-d_rounds, t_rounds, d_final, t_final = load_season(season)
+d_rounds, t_rounds, d_final, t_final = load_season(season, group_lineage=st.session_state["group_lineage"])
 
 # Fallback si la DB no tiene esa temporada
-if d_rounds.empty or t_rounds.empty:
+simulated = d_rounds.empty or t_rounds.empty
+if simulated:
     if real_only:
         st.error("Modo 'solo datos reales' activo y no hay datos en la base para esta temporada.")
         st.stop()
@@ -52,10 +52,11 @@ st.line_chart(piv_d, use_container_width=True)
 st.subheader("Constructores — acumulado de temporada (cap absoluto)")
 mapping = load_lineages()
 ttab = t_final.copy()
-if st.session_state.get("group_lineage", False) and not ttab.empty:
+if simulated and st.session_state.get("group_lineage", False) and not ttab.empty:
+    # Datos reales: ya agrupados por linaje en la base (load_season)
     ttab = apply_lineage_grouping(ttab, "Equipo",
         ["Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Total GP","Acum","Acum 0–100"],
-        True, mapping)
+        True, mapping, season=season)
 tcols = ["Equipo","Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Total GP","Acum 0–100"]
 ttab = ttab[tcols].sort_values("Acum 0–100", ascending=False).copy()
 ttab.index = pd.RangeIndex(1, len(ttab)+1, name="Pos")
@@ -65,10 +66,23 @@ st.markdown("**Gráfico — Constructores (SeasonCap 0–100 por GP)**")
 piv_t = t_rounds.pivot(index="Ronda", columns="Equipo", values="Acum 0–100").sort_index()
 st.line_chart(piv_t, use_container_width=True)
 
+# === Clasificación tras la ronda k (solo datos reales; índice de sumas prefijas) ===
+rounds_done = sorted(int(r) for r in d_rounds["Ronda"].unique())
+if not simulated and len(rounds_done) > 1:
+    st.subheader("Clasificación tras la ronda…")
+    k = st.select_slider("Ronda", options=rounds_done, value=rounds_done[-1])
+    c1, c2 = st.columns(2)
+    with c1:
+        st.dataframe(standings_as_of(season, k, top_k=10), use_container_width=True)
+    with c2:
+        st.dataframe(standings_as_of(season, k, top_k=10, kind="team",
+                                     group_lineage=st.session_state.get("group_lineage", False)),
+                     use_container_width=True)
+
 with st.expander("📐 Cómo se calcula (Temporada)"):
     st.markdown("""
 **Cap absoluto 0–100**: `Acum / (10 × nº GP)` × 100.  
 **Pilotos (tabla)**: `CSI medio` entre **Final media** y **RR medio**; `Total GP` = suma de puntos por GP.  
 **Constructores (tabla)**: `Equipo`, `Parrilla media`, `Final media`, **`CSI medio`**, `Ops`, `Rel`, `Dev`, `Total GP`, `Acum 0–100`.  
-Con linajes ON, se agrupa por `config/lineage.yaml` (tabla).
+Con linajes ON, se agrupa por el linaje vigente en la temporada según `config/lineage.yaml` (tabla y gráfico).
 """)
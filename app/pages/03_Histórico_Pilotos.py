@@ -5,7 +5,7 @@ if PROJECT_ROOT not in sys.path:
 
 import streamlit as st
 from f1goat.compute import auto_table_height
-from f1goat.aggregations import historical_pilots_table
+from f1goat.app_data import historical_pilots_table
 from f1goat.ui import render_legend
 
 st.set_page_config(page_title="F1GOAT — Histórico Pilotos", page_icon="app/assets/f1goat.png", layout="wide")
@@ -5,8 +5,7 @@ if PROJECT_ROOT not in sys.path:
 
 import streamlit as st
 from f1goat.compute import auto_table_height
-from f1goat.aggregations import best_seasons_pilots, best_seasons_teams
-from f1goat.naming import load_lineages, apply_lineage_grouping
+from f1goat.app_data import best_seasons_pilots, best_seasons_teams
 from f1goat.ui import render_legend
 
 st.set_page_config(page_title="F1GOAT — Mejores Temporadas", page_icon="app/assets/f1goat.png", layout="wide")
@@ -25,12 +24,10 @@ with col1:
 
 with col2:
     st.subheader("Constructores — media por temporada")
-    dt = best_seasons_teams()
+    # Linajes: agrupados en la base por el linaje vigente en cada temporada
+    group = st.sidebar.checkbox("Agrupar linajes de equipo", value=False, key="lineage_best")
+    dt = best_seasons_teams(group_lineage=group)
     if dt.empty:
         st.info("Sin datos suficientes. Amplía el backfill (ej.: 2018→).")
     else:
-        # Respetar toggle de linajes si aplica
-        mapping = load_lineages()
-        if st.sidebar.checkbox("Agrupar linajes de equipo", value=False, key="lineage_best"):
-            dt = apply_lineage_grouping(dt, "Equipo", ["GPs media","Temps. disputadas","Media por temporada"], False, mapping)
         st.dataframe(dt, use_container_width=True, height=auto_table_height(len(dt)))
@@ -5,7 +5,8 @@ if PROJECT_ROOT not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from f1goat.storage import load_latest_gp, _debug_summary
+from f1goat.storage import _debug_summary
+from f1goat.app_data import load_latest_gp
 from f1goat.compute import auto_table_height
 
 st.set_page_config(page_title="F1GOAT — Diagnóstico", page_icon="app/assets/f1goat.png", layout="wide")
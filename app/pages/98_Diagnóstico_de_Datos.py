@@ -1,5 +1,10 @@
-import os, pathlib, pandas as pd, streamlit as st
-from f1goat.storage import coverage_table
+import os, sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pathlib, pandas as pd, streamlit as st
+from f1goat.app_data import coverage_table
 
 st.set_page_config(layout="wide")
 st.title("Diagnóstico de datos")
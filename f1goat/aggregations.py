@@ -1,228 +1,180 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
-from .storage import _connect, list_seasons, load_season
-from .eb import eb_adjust_means
-
-def _compress_years(years: List[int]) -> str:
-    years = sorted(set(int(y) for y in years))
-    if not years: return ""
-    ranges = []
-    start = prev = years[0]
-    for y in years[1:]:
-        if y == prev + 1:
-            prev = y
-            continue
-        ranges.append((start, prev))
-        start = prev = y
-    ranges.append((start, prev))
-    parts = [f"{a}" if a==b else f"{a}-{b}" for (a,b) in ranges]
-    return ", ".join(parts)
-
-def _equipos_y_anios(df: pd.DataFrame) -> pd.DataFrame:
-    # df con columnas: Piloto, Equipo, Season
-    out = (df.groupby(['Piloto','Equipo'])['Season']
-             .apply(lambda s: _compress_years(list(s)))
-             .reset_index())
-    out['pair'] = out.apply(lambda r: f"{r['Equipo']} ({r['Season']})" if r['Season'] else r['Equipo'], axis=1)
-    cat = (out.groupby('Piloto')['pair'].apply(lambda s: "; ".join([p for p in s if p])).reset_index()
-           .rename(columns={'pair':'Equipos y años'}))
-    return cat
-
+from .storage import _read, _lineage_view, _lineage_root_sql
+from .qcache import cached
+from .eb import eb_adjust_stats
+
+# ---------- SQL COMPARTIDO ----------
+
+# "Equipo (a-b, c); Equipo2 (…)" por piloto: huecos e islas sobre los años de cada (piloto, equipo).
+# `d` trae IDs enteros (driver, team); los nombres solo se resuelven al formatear.
+_TEAM_YEARS_CTES = """
+    dt AS (SELECT DISTINCT driver, team, season FROM d),
+    islands AS (
+        SELECT driver, team, MIN(season) AS y0, MAX(season) AS y1
+        FROM (SELECT *, season - ROW_NUMBER() OVER (PARTITION BY driver, team ORDER BY season) AS grp FROM dt)
+        GROUP BY driver, team, grp
+    ),
+    team_years AS (
+        SELECT driver, team,
+               string_agg(CASE WHEN y0 = y1 THEN CAST(y0 AS TEXT) ELSE y0 || '-' || y1 END, ', ' ORDER BY y0) AS years
+        FROM islands GROUP BY driver, team
+    ),
+    equipos AS (
+        SELECT y.driver, string_agg(tn.name || ' (' || y.years || ')', '; ' ORDER BY tn.name) AS equipos
+        FROM team_years y JOIN teams tn ON tn.team_id = y.team GROUP BY y.driver
+    )
+"""
+
+# ---------- HISTÓRICO DE PILOTOS ----------
+
+_HIST_COLS = ["Piloto","Equipos y años","GPs","Parrilla media","Final media","CSI medio",
+              "RR medio","QR medio","TD medio","OQ medio","WA medio","Total acumulado","Media por GP (AJUSTADA EB)"]
+
+@cached
 def historical_pilots_table() -> pd.DataFrame:
     """
     Construye tabla histórica (toda la DB) con:
       Piloto | Equipos y años | GPs | Parrilla media | Final media | CSI medio | RR medio | QR medio | TD medio | OQ medio | WA medio | Total acumulado | Media por GP (AJUSTADA EB)
+    Agregados, rangos de años y estadísticos EB salen de DuckDB (una fila por piloto);
+    en pandas solo queda el ajuste EB sobre esos estadísticos.
     """
-    with _connect() as con:
-        pts = con.sql("""
-            SELECT e.season AS Season, d.driver AS Piloto, d.team AS Equipo,
-                   d.grid AS Parrilla, d.finish AS Final, d.csi AS CSI, d.rr AS RR, d.qr AS QR, d.td AS TD,
-                   d.oq AS OQ, d.wa AS WA, d.pf AS PF, d.points_gp AS Puntos
-            FROM gp_driver_results d
-            JOIN gp_events e ON d.event_key = e.event_key
-            WHERE e.round >= 1
+    with _read() as con:
+        agg = con.sql(f"""
+            WITH d AS (
+                SELECT e.season, r.driver_id AS driver, r.team_id AS team, r.grid, r.finish, r.csi, r.rr, r.qr,
+                       r.td, r.oq, r.wa, r.points_gp
+                FROM driver_results r JOIN events e USING (event_id)
+                WHERE e.round >= 1
+            ),
+            {_TEAM_YEARS_CTES}
+            SELECT dn.name AS Piloto, q.equipos AS "Equipos y años",
+                   COUNT(s.points_gp) AS n, AVG(s.points_gp) AS mean, VAR_SAMP(s.points_gp) AS var,
+                   AVG(s.grid) AS "Parrilla media", AVG(s.finish) AS "Final media", AVG(s.csi) AS "CSI medio",
+                   AVG(s.rr) AS "RR medio", AVG(s.qr) AS "QR medio", AVG(s.td) AS "TD medio",
+                   AVG(s.oq) AS "OQ medio", AVG(s.wa) AS "WA medio",
+                   COALESCE(SUM(s.points_gp), 0.0) AS "Total acumulado"
+            FROM d s JOIN drivers dn ON dn.driver_id = s.driver LEFT JOIN equipos q ON q.driver = s.driver
+            GROUP BY s.driver, dn.name, q.equipos
         """).df()
-    if pts.empty:
-        return pd.DataFrame(columns=[
-            "Piloto","Equipos y años","GPs","Parrilla media","Final media","CSI medio",
-            "RR medio","QR medio","TD medio","OQ medio","WA medio","Total acumulado","Media por GP (AJUSTADA EB)"
-        ])
-
-    # EB (por piloto con Puntos por GP)
-    eb = eb_adjust_means(pts.rename(columns={"Puntos":"P"}), group_col="Piloto", value_col="P")
-    eb = eb.rename(columns={"n":"GPs","mean":"Media por GP","eb_mean":"Media por GP (AJUSTADA EB)"})[["Piloto","GPs","Media por GP (AJUSTADA EB)"]]
+    if agg.empty:
+        return pd.DataFrame(columns=_HIST_COLS)
 
-    # Agregados de columnas
-    agg = (pts.groupby("Piloto", as_index=False)
-              .agg({"Parrilla":"mean","Final":"mean","CSI":"mean","RR":"mean","QR":"mean","TD":"mean",
-                    "OQ":"mean","WA":"mean","Puntos":"sum"}))
-    agg = agg.rename(columns={"Parrilla":"Parrilla media","Final":"Final media","CSI":"CSI medio","RR":"RR medio","QR":"QR medio",
-                              "TD":"TD medio","OQ":"OQ medio","WA":"WA medio","Puntos":"Total acumulado"})
-
-    # Equipos y años
-    equipos = _equipos_y_anios(pts[["Piloto","Equipo","Season"]])
-
-    out = (agg.merge(eb, on="Piloto", how="left")
-              .merge(equipos, on="Piloto", how="left"))
+    # EB (por piloto con Puntos por GP) desde n / media / varianza por grupo
+    eb = eb_adjust_stats(agg[["Piloto","n","mean","var"]], group_col="Piloto")
+    out = agg.assign(**{"GPs": eb["n"].astype(int), "Media por GP (AJUSTADA EB)": eb["eb_mean"]})
 
     # Redondeo amable
     for c in ["Parrilla media","Final media","CSI medio","RR medio","QR medio","TD medio","OQ medio","WA medio",
               "Total acumulado","Media por GP (AJUSTADA EB)"]:
-        if c in out.columns:
-            out[c] = out[c].astype(float).round(3)
+        out[c] = out[c].astype(float).round(3)
 
-    cols = ["Piloto","Equipos y años","GPs","Parrilla media","Final media","CSI medio",
-            "RR medio","QR medio","TD medio","OQ medio","WA medio","Total acumulado","Media por GP (AJUSTADA EB)"]
-    out = out[cols].sort_values(["Media por GP (AJUSTADA EB)","GPs"], ascending=[False, False])
+    out = out[_HIST_COLS].sort_values(["Media por GP (AJUSTADA EB)","GPs","Piloto"], ascending=[False, False, True])
     out.index = range(1, len(out)+1)
     out.index.name = "Pos"
     return out
 
+# ---------- MEJORES TEMPORADAS (una sola consulta) ----------
+
+# Puntos por (temporada, ronda, piloto/equipo). Solo temporadas con resultados de pilotos y de equipos
+# (como `load_season`); SeasonCap = 10 × última ronda con resultados de pilotos.
+_SEASON_CTES = """
+    d AS (
+        SELECT e.season, e.round, r.driver_id AS driver, r.team_id AS team, r.points_gp
+        FROM driver_results r JOIN events e USING (event_id)
+        WHERE e.round >= 1
+    ),
+    t AS (
+        SELECT e.season, e.round, r.team_id AS team, r.points_gp
+        FROM team_results r JOIN events e USING (event_id)
+        WHERE e.round >= 1
+    ),
+    caps AS (
+        SELECT season, 10.0 * MAX(round) AS cap FROM d
+        WHERE season IN (SELECT season FROM t)
+        GROUP BY season
+    )
+"""
+
+def _podium_sql(pos: int) -> str:
+    # "n (año, año)" de las temporadas acabadas en `pos`
+    return (f"COUNT(*) FILTER (WHERE rk = {pos}) || ' (' || "
+            f"COALESCE(string_agg(CAST(season AS TEXT), ', ' ORDER BY season) FILTER (WHERE rk = {pos}), '') || ')' "
+            f"AS \"{pos}º (años)\"")
+
+def _ranked_sql(src: str, key: str) -> str:
+    # Acumulado 0–100 por temporada (SeasonCap), GPs disputados y puesto final con RANK(); `id` = ID entero
+    return f"""
+    per_season AS (
+        SELECT x.season, x.{key} AS id, ROUND(SUM(x.points_gp) / c.cap * 100.0, 3) AS acum100,
+               COUNT(DISTINCT x.round) AS gps
+        FROM {src} x JOIN caps c ON c.season = x.season
+        GROUP BY x.season, x.{key}, c.cap
+    ),
+    ranked AS (
+        SELECT *, RANK() OVER (PARTITION BY season ORDER BY acum100 DESC NULLS LAST) AS rk FROM per_season
+    ),
+    best AS (
+        SELECT id, ROUND(AVG(gps), 2) AS gps_media, COUNT(*) AS temps, ROUND(AVG(acum100), 3) AS media,
+               {_podium_sql(1)}, {_podium_sql(2)}, {_podium_sql(3)}
+        FROM ranked GROUP BY id
+    )
+    """
+
+def _finish_ranking(out: pd.DataFrame) -> pd.DataFrame:
+    out.index = range(1, len(out)+1); out.index.name = "Pos"
+    return out
+
+@cached
 def best_seasons_pilots() -> pd.DataFrame:
     """
     Tabla por piloto (agregado sobre temporadas) con:
       Piloto | Equipos (años) | GPs media | Temps. disputadas | 1º (años) | 2º (años) | 3º (años) | Media por temporada
-    Ranking por 'Media por temporada' (SeasonCap 0–100).
+    Ranking por 'Media por temporada' (SeasonCap 0–100). Una única consulta sobre toda la historia.
     """
-    seasons = list_seasons()
-    if not seasons:
-        return pd.DataFrame(columns=["Piloto","Equipos (años)","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"])
-
-    rows = []
-    per_season_rank = []
-    for y in sorted(seasons):
-        d_rounds, t_rounds, d_final, _ = load_season(y)
-        if d_final is None or d_final.empty: 
-            continue
-        # ranking de temporada (pilotos)
-        dtmp = d_final[["Piloto","Acum 0–100"]].sort_values("Acum 0–100", ascending=False).reset_index(drop=True)
-        dtmp["rank"] = dtmp.index + 1
-        for _, r in dtmp.iterrows():
-            per_season_rank.append({"Season": y, "Piloto": r["Piloto"], "rank": int(r["rank"])})
-        # filas para medias
-        d_final2 = d_final.copy()
-        d_final2["Season"] = y
-        # nº GPs disputados por piloto en la temporada = tamaño en d_rounds
-        ngps = d_rounds.groupby("Piloto")["Ronda"].nunique().reset_index().rename(columns={"Ronda":"GPs temp."})
-        d_final2 = d_final2.merge(ngps, on="Piloto", how="left")
-        for _, r in d_final2.iterrows():
-            rows.append({"Piloto": r["Piloto"], "Season": y, "Acum100": r["Acum 0–100"], "GPs": int(r.get("GPs temp.", 0))})
-    if not rows:
-        return pd.DataFrame(columns=["Piloto","Equipos (años)","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"])
-
-    df = pd.DataFrame(rows)
-    rnk = pd.DataFrame(per_season_rank)
-
-    # Agregados por piloto
-    base = (df.groupby("Piloto", as_index=False)
-              .agg(GPs_media=("GPs","mean"),
-                   Temps=("Season","nunique"),
-                   MediaTemp=("Acum100","mean")))
-    base["GPs_media"] = base["GPs_media"].round(2)
-    base["Media por temporada"] = base["MediaTemp"].round(3)
-    base["Temps. disputadas"] = base["Temps"].astype(int)
-    base = base.drop(columns=["MediaTemp","Temps"])
-
-    # 1º/2º/3º (años)
-    pos = (rnk.pivot_table(index=["Piloto","Season"], columns="rank", values="rank", aggfunc="size", fill_value=0)
-             .reset_index().rename_axis(None, axis=1))
-    pos = pos.rename(columns={1:"is1",2:"is2",3:"is3"})
-    pos["is1"] = pos.get("is1", 0); pos["is2"] = pos.get("is2", 0); pos["is3"] = pos.get("is3", 0)
-    for col in ["is1","is2","is3"]:
-        pos[col] = pos[col].astype(int)
-    p1 = pos[pos["is1"]==1].groupby("Piloto")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="1º (años)")
-    p2 = pos[pos["is2"]==1].groupby("Piloto")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="2º (años)")
-    p3 = pos[pos["is3"]==1].groupby("Piloto")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="3º (años)")
-    counts = (pos.groupby("Piloto")[["is1","is2","is3"]].sum().reset_index()
-                .merge(p1, on="Piloto", how="left")
-                .merge(p2, on="Piloto", how="left")
-                .merge(p3, on="Piloto", how="left"))
-    for col, name in [("is1","1º (años)"),("is2","2º (años)"),("is3","3º (años)")]:
-        counts[name] = counts[col].astype(int).astype(str) + " (" + counts[name].fillna("").astype(str) + ")"
-    counts = counts[["Piloto","1º (años)","2º (años)","3º (años)"]]
-
-    # Equipos (años) a nivel carrera
-    with _connect() as con:
-        pty = con.sql("""
-            SELECT e.season AS Season, d.driver AS Piloto, d.team AS Equipo
-            FROM gp_driver_results d JOIN gp_events e ON d.event_key = e.event_key
-            WHERE e.round >= 1
+    with _read() as con:
+        out = con.sql(f"""
+            WITH {_SEASON_CTES}, {_TEAM_YEARS_CTES}, {_ranked_sql("d", "driver")}
+            SELECT dn.name AS Piloto, q.equipos AS "Equipos (años)", b.gps_media AS "GPs media",
+                   b.temps AS "Temps. disputadas", b."1º (años)", b."2º (años)", b."3º (años)",
+                   b.media AS "Media por temporada"
+            FROM best b JOIN drivers dn ON dn.driver_id = b.id LEFT JOIN equipos q ON q.driver = b.id
+            ORDER BY "Media por temporada" DESC NULLS LAST, "Temps. disputadas" DESC, Piloto
         """).df()
-    eq = (pty.groupby(['Piloto','Equipo'])['Season']
-            .apply(lambda s: _compress_years(list(s))).reset_index())
-    eq['pair'] = eq.apply(lambda r: f"{r['Equipo']} ({r['Season']})" if r['Season'] else r['Equipo'], axis=1)
-    eq2 = (eq.groupby('Piloto')['pair'].apply(lambda s: "; ".join([p for p in s if p])).reset_index()
-             .rename(columns={'pair':'Equipos (años)'}))
+    return _finish_ranking(out)
 
-    out = (base.merge(counts, on="Piloto", how="left")
-               .merge(eq2, on="Piloto", how="left"))
-    out = out.rename(columns={"GPs_media":"GPs media"})
-    cols = ["Piloto","Equipos (años)","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"]
-    out = out[cols].sort_values(["Media por temporada","Temps. disputadas"], ascending=[False, False])
-    out.index = range(1, len(out)+1); out.index.name = "Pos"
-    return out
-
-def best_seasons_teams() -> pd.DataFrame:
+@cached
+def best_seasons_teams(lineage_map: Optional[Dict] = None) -> pd.DataFrame:
     """
     Tabla por equipo (agregado sobre temporadas) con:
       Equipo | GPs media | Temps. disputadas | 1º (años) | 2º (años) | 3º (años) | Media por temporada
+    `lineage_map` (config/lineage.yaml): agrupa por el linaje vigente en cada temporada antes de
+    puntuar y clasificar (misma consulta, un join por intervalo).
     """
-    seasons = list_seasons()
-    if not seasons:
-        return pd.DataFrame(columns=["Equipo","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"])
-
-    rows = []
-    per_season_rank = []
-    for y in sorted(seasons):
-        _, t_rounds, _, t_final = load_season(y)
-        if t_final is None or t_final.empty:
-            continue
-        ttmp = t_final[["Equipo","Acum 0–100"]].sort_values("Acum 0–100", ascending=False).reset_index(drop=True)
-        ttmp["rank"] = ttmp.index + 1
-        for _, r in ttmp.iterrows():
-            per_season_rank.append({"Season": y, "Equipo": r["Equipo"], "rank": int(r["rank"])})
-        # nº GPs participados por equipo = nº rondas de esa temporada en t_rounds
-        ngps = t_rounds.groupby("Equipo")["Ronda"].nunique().reset_index().rename(columns={"Ronda":"GPs temp."})
-        tf2 = t_final.copy()
-        tf2["Season"] = y
-        tf2 = tf2.merge(ngps, on="Equipo", how="left")
-        for _, r in tf2.iterrows():
-            rows.append({"Equipo": r["Equipo"], "Season": y, "Acum100": r["Acum 0–100"], "GPs": int(r.get("GPs temp.", 0))})
-    if not rows:
-        return pd.DataFrame(columns=["Equipo","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"])
-
-    df = pd.DataFrame(rows)
-    rnk = pd.DataFrame(per_season_rank)
-
-    base = (df.groupby("Equipo", as_index=False)
-              .agg(GPs_media=("GPs","mean"),
-                   Temps=("Season","nunique"),
-                   MediaTemp=("Acum100","mean")))
-    base["GPs media"] = base["GPs_media"].round(2)
-    base["Media por temporada"] = base["MediaTemp"].round(3)
-    base["Temps. disputadas"] = base["Temps"].astype(int)
-    base = base.drop(columns=["GPs_media","MediaTemp","Temps"])
-
-    pos = (rnk.pivot_table(index=["Equipo","Season"], columns="rank", values="rank", aggfunc="size", fill_value=0)
-             .reset_index().rename_axis(None, axis=1))
-    pos = pos.rename(columns={1:"is1",2:"is2",3:"is3"})
-    for col in ["is1","is2","is3"]:
-        if col not in pos.columns: pos[col] = 0
-        pos[col] = pos[col].astype(int)
-    p1 = pos[pos["is1"]==1].groupby("Equipo")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="1º (años)")
-    p2 = pos[pos["is2"]==1].groupby("Equipo")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="2º (años)")
-    p3 = pos[pos["is3"]==1].groupby("Equipo")["Season"].apply(lambda s: ", ".join(str(int(x)) for x in sorted(s))).reset_index(name="3º (años)")
-    counts = (pos.groupby("Equipo")[["is1","is2","is3"]].sum().reset_index()
-                .merge(p1, on="Equipo", how="left")
-                .merge(p2, on="Equipo", how="left")
-                .merge(p3, on="Equipo", how="left"))
-    for col, name in [("is1","1º (años)"),("is2","2º (años)"),("is3","3º (años)")]:
-        counts[name] = counts[col].astype(int).astype(str) + " (" + counts[name].fillna("").astype(str) + ")"
-    counts = counts[["Equipo","1º (años)","2º (años)","3º (años)"]]
-
-    out = base.merge(counts, on="Equipo", how="left")
-    cols = ["Equipo","GPs media","Temps. disputadas","1º (años)","2º (años)","3º (años)","Media por temporada"]
-    out = out[cols].sort_values(["Media por temporada","Temps. disputadas"], ascending=[False, False])
-    out.index = range(1, len(out)+1); out.index.name = "Pos"
-    return out
+    if not lineage_map:
+        with _read() as con:
+            out = con.sql(f"""
+                WITH {_SEASON_CTES}, {_ranked_sql("t", "team")}
+                SELECT tn.name AS Equipo, b.gps_media AS "GPs media", b.temps AS "Temps. disputadas",
+                       b."1º (años)", b."2º (años)", b."3º (años)", b.media AS "Media por temporada"
+                FROM best b JOIN teams tn ON tn.team_id = b.id
+                ORDER BY "Media por temporada" DESC NULLS LAST, "Temps. disputadas" DESC, Equipo
+            """).df()
+        return _finish_ranking(out)
+    root, join = _lineage_root_sql("tn.name", "x.season")
+    with _read() as con, _lineage_view(con, lineage_map):
+        out = con.sql(f"""
+            WITH {_SEASON_CTES},
+            tl AS (
+                SELECT x.season, x.round, {root} AS team, SUM(x.points_gp) AS points_gp
+                FROM t x JOIN teams tn ON tn.team_id = x.team {join}
+                GROUP BY ALL
+            ),
+            {_ranked_sql("tl", "team")}
+            SELECT b.id AS Equipo, b.gps_media AS "GPs media", b.temps AS "Temps. disputadas",
+                   b."1º (años)", b."2º (años)", b."3º (años)", b.media AS "Media por temporada"
+            FROM best b
+            ORDER BY "Media por temporada" DESC NULLS LAST, "Temps. disputadas" DESC, Equipo
+        """).df()
+    return _finish_ranking(out)
@@ -0,0 +1,147 @@
+"""
+Accesores de datos cacheados para la app Streamlit (compartidos por todas las páginas y sesiones).
+
+- Lecturas de la DB: `st.cache_data` con la generación de datos (`storage.data_generation`) como
+  parte de la clave → reruns y cambios de selector salen de memoria; tras una ingesta/rescore la
+  generación cambia y la siguiente lectura va a la DB (sin datos obsoletos).
+- Config (linajes / naming): clave = mtime del YAML, se re-parsea solo si el fichero cambia.
+- Simulación: determinista por (temporada, ronda), se cachea sin más.
+- La app es un proceso lector (`F1GOAT_DB_MODE=reader` salvo que el entorno diga otra cosa): lee el
+  snapshot que publica el escritor y nunca bloquea ni espera a una ingesta en curso.
+Solo lo importa la app (requiere streamlit).
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Optional
+import os
+import streamlit as st
+
+from . import storage, aggregations, naming, simdata
+
+storage.set_db_mode(os.getenv("F1GOAT_DB_MODE", "reader"))
+
+LINEAGE_PATH = "config/lineage.yaml"
+NAMING_PATH = "config/naming.yaml"
+
+def _mtime(path: str) -> float:
+    p = Path(path)
+    return p.stat().st_mtime if p.exists() else 0.0
+
+def generation() -> int:
+    return storage.data_generation()
+
+def config_stamp() -> tuple:
+    """(mtime lineage.yaml, mtime naming.yaml): cambia si se edita la config."""
+    return _mtime(LINEAGE_PATH), _mtime(NAMING_PATH)
+
+# ---------- Config ----------
+
+@st.cache_data(show_spinner=False)
+def _lineages(path: str, mtime: float) -> Dict:
+    return naming.load_lineages(path)
+
+def load_lineages(path: str = LINEAGE_PATH) -> Dict:
+    return _lineages(path, _mtime(path))
+
+# ---------- Selectores ----------
+
+@st.cache_data(show_spinner=False)
+def _list_seasons(gen: int):
+    return storage.list_seasons()
+
+def list_seasons():
+    return _list_seasons(generation())
+
+@st.cache_data(show_spinner=False)
+def _list_rounds_with_names(season: int, gen: int):
+    return storage.list_rounds_with_names(season)
+
+def list_rounds_with_names(season: int):
+    return _list_rounds_with_names(season, generation())
+
+# ---------- Gran Premio ----------
+
+@st.cache_data(show_spinner=False)
+def _load_gp(season: int, rnd: int, gen: int):
+    return storage.load_gp(season, rnd)
+
+def load_gp(season: int, rnd: int):
+    return _load_gp(season, rnd, generation())
+
+@st.cache_data(show_spinner=False)
+def _load_latest_gp(gen: int):
+    return storage.load_latest_gp()
+
+def load_latest_gp():
+    return _load_latest_gp(generation())
+
+@st.cache_data(show_spinner=False)
+def _latest_events(gen: int):
+    return storage.get_latest_calendar_event(), storage.get_latest_results_event()
+
+def get_latest_calendar_event():
+    return _latest_events(generation())[0]
+
+def get_latest_results_event():
+    return _latest_events(generation())[1]
+
+# ---------- Temporada ----------
+
+@st.cache_data(show_spinner=False)
+def _load_season(season: int, group_lineage: bool, gen: int, stamp: tuple):
+    return storage.load_season(season, lineage_map=load_lineages() if group_lineage else None)
+
+def load_season(season: int, group_lineage: bool = False):
+    return _load_season(season, group_lineage, generation(), config_stamp())
+
+@st.cache_data(show_spinner=False)
+def _standings_as_of(season: int, rnd: int, top_k: Optional[int], kind: str, group_lineage: bool,
+                     gen: int, stamp: tuple):
+    lin = load_lineages() if group_lineage else None
+    return storage.standings_as_of(season, rnd, top_k=top_k, kind=kind, lineage_map=lin)
+
+def standings_as_of(season: int, rnd: int, top_k: Optional[int] = None, kind: str = "driver",
+                    group_lineage: bool = False):
+    return _standings_as_of(season, rnd, top_k, kind, group_lineage, generation(), config_stamp())
+
+# ---------- Histórico y mejores temporadas ----------
+
+@st.cache_data(show_spinner=False)
+def _historical_pilots_table(gen: int):
+    return aggregations.historical_pilots_table()
+
+def historical_pilots_table():
+    return _historical_pilots_table(generation())
+
+@st.cache_data(show_spinner=False)
+def _best_seasons_pilots(gen: int):
+    return aggregations.best_seasons_pilots()
+
+def best_seasons_pilots():
+    return _best_seasons_pilots(generation())
+
+@st.cache_data(show_spinner=False)
+def _best_seasons_teams(group_lineage: bool, gen: int, stamp: tuple):
+    return aggregations.best_seasons_teams(load_lineages() if group_lineage else None)
+
+def best_seasons_teams(group_lineage: bool = False):
+    return _best_seasons_teams(group_lineage, generation(), config_stamp())
+
+# ---------- Diagnóstico ----------
+
+@st.cache_data(show_spinner=False)
+def _coverage_table(gen: int):
+    return storage.coverage_table()
+
+def coverage_table():
+    return _coverage_table(generation())
+
+# ---------- Simulación (demo) ----------
+
+@st.cache_data(show_spinner=False)
+def simulate_gp(season: int, rnd: int):
+    return simdata.simulate_gp(season, rnd)
+
+@st.cache_data(show_spinner=False)
+def simulate_season(season: int, rounds: int = 8):
+    return simdata.simulate_season(season, rounds=rounds)
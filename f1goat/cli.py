@@ -4,16 +4,19 @@ from typing import List, Optional
 from argparse import ArgumentParser
 
 def update(season: Optional[int] = None) -> bool:
-    from .data_sources import ingest_latest
+    from .data_sources import update_incremental
     try:
-        y, r, name = ingest_latest(season_hint=season or 2025)
-        print(f"[F1GOAT] Ingestado: {name} (temporada {y}, ronda {r}).")
-        return True
+        report = update_incremental(season_hint=season)
     except Exception as e:
         print("[F1GOAT] Error en actualización:", e)
         return False
+    for item in report:
+        print(f"[F1GOAT] {item['status']:>10} | {item['official']} (temporada {item['season']}, ronda {item['round']}) "
+              f"— {item['source']}: drivers={item['drivers']}")
+    return not any(item["status"] == "error" for item in report)
 
-def backfill(season: Optional[int], start: Optional[int], end: Optional[int], ergast_only: bool, fastf1_only: bool) -> int:
+def backfill(season: Optional[int], start: Optional[int], end: Optional[int], ergast_only: bool, fastf1_only: bool,
+             workers: int = 1, bulk: bool = False, csv_only: bool = False, resume: bool = False) -> int:
     from .data_sources import ingest_season, ingest_range
     pref = "auto"
     if ergast_only and fastf1_only:
@@ -23,12 +26,16 @@ def backfill(season: Optional[int], start: Optional[int], end: Optional[int], er
         pref = "ergast"
     if fastf1_only:
         pref = "fastf1"
+    if csv_only:
+        pref = "csv"
+    if bulk and pref != "ergast":
+        print("[F1GOAT] --bulk solo aplica con Ergast/Jolpica (--ergast-only); se ignora.")
 
     if season:
-        ok = ingest_season(season, preference=pref)  # type: ignore
+        ok = ingest_season(season, preference=pref, workers=workers, bulk=bulk, resume=resume)  # type: ignore
         return 0 if ok >= 0 else 1
     if start and end:
-        ok = ingest_range(start, end, preference=pref)  # type: ignore
+        ok = ingest_range(start, end, preference=pref, workers=workers, bulk=bulk, resume=resume)  # type: ignore
         return 0 if ok >= 0 else 1
     print("Uso: python -m f1goat backfill --season 2025 [--ergast-only|--fastf1-only]\n"
           "     python -m f1goat backfill --from 2018 --to 2025 [--ergast-only|--fastf1-only]")
@@ -49,11 +56,70 @@ def coverage() -> int:
     print(coverage_report())
     return 0
 
+def rescore(season: Optional[int] = None, dry_run: bool = False) -> int:
+    from .rescore import rescore as _rescore
+    try:
+        r = _rescore(season, dry_run=dry_run)
+    except Exception as e:
+        print("[F1GOAT] Error en rescore:", e)
+        return 1
+    scope = f"temporada {season}" if season else "todo el histórico"
+    verb = "se recalcularían" if dry_run else "recalculados"
+    print(f"[F1GOAT] Rescore ({scope}): {r['events']} GPs {verb} — drivers={r['drivers']}, teams={r['teams']} "
+          f"en {r['seconds']} s")
+    return 0
+
+def lake(seasons: Optional[List[int]] = None) -> int:
+    from .lake import rebuild, lake_root
+    try:
+        n = rebuild(seasons)
+    except Exception as e:
+        print("[F1GOAT] Error regenerando el espejo Parquet:", e)
+        return 1
+    print(f"[F1GOAT] Espejo Parquet: {n} fichero(s) escritos en {lake_root()}")
+    return 0
+
+def registry(bulk: bool = False, merge: bool = False) -> int:
+    # Registro local de pilotos (códigos / retransmisión / nombre completo → un driver_id)
+    from .storage import rebuild_registry
+    frame = None
+    if bulk:
+        from .data_sources import ERGAST_CSV
+        from .offline import offline_source
+        if not ERGAST_CSV:
+            print("[F1GOAT] registry --bulk: define F1GOAT_ERGAST_CSV", file=sys.stderr)
+            return 2
+        frame = offline_source(ERGAST_CSV).drivers()
+    stats = rebuild_registry(frame, merge)
+    print(f"[F1GOAT] Registro de pilotos: {stats['identities']} identidades, {stats['aliases']} alias, "
+          f"{stats['ambiguous']} alias ambiguos, {len(stats['candidates'])} carreras partidas")
+    span = lambda s: f"{s[0]}–{s[1]}" if s else "sin resultados"
+    if merge:
+        for m in stats["merged"]:
+            print(f"  fusionado: {m['src']} → {m['dst']} ({span(m['seasons'])})")
+        for m in stats["conflicts"]:
+            print(f"  conflicto (GPs en común, sin fusionar): {m['src']} → {m['dst']} ({span(m['seasons'])})")
+    else:
+        for m in stats["candidates"]:
+            print(f"  candidato: {m['src']} → {m['dst']} ({span(m['seasons'])})")
+        if stats["candidates"]:
+            print("  (f1goat registry --merge para fusionarlos)")
+    return 0
+
+def worker(drain: bool = False) -> int:
+    # Servicio escritor único: consume la cola de la app (f1goat.jobs) y publica el snapshot
+    from .storage import set_db_mode
+    from .jobs import run_worker
+    set_db_mode("writer")
+    n = run_worker(drain=drain)
+    print(f"[F1GOAT] Trabajador: {n} trabajo(s) procesados")
+    return 0
+
 def main(argv: List[str] | None = None) -> int:
     parser = ArgumentParser(prog="f1goat", description="F1GOAT CLI")
     sub = parser.add_subparsers(dest="command")
-    p_up = sub.add_parser("update", help="Actualizar datos (último GP disponible)")
-    p_up.add_argument("--season", type=int, default=None, help="Temporada preferida (hint).")
+    p_up = sub.add_parser("update", help="Actualizar datos (solo GPs que faltan en la base)")
+    p_up.add_argument("--season", type=int, default=None, help="Temporada preferida (por defecto, la actual).")
 
     p_bf = sub.add_parser("backfill", help="Ingesta de temporada completa o rango")
     p_bf.add_argument("--season", type=int, default=None, help="Temporada única (ej. 2025)")
@@ -61,23 +127,45 @@ def main(argv: List[str] | None = None) -> int:
     p_bf.add_argument("--to", dest="to_year", type=int, default=None, help="Año fin")
     p_bf.add_argument("--ergast-only", action="store_true", help="Forzar Ergast (ignora FastF1)")
     p_bf.add_argument("--fastf1-only", action="store_true", help="Forzar FastF1 (sin Ergast)")
+    p_bf.add_argument("--workers", type=int, default=int(os.getenv("F1GOAT_WORKERS","1")), help="Descargas en paralelo (solo Ergast pasa por el limitador de peticiones)")
+    p_bf.add_argument("--bulk", action="store_true", help="Ergast: una descarga paginada por temporada (no por ronda)")
+    p_bf.add_argument("--resume", action="store_true", help="Saltar rondas ya completadas (ingest_state)")
 
     # Nuevo: ingest --source jolpica --seasons A-B(,C)
     p_ing = sub.add_parser("ingest", help="Ingesta dirigida por fuente")
     p_ing.add_argument("--seasons", required=True, help="Ej: 1950-1952 o lista 1950,1952")
-    p_ing.add_argument("--source", choices=["jolpica","ergast","fastf1","auto"], default="auto")
+    p_ing.add_argument("--source", choices=["jolpica","ergast","fastf1","csv","auto"], default="auto",
+                       help="csv = solo F1GOAT_ERGAST_CSV (sin red)")
     p_ing.add_argument("--rate", type=float, default=float(os.getenv("F1GOAT_ERGAST_RATE","3")), help="req/s (por defecto 3)")
-    p_ing.add_argument("--resume", action="store_true", help="reanudar donde falte (si aplica)")
+    p_ing.add_argument("--resume", action="store_true", help="reanudar: salta rondas ya 'ok' en ingest_state y reintenta las fallidas")
+    p_ing.add_argument("--workers", type=int, default=int(os.getenv("F1GOAT_WORKERS","4")), help="Descargas en paralelo (por defecto 4; solo Ergast pasa por el limitador de peticiones)")
+    p_ing.add_argument("--bulk", action="store_true", help="jolpica/ergast: una descarga paginada por temporada")
 
     sub.add_parser("validate", help="Validar último GP en la base de datos")
     sub.add_parser("coverage", help="Mostrar cobertura (qué temporadas y rondas faltan)")
+    p_rs = sub.add_parser("rescore", help="Recalcular puntuaciones desde las entradas guardadas (sin red)")
+    p_rs.add_argument("--season", type=int, default=None, help="Solo una temporada (por defecto, todo)")
+    p_rs.add_argument("--dry-run", action="store_true", help="Calcular sin escribir en la base")
+    p_lk = sub.add_parser("lake", help="Regenerar el espejo Parquet por temporada (data/lake)")
+    p_lk.add_argument("--season", type=int, action="append", default=None, help="Solo estas temporadas (repetible)")
+    p_rg = sub.add_parser("registry", help="Reconstruir el registro local de pilotos (informa de carreras partidas)")
+    p_rg.add_argument("--bulk", action="store_true", help="Añadir las identidades del CSV offline de Ergast")
+    p_rg.add_argument("--merge", action="store_true", help="Fusionar las carreras partidas sin GPs en común")
+    p_wk = sub.add_parser("worker", help="Proceso escritor: ejecuta la cola de actualizaciones de la app")
+    p_wk.add_argument("--drain", action="store_true", help="Salir cuando la cola quede vacía")
     args = parser.parse_args(argv)
 
+    if args.command in ("validate", "coverage", "lake"):
+        # Solo lectura: leen el snapshot y no compiten con un escritor en curso
+        from .storage import set_db_mode
+        set_db_mode(os.getenv("F1GOAT_DB_MODE", "reader"))
+
     if args.command == "update":
         ok = update(args.season)
         return 0 if ok else 1
     if args.command == "backfill":
-        return backfill(args.season, args.from_year, args.to_year, args.ergast_only, args.fastf1_only)
+        return backfill(args.season, args.from_year, args.to_year, args.ergast_only, args.fastf1_only, args.workers, args.bulk,
+                        resume=args.resume)
     if args.command == "ingest":
         # Parseo flexible de años: rangos A-B y/o lista separada por comas
         years = []
@@ -99,12 +187,23 @@ def main(argv: List[str] | None = None) -> int:
             os.environ.setdefault("F1GOAT_ERGAST_BASE", "https://api.jolpi.ca/ergast")
             print(f"[F1GOAT] Ingest (jolpica): base={os.getenv('F1GOAT_ERGAST_BASE')}", file=sys.stderr)
         # Reutiliza backfill min..max
-        return backfill(None, min(years), max(years), erg_only, fastf1_only)
+        from .http import set_rate
+        set_rate(args.rate)
+        return backfill(None, min(years), max(years), erg_only, fastf1_only, args.workers, args.bulk,
+                        csv_only=(args.source == "csv"), resume=args.resume)
 
     if args.command == "validate":
         return validate()
     if args.command == "coverage":
         return coverage()
+    if args.command == "worker":
+        return worker(args.drain)
+    if args.command == "lake":
+        return lake(args.season)
+    if args.command == "registry":
+        return registry(args.bulk, args.merge)
+    if args.command == "rescore":
+        return rescore(args.season, args.dry_run)
 
     parser.print_help()
     return 0
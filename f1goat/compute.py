@@ -6,7 +6,8 @@ Cálculos oficiales F1GOAT (simulación):
 - SeasonCap a 0–100.
 """
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 @dataclass(frozen=True)
@@ -65,6 +66,101 @@ def compute_csi(
     csi = base / max(car_strength, eps)
     return float(round(csi, 3))
 
+# ---------- Versiones batch (vectorizadas) ----------
+
+def _as_array(x, n: Optional[int]=None) -> np.ndarray:
+    """Columna/array/escalar → float64; None/NA/NaN = componente ausente (NaN)."""
+    if x is None:
+        return np.full(n or 0, np.nan)
+    if np.isscalar(x):
+        return np.full(n or 1, float(x))
+    return pd.to_numeric(pd.Series(x), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+def _round(a: np.ndarray, nd: int=3) -> np.ndarray:
+    """np.round salvo en casos frontera (…5), que se resuelven con `round` de Python como el escalar."""
+    out = np.round(a, nd)
+    scaled = a * 10.0**nd
+    edge = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in edge:
+        out[i] = round(float(a[i]), nd)
+    return out
+
+def _components(rr, qr, td, oq, wa) -> np.ndarray:
+    cols = [x for x in (rr, qr, td, oq, wa) if x is not None and not np.isscalar(x)]
+    n = len(cols[0]) if cols else 1
+    return np.column_stack([_as_array(x, n) for x in (rr, qr, td, oq, wa)])
+
+def compute_gp_points_batch(rr=None, qr=None, td=None, oq=None, wa=None, pf=0.0,
+                            w: WeightsGP = WeightsGP()) -> np.ndarray:
+    """
+    Igual que `compute_gp_points_f1goat` pero sobre columnas enteras: NaN marca componente ausente
+    (máscara) y se renormaliza con los pesos presentes en cada fila; PF se trunca a PF_max_penalty.
+    """
+    comps = _components(rr, qr, td, oq, wa)
+    weights = np.array([w.RR, w.QR, w.TD, w.OQ, w.WA])
+    present = ~np.isnan(comps)
+    vals = np.where(present, comps, 0.0)
+    # Suma columna a columna (mismo orden que la versión escalar → mismo redondeo)
+    weighted = np.zeros(len(comps)); wsum = np.zeros(len(comps))
+    for j, wt in enumerate(weights):
+        weighted += vals[:, j] * wt
+        wsum += present[:, j] * wt
+    base = 10.0 * np.divide(weighted, 10.0 * wsum, out=np.zeros(len(comps)), where=wsum > 0)
+    pen = np.nan_to_num(np.abs(_as_array(pf, len(comps))), nan=0.0)
+    penalty = np.clip(pen, 0.0, w.PF_max_penalty)
+    return _round(np.clip(base - penalty, 0.0, 10.0))
+
+def compute_csi_batch(rr=None, qr=None, td=None, oq=None, wa=None, car_strength=1.0) -> np.ndarray:
+    """Versión vectorizada de `compute_csi` (media de componentes presentes / fuerza del coche)."""
+    eps = 1e-6
+    comps = _components(rr, qr, td, oq, wa)
+    present = ~np.isnan(comps)
+    cnt = present.sum(axis=1)
+    total = np.zeros(len(comps))
+    for j in range(comps.shape[1]):
+        total += np.where(present[:, j], comps[:, j], 0.0)
+    base = np.divide(total, cnt, out=np.zeros(len(comps)), where=cnt > 0)
+    strength = np.maximum(_as_array(car_strength, len(comps)), eps)
+    return _round(base / strength)
+
+# ---------- Puntuación desde entradas crudas (parrilla / final) ----------
+
+def team_ops(team:str) -> float: return 8.0
+def team_rel(team:str) -> float: return 8.0
+def team_dev(team:str) -> float: return 8.0
+
+def score_results(dr: pd.DataFrame, by: Optional[List[str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Entradas crudas (Piloto, Equipo, Parrilla, Final[, Status]) → (drivers, teams) con todas las columnas derivadas.
+    `by`: columnas de agrupación extra (p. ej. ["event_key"]) para puntuar muchos GPs en una sola pasada;
+    se conservan en ambos frames. Sin `by`, el frame es un único GP.
+    """
+    by = list(by or [])
+    dr = dr.reset_index(drop=True)
+    grid = pd.to_numeric(dr["Parrilla"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    final = pd.to_numeric(dr["Final"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    rr = np.maximum(0.0, 10.0 - 0.35*(final-1))   # NaN si falta Final
+    qr = np.maximum(0.0, 10.0 - 0.30*(grid-1))
+    td = np.maximum(0.0,  9.0 - 0.25*(final-1))
+    drivers = pd.DataFrame({c: dr[c] for c in by})
+    drivers = drivers.assign(**{
+        "Piloto": dr["Piloto"], "Equipo": dr["Equipo"], "Parrilla": dr["Parrilla"], "Final": dr["Final"],
+        "CSI": compute_csi_batch(rr, qr, td, None, None, car_strength=1.0),
+        "RR": rr, "QR": qr, "TD": td, "OQ": None, "WA": None, "PF": 0.0,
+        "Puntos F1GOAT (GP)": compute_gp_points_batch(rr, qr, td, None, None, pf=0.0),
+    })
+    if "Status" in dr.columns:
+        drivers["Status"] = dr["Status"]
+    teams = (drivers.groupby(by + ["Equipo"], as_index=False)
+             .agg({"Parrilla":"mean","Final":"mean","CSI":"mean"})
+             .rename(columns={"Parrilla":"Parrilla media","Final":"Final media","CSI":"CSI medio"}))
+    if not teams.empty:
+        teams["Ops"] = teams["Equipo"].map(team_ops)
+        teams["Rel"] = teams["Equipo"].map(team_rel)
+        teams["Dev"] = teams["Equipo"].map(team_dev)
+        teams["Puntos F1GOAT (GP)"] = (0.6*teams["CSI medio"] + 0.2*teams["Ops"] + 0.1*teams["Rel"] + 0.1*teams["Dev"]).round(3)
+    return drivers, teams
+
 def season_scale_0_100(series: Iterable[float]) -> pd.Series:
     s = pd.Series(series, dtype="float64")
     if s.empty:
@@ -1,23 +1,14 @@
 from __future__ import annotations
-from .storage import _connect
+import pandas as pd
+from .storage import coverage_table
 
 def coverage_report() -> str:
-    with _connect() as con:
-        seasons = con.sql("SELECT DISTINCT season FROM gp_events WHERE round>=1 ORDER BY season ASC").df()["season"].tolist()
-        lines = []
-        for y in seasons:
-            ev = con.sql("SELECT round, official_name FROM gp_events WHERE season=? AND round>=1 ORDER BY round", params=[y]).df()
-            have = con.sql("""
-                SELECT DISTINCT e.round
-                FROM gp_events e JOIN gp_driver_results d ON e.event_key=d.event_key
-                WHERE e.season=? AND e.round>=1
-                ORDER BY e.round
-            """, params=[y]).df()["round"].tolist()
-            all_rounds = ev["round"].tolist()
-            missing = [r for r in all_rounds if r not in have]
-            lines.append(f"{y}: total={len(all_rounds)}, con_resultados={len(have)}, faltan={len(missing)}")
-            if missing:
-                for r in missing:
-                    name = ev.loc[ev["round"]==r, "official_name"].iloc[0]
-                    lines.append(f"  - R{int(r):02d} {name}")
-        return "\n".join(lines) if lines else "No hay eventos registrados."
+    # Una consulta agrupada para todas las temporadas (storage.coverage_table)
+    lines = []
+    for r in coverage_table(names=True).to_dict("records"):
+        lines.append(f"{r['Temporada']}: total={r['Rondas']}, con_resultados={r['Con resultados']}, faltan={r['Faltan']}")
+        lines.extend(f"  - {gp}" for gp in r["GPs sin resultados"])
+        if pd.notna(r["Último estado"]):
+            lines.append(f"  última ingesta: {r['Último estado']} ({r['Fuente']}, {r['Actualizado']}), "
+                         f"rondas con error={r['Rondas con error']}")
+    return "\n".join(lines) if lines else "No hay eventos registrados."
@@ -1,16 +1,21 @@
 from __future__ import annotations
 from pathlib import Path
 from datetime import date
-from typing import Tuple, Optional, Literal
-import os, time, json, urllib.request
+from typing import Tuple, Optional, Literal, List, Dict, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os, time, json, hashlib, threading, urllib.request
 
 import pandas as pd
 from .http import ergast_json
 import fastf1 as ff1
 
-from .compute import compute_gp_points_f1goat, compute_csi
-from .storage import upsert_event, upsert_driver_results, upsert_team_results
+from .compute import score_results
+from .storage import (upsert_gp_batch,
+                      list_rounds_with_results, get_latest_results_event,
+                      record_ingest_state, load_ingest_state, driver_registry)
 from .normalize import canonical_team, canonical_driver_broadcast, canonical_driver_from_ergast
+from .offline import offline_source
+from .schedule import season_calendar, calendar_event, official_name as _official_name
 
 # ---------- Config ----------
 ff1.Cache.enable_cache(Path("data/fastf1_cache"))
@@ -71,33 +76,9 @@ def _normalize_driver_df_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _team_ops(team:str) -> float: return 8.0
-def _team_rel(team:str) -> float: return 8.0
-def _team_dev(team:str) -> float: return 8.0
-
-def _official_name(season:int, official_or_event:str) -> str:
-    return f"{season} — {official_or_event}"
-
-def _is_testing_row(r) -> bool:
-    name = str(r.get("OfficialEventName") or r.get("EventName") or "").lower()
-    fmt  = str(r.get("EventFormat", "")).lower()
-    return ("testing" in name) or ("test" in name) or ("testing" in fmt) or ("test" in fmt)
-
 def register_schedule(season:int) -> int:
-    sched = ff1.get_event_schedule(season)
-    cnt = 0
-    for _, r in sched.sort_values("RoundNumber").iterrows():
-        try:
-            rnd = int(r["RoundNumber"])
-        except Exception:
-            continue
-        if rnd <= 0 or _is_testing_row(r):
-            continue
-        official = r.get("OfficialEventName") or r.get("EventName") or f"GP {season} R{rnd}"
-        evdate = pd.to_datetime(r.get("EventDate")).date()
-        upsert_event(season, rnd, _official_name(season, official), evdate)
-        cnt += 1
-    return cnt
+    # El proveedor de calendario ya vuelca los eventos en gp_events (una vez por temporada)
+    return len(season_calendar(season))
 
 # ---------- HTTP helper ----------
 def _http_json(url: str, retries: int = 3) -> dict:
@@ -137,46 +118,21 @@ def _ergast_results_by_round__dead1(season:int, rnd:int) -> pd.DataFrame:
 
 # ---------- Ergast offline CSV ----------
 def _ergast_csv_results_by_round(season:int, rnd:int) -> pd.DataFrame:
+    # CSV cargado una vez e indexado por (season, round); ver f1goat.offline
     if not ERGAST_CSV:
         return pd.DataFrame()
-    p = Path(ERGAST_CSV)
-    if not p.exists():
-        return pd.DataFrame()
-    df = pd.read_csv(p)
-    cols = {c.lower(): c for c in df.columns}
-    def col(*cands):
-        for c in cands:
-            if c.lower() in cols: return cols[c.lower()]
-        return None
-    c_season = col("season","Year")
-    c_round  = col("round","Race","Rnd")
-    c_gname  = col("givenName","GivenName")
-    c_fname  = col("familyName","FamilyName","surname")
-    c_code   = col("code","DriverCode","DrvCode")
-    c_driver = col("driver","Driver","DriverName","Driver Full Name")
-    c_team   = col("constructor","Constructor","Team","ConstructorName","TeamName")
-    c_grid   = col("grid","GridPosition")
-    c_pos    = col("position","Position","ResultPosition","Final")
-    if not c_season or not c_round or (not c_driver and not (c_gname and c_fname)) or not c_team:
-        return pd.DataFrame()
-    sub = df[(df[c_season]==season) & (df[c_round]==rnd)].copy()
-    if sub.empty:
-        return pd.DataFrame()
-    if c_driver:
-        sub["Piloto"] = sub[c_driver].astype(str)
-    else:
-        sub["Piloto"] = (sub[c_gname].astype(str).str.strip() + " " + sub[c_fname].astype(str).str.strip())
-    sub["Piloto"] = sub["Piloto"].apply(lambda x: x.strip())
-    sub["Piloto"] = sub["Piloto"].apply(lambda x: canonical_driver_from_ergast(*(x.split(" ")[:1]+[" ".join(x.split(" ")[1:])]), None) if isinstance(x,str) else x)
-    sub["Equipo"] = sub[c_team].astype(str).apply(canonical_team)
-    sub["Parrilla"] = pd.to_numeric(sub[c_grid], errors="coerce")
-    sub["Final"]    = pd.to_numeric(sub[c_pos], errors="coerce")
-    return sub[["Piloto","Equipo","Parrilla","Final"]].reset_index(drop=True)
+    return offline_source(ERGAST_CSV).results(season, rnd)
 
 # ---------- Log ----------
+_LOG_LOCK = threading.Lock()
+
 def _log_ingest(season:int, rnd:int, official:str, source:str, n_dr:int, n_tm:int, status:str, message:str=""):
     Path("data").mkdir(parents=True, exist_ok=True)
     logp = Path("data/ingest_log.csv")
+    with _LOG_LOCK:
+        _append_log(logp, season, rnd, official, source, n_dr, n_tm, status, message)
+
+def _append_log(logp: Path, season:int, rnd:int, official:str, source:str, n_dr:int, n_tm:int, status:str, message:str):
     header = not logp.exists()
     with logp.open("a", encoding="utf-8") as f:
         if header:
@@ -187,41 +143,49 @@ def _log_ingest(season:int, rnd:int, official:str, source:str, n_dr:int, n_tm:in
 
 # ---------- Post-proceso (puntos) ----------
 def _compute_from_driver_df(dr: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    dr = _normalize_driver_df_columns(dr)
-    rows = []
-    for _, r in dr.iterrows():
-        grid = r["Parrilla"]; final = r["Final"]
-        rr = None if pd.isna(final) else max(0.0, 10.0 - 0.35*(final-1))
-        qr = None if pd.isna(grid)  else max(0.0, 10.0 - 0.30*(grid-1))
-        td = None if pd.isna(final) else max(0.0,  9.0 - 0.25*(final-1))
-        oq = None; wa = None; pf = 0.0
-        points = compute_gp_points_f1goat(rr, qr, td, oq, wa, pf)
-        csi = compute_csi(rr, qr, td, oq, wa, car_strength=1.0)
-        rows.append({"Piloto":r["Piloto"],"Equipo":r["Equipo"],"Parrilla":grid,"Final":final,
-                     "CSI":csi,"RR":rr,"QR":qr,"TD":td,"OQ":oq,"WA":wa,"PF":pf,"Puntos F1GOAT (GP)":points})
-    drivers = pd.DataFrame(rows)
-    teams = (drivers.groupby("Equipo", as_index=False)
-             .agg({"Parrilla":"mean","Final":"mean","CSI":"mean"})
-             .rename(columns={"Parrilla":"Parrilla media","Final":"Final media","CSI":"CSI medio"}))
-    if not teams.empty:
-        teams["Ops"] = teams["Equipo"].map(_team_ops)
-        teams["Rel"] = teams["Equipo"].map(_team_rel)
-        teams["Dev"] = teams["Equipo"].map(_team_dev)
-        teams["Puntos F1GOAT (GP)"] = (0.6*teams["CSI medio"] + 0.2*teams["Ops"] + 0.1*teams["Rel"] + 0.1*teams["Dev"]).round(3)
-    return drivers, teams
+    # La fórmula vive en compute.score_results (la misma que usa `f1goat rescore`)
+    return score_results(_normalize_driver_df_columns(dr))
 
 def _official_from_schedule(season:int, rnd:int) -> Tuple[str, date]:
-    sched = ff1.get_event_schedule(season)
-    rr = sched.loc[sched["RoundNumber"] == rnd]
-    if not rr.empty:
-        r0 = rr.sort_values("RoundNumber").iloc[0]
-        official = r0.get("OfficialEventName") or r0.get("EventName") or f"GP {season} R{rnd}"
-        evdate = pd.to_datetime(r0.get("EventDate")).date()
-        return _official_name(season, official), evdate
+    ev = calendar_event(season, rnd)
+    if ev is not None:
+        return ev
     return f"{season} — GP R{rnd}", pd.to_datetime(f"{season}-01-01").date()
 
 # ---------- Core fetch ----------
-def fetch_gp(season:int, rnd:int, preference: Literal["auto","ergast","fastf1"]="auto"):
+def _fastf1_base(res: pd.DataFrame, season:int) -> pd.DataFrame:
+    """
+    Resultados FastF1 → columnas de la app. Piloto: el nombre de retransmisión ("C SAINZ") se
+    resuelve con el registro local al mismo ID que el nombre completo de Ergast ("Carlos SAINZ"),
+    siempre que Nombre/Apellido de la sesión coincidan con esa identidad; si no, se usa
+    "Nombre APELLIDO" de la propia sesión.
+    """
+    base = (res[["BroadcastName","TeamName","GridPosition","Position","Status"]]
+            .rename(columns={"BroadcastName":"Piloto","TeamName":"Equipo","GridPosition":"Parrilla","Position":"Final"}))
+    base["Piloto"] = base["Piloto"].apply(canonical_driver_broadcast)
+    codes = res["Abbreviation"] if "Abbreviation" in res.columns else None
+    fulls = None
+    if {"FirstName", "LastName"} <= set(res.columns):
+        fulls = pd.Series([canonical_driver_from_ergast(g, f) if isinstance(f, str) and f.strip() else None
+                           for g, f in zip(res["FirstName"].fillna(""), res["LastName"])], index=base.index)
+    base["Piloto"] = driver_registry().resolve_series(base["Piloto"], season, codes, fulls)
+    base["Equipo"] = base["Equipo"].apply(canonical_team)
+    return base
+
+def fetch_gp(season:int, rnd:int, preference: Literal["auto","ergast","fastf1","csv"]="auto"):
+    # 0) solo CSV offline (sin red)
+    if preference == "csv":
+        try:
+            official_name, event_date = _official_from_schedule(season, rnd)
+        except Exception:
+            official_name, event_date = f"{season} — GP R{rnd}", pd.to_datetime(f"{season}-01-01").date()
+        dr = _ergast_csv_results_by_round(season, rnd)
+        if dr.empty:
+            return (pd.DataFrame(), pd.DataFrame(), official_name, event_date, "none")
+        dr["Equipo"] = dr["Equipo"].apply(canonical_team)
+        drivers, teams = _compute_from_driver_df(dr)
+        return drivers, teams, official_name, event_date, "ergast_csv"
+
     # 1) fastf1 directo
     if preference == "fastf1":
         try:
@@ -235,10 +199,7 @@ def fetch_gp(season:int, rnd:int, preference: Literal["auto","ergast","fastf1"]=
             if res is None or len(res) == 0:
                 _log_ingest(season, rnd, official_name, "fastf1", 0, 0, "no_results", "fastf1_empty")
                 return (pd.DataFrame(), pd.DataFrame(), official_name, event_date, "none")
-            base = (res[["BroadcastName","TeamName","GridPosition","Position"]]
-                    .rename(columns={"BroadcastName":"Piloto","TeamName":"Equipo","GridPosition":"Parrilla","Position":"Final"}))
-            base["Piloto"] = base["Piloto"].apply(canonical_driver_broadcast)
-            base["Equipo"] = base["Equipo"].apply(canonical_team)
+            base = _fastf1_base(res, season)
             drivers, teams = _compute_from_driver_df(base)
             return drivers, teams, official_name, event_date, "fastf1"
         except Exception as e:
@@ -277,10 +238,7 @@ def fetch_gp(season:int, rnd:int, preference: Literal["auto","ergast","fastf1"]=
         event_date = pd.to_datetime(getattr(ev, "EventDate", race.date)).date()
         res = race.results
         if res is not None and len(res) > 0:
-            base = (res[["BroadcastName","TeamName","GridPosition","Position"]]
-                    .rename(columns={"BroadcastName":"Piloto","TeamName":"Equipo","GridPosition":"Parrilla","Position":"Final"}))
-            base["Piloto"] = base["Piloto"].apply(canonical_driver_broadcast)
-            base["Equipo"] = base["Equipo"].apply(canonical_team)
+            base = _fastf1_base(res, season)
             drivers, teams = _compute_from_driver_df(base)
             return drivers, teams, official_name, event_date, "fastf1"
     except Exception:
@@ -310,60 +268,218 @@ def fetch_gp(season:int, rnd:int, preference: Literal["auto","ergast","fastf1"]=
 def ingest_event(season:int, rnd:int, preference: Literal["auto","ergast","fastf1"]="auto") -> bool:
     if rnd <= 0:
         return False
+    return ingest_rounds([(season, rnd)], preference=preference) > 0
+
+def _season_rounds(season:int) -> List[int]:
+    return sorted(int(r) for r in season_calendar(season)["round"].tolist() if int(r) > 0)
+
+def _fetch_round(season:int, rnd:int, preference:str):
+    drivers, teams, official, evdate, source = fetch_gp(season, rnd, preference=preference)  # type: ignore
+    return [(season, rnd, drivers, teams, official, evdate, source)]
+
+def _fetch_season_bulk(season:int, preference:str):
+    """Temporada completa en pocas peticiones paginadas; si falla, vuelve a ronda a ronda."""
     try:
-        drivers, teams, official, evdate, source = fetch_gp(season, rnd, preference=preference)
-        key = upsert_event(season, rnd, official, evdate)
-        n_dr = len(drivers); n_tm = len(teams)
-        if n_dr > 0:
-            upsert_driver_results(key, drivers)
-        if n_tm > 0:
-            upsert_team_results(key, teams)
-        status = "ok" if (n_dr > 0) else "no_results"
-        _log_ingest(season, rnd, official, source, n_dr, n_tm, status, "")
-        print(f"[F1GOAT] {official} — {source}: drivers={n_dr}, teams={n_tm}")
-        time.sleep(0.25)
-        return n_dr > 0
+        return fetch_season_bulk(season)
     except Exception as e:
-        _log_ingest(season, rnd, f"{season} R{rnd}", "error", 0, 0, "error", str(e))
-        print(f"[F1GOAT] Ingesta fallida {season} R{rnd}: {e}")
-        return False
+        print(f"[F1GOAT] Bulk {season} falló ({e}); sigo ronda a ronda")
+        out = []
+        for rnd in _season_rounds(season):
+            out.extend(_fetch_round(season, rnd, preference))
+        return out
+
+def _ingest_jobs(jobs, fetch, workers:int=1, batch_size:int=25, report: Optional[list]=None,
+                 progress: Optional[Callable[[dict], None]]=None) -> int:
+    """
+    Backfill concurrente: `workers` hilos ejecutan `fetch(job)` y el hilo llamante es el único
+    escritor, volcando a DuckDB en lotes de `batch_size` GPs. Los calendarios de las temporadas se
+    cargan (y memoizan) aquí antes de repartir trabajos, para que ningún hilo los guarde en la DB.
+    Solo las peticiones Ergast/Jolpica pasan por el limitador compartido de `http`; FastF1 descarga
+    por su cuenta (con su caché en disco), sin limitar por `workers`.
+    `fetch` devuelve una lista de (season, round, drivers, teams, official, event_date, source).
+    Devuelve nº de GPs con resultados; si se pasa `report`, añade un dict por GP procesado
+    (y `progress(dict)` se llama con cada uno según se confirma en la DB).
+    """
+    ok = 0
+    pending = []
+    jobs = list(jobs)
+    for y in sorted({int(job[0] if isinstance(job, tuple) else job) for job in jobs}):
+        try:
+            season_calendar(y)
+        except Exception as e:
+            print(f"[F1GOAT] Calendario {y} no disponible: {e}")
+
+    def _flush():
+        if not pending:
+            return
+        states = [{"season": y, "round": r, "status": "ok" if len(d) > 0 else "no_results", "source": src,
+                   "payload_hash": _payload_hash(d), "n_drivers": len(d), "n_teams": len(t), "message": ""}
+                  for (y, r, d, t, _off, _dt, src) in pending]
+        upsert_gp_batch([(y, r, off, dt, d, t) for (y, r, d, t, off, dt, _src) in pending], states=states)
+        for y, r, d, t, off, _dt, src in pending:
+            status = "ok" if len(d) > 0 else "no_results"
+            _log_ingest(y, r, off, src, len(d), len(t), status, "")
+            print(f"[F1GOAT] {off} — {src}: drivers={len(d)}, teams={len(t)}")
+            _emit({"season": y, "round": r, "official": off, "source": src,
+                   "drivers": len(d), "teams": len(t), "status": status})
+        pending.clear()
+
+    def _emit(item: dict):
+        if report is not None:
+            report.append(item)
+        if progress is not None:
+            progress(item)
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futs = {pool.submit(fetch, job): job for job in jobs}
+        for fut in as_completed(futs):
+            job = futs[fut]
+            try:
+                results = fut.result()
+            except Exception as e:
+                y, r = job if isinstance(job, tuple) else (job, 0)
+                _log_ingest(y, r, f"{y} R{r}", "error", 0, 0, "error", str(e))
+                print(f"[F1GOAT] Ingesta fallida {y} R{r}: {e}")
+                if r > 0:
+                    record_ingest_state([{"season": y, "round": r, "status": "error", "source": "error",
+                                          "n_drivers": 0, "n_teams": 0, "message": str(e)}])
+                _emit({"season": y, "round": r, "official": f"{y} R{r}", "source": "error",
+                       "drivers": 0, "teams": 0, "status": "error", "message": str(e)})
+                continue
+            for item in results:
+                pending.append(item)
+                if len(item[2]) > 0:
+                    ok += 1
+            if len(pending) >= batch_size:
+                _flush()
+        _flush()
+    return ok
 
-def ingest_season(season:int, preference: Literal["auto","ergast","fastf1"]="auto") -> int:
+def _payload_hash(drivers: pd.DataFrame) -> Optional[str]:
+    if drivers is None or len(drivers) == 0:
+        return None
+    cols = [c for c in ("Piloto","Equipo","Parrilla","Final") if c in drivers.columns]
+    raw = drivers[cols].sort_values(cols[:1]).to_csv(index=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _pending(rounds: List[Tuple[int,int]], resume: bool) -> List[Tuple[int,int]]:
+    """Con `resume`, descarta las rondas ya checkpointeadas como 'ok' en ingest_state."""
+    rounds = [(int(y), int(r)) for (y, r) in rounds if int(r) > 0]
+    if not resume or not rounds:
+        return rounds
+    st = load_ingest_state(min(y for y, _ in rounds), max(y for y, _ in rounds))
+    done = {(int(y), int(r)) for y, r, s in zip(st["season"], st["round"], st["status"]) if s == "ok"}
+    todo = [k for k in rounds if k not in done]
+    if len(todo) < len(rounds):
+        print(f"[F1GOAT] Resume: {len(rounds) - len(todo)} ronda(s) ya completadas; quedan {len(todo)}")
+    return todo
+
+def _ingest_bulk(rounds: List[Tuple[int,int]], preference:str, workers:int, report: Optional[list]=None) -> int:
+    todo = set(rounds)
+    seasons = sorted({y for y, _ in rounds})
+    fetch = lambda y: [it for it in _fetch_season_bulk(y, preference) if (it[0], it[1]) in todo]
+    return _ingest_jobs(seasons, fetch, workers, report=report)
+
+def ingest_rounds(rounds: List[Tuple[int,int]], preference: Literal["auto","ergast","fastf1","csv"]="auto",
+                  workers:int=1, batch_size:int=25, report: Optional[list]=None, resume:bool=False,
+                  progress: Optional[Callable[[dict], None]]=None) -> int:
+    jobs = _pending(rounds, resume)
+    return _ingest_jobs(jobs, lambda job: _fetch_round(job[0], job[1], preference), workers, batch_size, report,
+                        progress)
+
+def ingest_season(season:int, preference: Literal["auto","ergast","fastf1","csv"]="auto", workers:int=1,
+                  bulk:bool=False, resume:bool=False) -> int:
+    if preference == "csv":
+        return ingest_range(season, season, preference=preference, workers=workers, resume=resume)
     n_ev = register_schedule(season)
-    ok = 0
-    sched = ff1.get_event_schedule(season).sort_values("RoundNumber")
-    for rnd in sched["RoundNumber"].astype(int).tolist():
-        if rnd <= 0: continue
-        if ingest_event(season, rnd, preference=preference):
-            ok += 1
+    rounds = _pending([(season, r) for r in _season_rounds(season)], resume)
+    if bulk and preference == "ergast":
+        ok = _ingest_bulk(rounds, preference, workers)
+    else:
+        ok = ingest_rounds(rounds, preference=preference, workers=workers)
     print(f"[F1GOAT] Temporada {season}: eventos(>=1)={n_ev}, con_resultados={ok} (pref={preference})")
     return ok
 
-def ingest_range(start:int, end:int, preference: Literal["auto","ergast","fastf1"]="auto") -> int:
-    total_ok = 0
+def ingest_range(start:int, end:int, preference: Literal["auto","ergast","fastf1","csv"]="auto", workers:int=1,
+                 bulk:bool=False, resume:bool=False) -> int:
+    # Una sola cola para todo el rango: las rondas (o temporadas, en bulk) se solapan
+    rounds = []
     for y in range(start, end+1):
-        total_ok += ingest_season(y, preference=preference)
-    return total_ok
+        if preference == "csv":
+            rounds.extend((y, r) for r in (offline_source(ERGAST_CSV).rounds(y) if ERGAST_CSV else []))
+            continue
+        try:
+            register_schedule(y)
+            rounds.extend((y, r) for r in _season_rounds(y))
+        except Exception as e:
+            print(f"[F1GOAT] Calendario {y} no disponible: {e}")
+    rounds = _pending(rounds, resume)
+    if bulk and preference == "ergast":
+        ok = _ingest_bulk(rounds, preference, workers)
+    else:
+        ok = ingest_rounds(rounds, preference=preference, workers=workers)
+    print(f"[F1GOAT] Rango {start}-{end}: rondas={len(rounds)}, con_resultados={ok} (pref={preference}, workers={workers})")
+    return ok
+
+# ---------- Actualización incremental ----------
+RECHECK_DAYS = int(os.getenv("F1GOAT_UPDATE_RECHECK_DAYS", "3"))
 
-def ingest_latest(season_hint:int=2025) -> Tuple[int,int,str]:
-    for year in range(season_hint, 1949, -1):
+def plan_update(season_hint: Optional[int]=None, today: Optional[date]=None) -> List[Tuple[int,int]]:
+    """
+    Rondas a ingerir (más reciente primero): las ya celebradas según el calendario cacheado que
+    no tienen resultados en la DB, más las de los últimos `RECHECK_DAYS` días (resultados
+    provisionales/sanciones). Mira la temporada indicada y la anterior; nunca recorre la historia.
+    """
+    today = today or date.today()
+    season = int(season_hint or today.year)
+    plan = []
+    for year in (season, season - 1):
         try:
-            register_schedule(year)
-        except Exception:
-            pass
-        sched = ff1.get_event_schedule(year).sort_values("EventDate")
-        for rnd in reversed(list(sched["RoundNumber"].astype(int))):
-            if rnd <= 0: continue
-            try:
-                drivers, teams, official, evdate, source = fetch_gp(year, rnd, preference="auto")
-                key = upsert_event(year, rnd, official, evdate)
-                if len(drivers) > 0:
-                    upsert_driver_results(key, drivers)
-                    if len(teams) > 0:
-                        upsert_team_results(key, teams)
-                    return year, rnd, official
-            except Exception:
+            cal = season_calendar(year)
+        except Exception as e:
+            print(f"[F1GOAT] Calendario {year} no disponible: {e}")
+            continue
+        have = set(list_rounds_with_results(year))
+        for _, r in cal.iterrows():
+            evdate = r["event_date"]
+            if evdate is None or pd.isna(evdate) or evdate > today:
                 continue
+            recent = (today - evdate).days <= RECHECK_DAYS
+            if int(r["round"]) not in have or recent:
+                plan.append((year, int(r["round"]), evdate))
+    plan.sort(key=lambda x: (x[2], x[0], x[1]), reverse=True)
+    return [(y, r) for (y, r, _) in plan]
+
+def update_incremental(season_hint: Optional[int]=None, preference: Literal["auto","ergast","fastf1"]="auto",
+                       progress: Optional[Callable[[int, int, Optional[dict]], None]]=None) -> List[dict]:
+    """
+    Ingiere solo lo que falta (o acaba de cambiar) y devuelve un informe por ronda.
+    `progress(hechas, total, item)`: una vez tras planificar (item=None) y otra por ronda confirmada.
+    """
+    plan = plan_update(season_hint)
+    report: List[dict] = []
+    if progress is not None:
+        progress(0, len(plan), None)
+    if not plan:
+        print("[F1GOAT] Update: nada pendiente; la base está al día.")
+        return report
+    print(f"[F1GOAT] Update: {len(plan)} ronda(s) pendiente(s): " + ", ".join(f"{y} R{r}" for y, r in plan))
+    step = None if progress is None else (lambda item: progress(len(report), len(plan), item))
+    # batch_size=1: cada ronda se confirma (y se ve en la app) en cuanto llega
+    ingest_rounds(plan, preference=preference, workers=1, batch_size=1, report=report, progress=step)
+    order = {k: i for i, k in enumerate(plan)}
+    report.sort(key=lambda x: order.get((x["season"], x["round"]), len(order)))
+    return report
+
+def ingest_latest(season_hint: Optional[int]=None) -> Tuple[int,int,str]:
+    """Compat: actualización incremental; devuelve el GP más reciente con resultados."""
+    report = update_incremental(season_hint)
+    for item in report:
+        if item["status"] == "ok":
+            return item["season"], item["round"], item["official"]
+    latest = get_latest_results_event()
+    if latest:
+        return latest["season"], latest["round"], latest["official_name"]
     raise RuntimeError("No se pudo ingerir ningún GP.")
 
 def _http_json_get(url: str, timeout: float=15.0):
@@ -433,19 +549,10 @@ def _jlp_dbg(msg: str):
         print(f"[F1GOAT][JOLPICA] {msg}", file=_sys.stderr)
 
 # Guardamos la versión previa (la que ya llama a ergast_json)
-def _ergast_results_by_round(season: int, rnd: int) -> pd.DataFrame:
-    """SINGLE SOURCE OF TRUTH.
-    Extrae resultados (Ergast vía Jolpica), construye filas de pilotos y normaliza a CANON:
-    ['Piloto','Equipo','Parrilla','Final','Status'].
-    """
-    data = ergast_json(f"f1/{season}/{rnd}/results.json?limit=200")
-    races = (data or {}).get("MRData", {}).get("RaceTable", {}).get("Races", [])
-    if not races:
-        return pd.DataFrame(columns=['Piloto','Equipo','Parrilla','Final','Status'])
-
+def _ergast_rows_df(results) -> pd.DataFrame:
+    """Lista 'Results' de Ergast/Jolpica → DataFrame CANON ['Piloto','Equipo','Parrilla','Final','Status']."""
     rows = []
-    res = races[0].get("Results", []) or []
-    for r in res:
+    for r in results or []:
         drv  = r.get("Driver") or {}
         cons = r.get("Constructor") or {}
 
@@ -475,6 +582,8 @@ def _ergast_results_by_round(season: int, rnd: int) -> pd.DataFrame:
             "Final":  pos,
             "Status": r.get("status"),
         })
+    if not rows:
+        return pd.DataFrame(columns=['Piloto','Equipo','Parrilla','Final','Status'])
 
     df = pd.DataFrame(rows)
     try:
@@ -483,3 +592,61 @@ def _ergast_results_by_round(season: int, rnd: int) -> pd.DataFrame:
         # Si faltara el normalizador por cualquier motivo, seguimos con DF ya en CANON.
         pass
     return df
+
+def _ergast_results_by_round(season: int, rnd: int) -> pd.DataFrame:
+    """SINGLE SOURCE OF TRUTH.
+    Extrae resultados (Ergast vía Jolpica), construye filas de pilotos y normaliza a CANON:
+    ['Piloto','Equipo','Parrilla','Final','Status'].
+    """
+    data = ergast_json(f"f1/{season}/{rnd}/results.json?limit=200")
+    races = (data or {}).get("MRData", {}).get("RaceTable", {}).get("Races", [])
+    if not races:
+        return pd.DataFrame(columns=['Piloto','Equipo','Parrilla','Final','Status'])
+    return _ergast_rows_df(races[0].get("Results", []))
+
+ERGAST_PAGE = 100  # tope de Jolpica por página
+
+def _ergast_season_results(season: int) -> Dict[int, pd.DataFrame]:
+    """
+    Resultados de toda la temporada paginando `f1/{season}/results.json` (la paginación cuenta
+    filas de resultado: una carrera puede quedar partida entre dos páginas y se reúne por ronda).
+    Devuelve {ronda: DataFrame CANON}.
+    """
+    by_round: Dict[int, list] = {}
+    offset = 0
+    while True:
+        data = ergast_json(f"f1/{season}/results.json?limit={ERGAST_PAGE}&offset={offset}")
+        mr = (data or {}).get("MRData", {})
+        races = mr.get("RaceTable", {}).get("Races", []) or []
+        for race in races:
+            by_round.setdefault(int(race.get("round")), []).extend(race.get("Results", []) or [])
+        total = int(mr.get("total") or 0)
+        offset += int(mr.get("limit") or ERGAST_PAGE)
+        _jlp_dbg(f"bulk {season}: offset={offset} total={total} rondas={len(by_round)}")
+        if not races or offset >= total:
+            break
+    return {rnd: _ergast_rows_df(res) for rnd, res in sorted(by_round.items())}
+
+def fetch_season_bulk(season: int):
+    """
+    Modo bulk (Ergast/Jolpica): una descarga paginada por temporada, troceada por ronda en local.
+    Las rondas del calendario sin datos online caen al CSV offline como en `fetch_gp`.
+    Devuelve [(season, round, drivers, teams, official_name, event_date, source), ...].
+    """
+    per_round = _ergast_season_results(season)
+    rounds = sorted(set(_season_rounds(season)) | set(per_round))
+    out = []
+    for rnd in rounds:
+        official_name, event_date = _official_from_schedule(season, rnd)
+        dr = per_round.get(rnd)
+        source = "ergast"
+        if dr is None or dr.empty:
+            dr = _ergast_csv_results_by_round(season, rnd)
+            source = "ergast_csv"
+        if dr is None or dr.empty:
+            out.append((season, rnd, pd.DataFrame(), pd.DataFrame(), official_name, event_date, "none"))
+            continue
+        dr["Equipo"] = dr["Equipo"].apply(canonical_team)
+        drivers, teams = _compute_from_driver_df(dr)
+        out.append((season, rnd, drivers, teams, official_name, event_date, source))
+    return out
@@ -18,20 +18,23 @@ def estimate_k_eb(points: pd.DataFrame, group_col: str, value_col: str) -> Tuple
 
     # estadísticas por grupo
     g = df.groupby(group_col)[value_col].agg(['count', 'mean', 'var']).rename(columns={'count':'n','mean':'m','var':'s2'})
+    return _k_from_stats(g, mu), mu
+
+def _k_from_stats(g: pd.DataFrame, mu: float) -> float:
+    """k a partir de estadísticos por grupo: n, m (media), s2 (varianza muestral; NaN si n=1)."""
     g = g.fillna({'s2': 0.0})
     n_total = int(g['n'].sum())
     g_count = int(g.shape[0])
     if n_total <= g_count:
-        return 1.0, mu
+        return 1.0
 
     # Between y Within (ANOVA simple)
     var_between = float(np.sum(g['n'] * (g['m'] - mu)**2) / max(n_total - 1, 1))
     var_within = float(np.sum((g['n'] - 1).clip(lower=0) * g['s2']) / max(n_total - g_count, 1))
 
     if var_between <= 1e-12:
-        return 1.0, mu
-    k = max(var_within / var_between, 1e-6)
-    return float(k), float(mu)
+        return 1.0
+    return float(max(var_within / var_between, 1e-6))
 
 def eb_adjust_means(points: pd.DataFrame, group_col: str, value_col: str) -> pd.DataFrame:
     """
@@ -43,3 +46,19 @@ def eb_adjust_means(points: pd.DataFrame, group_col: str, value_col: str) -> pd.
     g['eb_w'] = g['n'] / (g['n'] + k)
     g['eb_mean'] = g['eb_w'] * g['mean'] + (1.0 - g['eb_w']) * mu
     return g[[group_col, 'n', 'mean', 'eb_mean']]
+
+def eb_adjust_stats(stats: pd.DataFrame, group_col: str) -> pd.DataFrame:
+    """
+    Como `eb_adjust_means`, pero desde estadísticos ya agregados (p. ej. en SQL):
+    columnas group_col, n, mean, var (varianza muestral). Devuelve group_col, n, mean, eb_mean.
+    """
+    g = stats[stats['n'] > 0].rename(columns={'mean':'m','var':'s2'})
+    if g.empty:
+        k, mu = 1.0, 0.0
+    else:
+        mu = float(np.sum(g['n'] * g['m']) / g['n'].sum())
+        k = _k_from_stats(g, mu)
+    out = stats[[group_col, 'n', 'mean']].copy()
+    out['eb_w'] = out['n'] / (out['n'] + k)
+    out['eb_mean'] = out['eb_w'] * out['mean'] + (1.0 - out['eb_w']) * mu
+    return out[[group_col, 'n', 'mean', 'eb_mean']]
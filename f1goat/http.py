@@ -1,21 +1,44 @@
-import json, os, sys, urllib.request, urllib.error, urllib.parse
+import json, os, sys, threading, time, urllib.request, urllib.error, urllib.parse
+from .http_cache import response_cache, CacheMiss
 
 _JOLPICA_DEFAULT = "https://api.jolpi.ca/ergast"
 _printed_base = False
 
-_rate_last = []
-_RATE = float(os.getenv("F1GOAT_ERGAST_RATE", "3"))
+class _TokenBucket:
+    """Limitador token-bucket thread-safe: `rate` peticiones/s con ráfaga de `max(1, rate)`."""
+    def __init__(self, rate: float):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = self.capacity
+            self.stamp = time.monotonic()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    return
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+
+_BUCKET = _TokenBucket(float(os.getenv("F1GOAT_ERGAST_RATE", "3")))
 
 def _rate_limit():
-    if _RATE <= 0: return
-    import time
-    now = time.monotonic(); window = 1.0
-    global _rate_last
-    _rate_last = [t for t in _rate_last if now - t < window]
-    if len(_rate_last) >= _RATE:
-        delay = window - (now - _rate_last[0])
-        if delay > 0: time.sleep(delay)
-    _rate_last.append(time.monotonic())
+    _BUCKET.acquire()
+
+def set_rate(rate: float):
+    """Cambia el límite compartido (req/s) para todos los hilos; <=0 desactiva."""
+    _BUCKET.set_rate(rate)
 
 def _upgrade(url: str) -> str:
     return url.replace("http://","https://",1) if url.startswith("http://") else url
@@ -41,7 +64,6 @@ def _toggle_scheme(url: str) -> str:
     return url
 
 def _http_json(url: str, timeout: float=15.0, max_redirects: int=3):
-    _rate_limit()
     url = _upgrade(url)
     headers = {
         "User-Agent": f"F1GOAT/{os.getenv('F1GOAT_VERSION','dev')}",
@@ -50,6 +72,7 @@ def _http_json(url: str, timeout: float=15.0, max_redirects: int=3):
     import urllib.request, urllib.error, json, time
     tries = 0
     while True:
+        _rate_limit()
         req = urllib.request.Request(url, headers=headers)
         try:
             with urllib.request.urlopen(req, timeout=timeout) as r:
@@ -90,7 +113,15 @@ def ergast_json(path: str):
     if p.startswith("api/"):
         p = p[4:]
     url = f"{base}/{p}"
-    return _http_json(url)
+    cache = response_cache()
+    data = cache.get(url)
+    if data is not None:
+        return data
+    if cache.offline:
+        raise CacheMiss(f"F1GOAT_OFFLINE=1: sin respuesta en caché para {url}")
+    data = _http_json(url)
+    cache.put(url, data)
+    return data
 def _rewrite_to_api_jolpi(location: str) -> str:
     try:
         u = urllib.parse.urlparse(location)
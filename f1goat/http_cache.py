@@ -0,0 +1,146 @@
+"""
+Caché persistente de respuestas HTTP (JSON) para Ergast/Jolpica.
+
+- Direccionada por contenido: clave = sha256 de la URL normalizada → `data/http_cache/ab/abcd….json`.
+- TTL: respuestas de temporadas ya cerradas al descargarlas no caducan; temporada en curso (en el
+  momento de la descarga) y rutas sin año → TTL corto.
+- Tamaño acotado con expulsión LRU (el mtime del fichero hace de "último acceso").
+- Modo offline (solo caché): una ausencia lanza `CacheMiss` en lugar de ir a la red.
+  Apuntando `F1GOAT_HTTP_CACHE_DIR` a un directorio de fixtures + `F1GOAT_OFFLINE=1`
+  se sustituye la API por ficheros locales.
+
+Entorno:
+  F1GOAT_HTTP_CACHE=0            desactiva la caché
+  F1GOAT_HTTP_CACHE_DIR          directorio (por defecto data/http_cache)
+  F1GOAT_HTTP_CACHE_TTL          segundos para la temporada en curso (por defecto 3600)
+  F1GOAT_HTTP_CACHE_MAX_MB       tamaño máximo (por defecto 512)
+  F1GOAT_OFFLINE=1               solo caché
+"""
+from __future__ import annotations
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import hashlib, json, os, re, threading, time
+
+_SEASON_RE = re.compile(r"(?:^|/)f1/(\d{4})(?:/|\.json|$)")
+
+class CacheMiss(RuntimeError):
+    pass
+
+def _env_bool(name: str, default: bool=False) -> bool:
+    v = os.getenv(name, "")
+    if not v:
+        return default
+    return v.lower() in ("1","true","yes","on")
+
+def normalize_url(url: str) -> str:
+    """Esquema indiferente (http/https), host en minúsculas, sin '/' final, query ordenada."""
+    u = urlsplit(url.strip())
+    path = re.sub(r"/{2,}", "/", u.path).rstrip("/")
+    query = urlencode(sorted(parse_qsl(u.query, keep_blank_values=True)))
+    return f"{u.netloc.lower()}{path}" + (f"?{query}" if query else "")
+
+def ttl_for(url: str, fetched_at: Optional[float] = None) -> Optional[float]:
+    """
+    None = sin caducidad: la temporada ya estaba cerrada cuando se descargó la respuesta
+    (`fetched_at`; por defecto, ahora). Una página descargada con la temporada en curso conserva el
+    TTL corto aunque el año haya terminado después (podía estar incompleta o vacía).
+    """
+    m = _SEASON_RE.search(urlsplit(url).path)
+    fetched_year = date.fromtimestamp(fetched_at).year if fetched_at is not None else date.today().year
+    if m and int(m.group(1)) < fetched_year:
+        return None
+    return float(os.getenv("F1GOAT_HTTP_CACHE_TTL", "3600"))
+
+class ResponseCache:
+    def __init__(self, root: Path, max_bytes: int, offline: bool=False, enabled: bool=True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, url: str) -> Path:
+        h = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return self.root / h[:2] / f"{h}.json"
+
+    def get(self, url: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        p = self._path(url)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        fetched_at = float(entry.get("fetched_at", 0))
+        ttl = ttl_for(url, fetched_at)
+        if ttl is not None and not self.offline and time.time() - fetched_at > ttl:
+            return None
+        try:
+            os.utime(p)  # LRU: marca acceso
+        except OSError:
+            pass
+        return entry.get("data")
+
+    def put(self, url: str, data: Any) -> None:
+        if not self.enabled:
+            return
+        p = self._path(url)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        raw = json.dumps({"url": normalize_url(url), "fetched_at": time.time(), "data": data},
+                         ensure_ascii=False).encode("utf-8")
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(raw)
+        with self._lock:
+            old = p.stat().st_size if p.exists() else 0
+            size = self._total_size()  # antes del replace: aún no cuenta el fichero nuevo
+            os.replace(tmp, p)
+            self._size = size + len(raw) - old
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _total_size(self) -> int:
+        if self._size is None:
+            self._size = sum(f.stat().st_size for f in self.root.glob("*/*.json"))
+        return self._size
+
+    def _evict(self) -> None:
+        # Expulsa los menos usados hasta quedar en el 90% del máximo
+        files = sorted(self.root.glob("*/*.json"), key=lambda f: f.stat().st_mtime)
+        target = int(self.max_bytes * 0.9)
+        size = sum(f.stat().st_size for f in files)
+        for f in files:
+            if size <= target:
+                break
+            try:
+                n = f.stat().st_size
+                f.unlink()
+                size -= n
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self) -> None:
+        with self._lock:
+            for f in self.root.glob("*/*.json"):
+                try: f.unlink()
+                except OSError: pass
+            self._size = 0
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def response_cache() -> ResponseCache:
+    """Caché del proceso, configurada desde el entorno la primera vez."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(
+                root=Path(os.getenv("F1GOAT_HTTP_CACHE_DIR", "data/http_cache")),
+                max_bytes=int(float(os.getenv("F1GOAT_HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024),
+                offline=_env_bool("F1GOAT_OFFLINE", False),
+                enabled=_env_bool("F1GOAT_HTTP_CACHE", True),
+            )
+        return _CACHE
@@ -0,0 +1,241 @@
+"""
+Ingesta en segundo plano para la app ("🔄 Actualizar ahora").
+
+- La cola (`ingest_jobs`) vive en un SQLite aparte (`data/jobs.sqlite`, WAL), no en DuckDB: la
+  app es un proceso lector (snapshot de solo lectura, ver `storage`) y aun así tiene que poder
+  encolar y leer el progreso mientras el escritor tiene la base bloqueada.
+- Un único trabajador consume la cola en orden y es el único que escribe en DuckDB:
+    * en un proceso writer, un hilo del propio proceso (`ensure_worker`);
+    * en un proceso reader (app), el servicio `python -m f1goat worker`; si no hay ninguno vivo
+      (latido en `ingest_worker`), `enqueue_update` lanza uno con `--drain` que sale al vaciar la cola.
+- Cada GP se escribe con las transacciones normales de storage; el snapshot para lectores se
+  publica antes de marcar el trabajo como terminado.
+- Trabajos 'running' cuyo proceso ya no existe se marcan como 'error' ('Interrumpido').
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+import json, os, sqlite3, subprocess, sys, threading, time, traceback
+
+import pandas as pd
+
+from . import storage
+
+HEARTBEAT_TTL = 15.0
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+  job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,           -- update
+  params TEXT,                  -- JSON
+  status TEXT NOT NULL,         -- queued | running | done | error
+  done INTEGER NOT NULL DEFAULT 0,
+  total INTEGER,
+  message TEXT,
+  created_at TEXT NOT NULL,
+  started_at TEXT,
+  finished_at TEXT,
+  pid INTEGER                   -- proceso que lo ejecuta
+);
+CREATE TABLE IF NOT EXISTS ingest_worker (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  pid INTEGER NOT NULL,
+  heartbeat REAL NOT NULL       -- time.time() del último latido
+);
+"""
+
+_JOB_COLS = "job_id, kind, params, status, done, total, message, created_at, started_at, finished_at"
+
+def jobs_path() -> Path:
+    return Path(os.getenv("F1GOAT_JOBS_DB") or storage.DB_PATH.with_name("jobs.sqlite"))
+
+def _connect() -> sqlite3.Connection:
+    path = jobs_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_DDL)
+    return con
+
+def _now() -> str:
+    return pd.Timestamp.now().isoformat(sep=" ", timespec="seconds")
+
+def _row(row: Optional[sqlite3.Row]) -> Optional[dict]:
+    if row is None:
+        return None
+    r = dict(row)
+    r["params"] = json.loads(r["params"]) if r.get("params") else {}
+    return r
+
+def _set(job_id: int, **fields) -> None:
+    sets = ", ".join(f"{k} = ?" for k in fields)
+    con = _connect()
+    try:
+        con.execute(f"UPDATE ingest_jobs SET {sets} WHERE job_id = ?", [*fields.values(), job_id])
+    finally:
+        con.close()
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# ---------- API para la UI ----------
+
+def enqueue_update(season_hint: Optional[int] = None) -> int:
+    """Encola una actualización incremental (si ya hay una pendiente o en curso, devuelve esa)."""
+    con = _connect()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        row = con.execute("SELECT job_id FROM ingest_jobs WHERE kind = 'update' AND status IN ('queued','running') "
+                          "ORDER BY job_id LIMIT 1").fetchone()
+        if row is not None:
+            job_id = int(row[0])
+        else:
+            job_id = int(con.execute("INSERT INTO ingest_jobs (kind, params, status, created_at) "
+                                     "VALUES ('update', ?, 'queued', ?)",
+                                     [json.dumps({"season_hint": season_hint}), _now()]).lastrowid)
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    if storage.db_mode() == "writer" and (_WORKER is not None or not worker_alive()):
+        ensure_worker()
+        _WORKER.wake.set()
+    elif not worker_alive():
+        _spawn_worker()
+    return job_id
+
+def get_job(job_id: int) -> Optional[dict]:
+    con = _connect()
+    try:
+        return _row(con.execute(f"SELECT {_JOB_COLS} FROM ingest_jobs WHERE job_id = ?", [job_id]).fetchone())
+    finally:
+        con.close()
+
+def latest_job() -> Optional[dict]:
+    con = _connect()
+    try:
+        return _row(con.execute(f"SELECT {_JOB_COLS} FROM ingest_jobs ORDER BY job_id DESC LIMIT 1").fetchone())
+    finally:
+        con.close()
+
+def recent_jobs(limit: int = 10) -> pd.DataFrame:
+    con = _connect()
+    try:
+        return pd.read_sql_query(f"SELECT {_JOB_COLS} FROM ingest_jobs ORDER BY job_id DESC LIMIT ?", con,
+                                 params=[limit])
+    finally:
+        con.close()
+
+def worker_alive() -> bool:
+    """Hay un trabajador (de este u otro proceso) con latido reciente."""
+    con = _connect()
+    try:
+        row = con.execute("SELECT pid, heartbeat FROM ingest_worker WHERE id = 1").fetchone()
+    finally:
+        con.close()
+    return row is not None and time.time() - row["heartbeat"] < HEARTBEAT_TTL and _pid_alive(row["pid"])
+
+def _spawn_worker() -> None:
+    # Proceso escritor efímero: procesa la cola y sale (el de la app nunca escribe en DuckDB)
+    log = storage.DB_PATH.with_name("worker.log").open("ab")
+    root = str(Path(__file__).resolve().parents[1])
+    env = {**os.environ, "F1GOAT_DB_MODE": "writer",
+           "PYTHONPATH": os.pathsep.join(p for p in (root, os.environ.get("PYTHONPATH")) if p)}
+    subprocess.Popen([sys.executable, "-m", "f1goat", "worker", "--drain"], env=env,
+                     stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+    log.close()
+
+# ---------- Trabajador ----------
+
+def _heartbeat() -> None:
+    con = _connect()
+    try:
+        con.execute("INSERT OR REPLACE INTO ingest_worker (id, pid, heartbeat) VALUES (1, ?, ?)",
+                    [os.getpid(), time.time()])
+    finally:
+        con.close()
+
+def _claim_next() -> Optional[dict]:
+    con = _connect()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        # 'running' de un proceso que ya no existe = interrumpido
+        for r in con.execute("SELECT job_id, pid FROM ingest_jobs WHERE status = 'running'").fetchall():
+            if not _pid_alive(r["pid"]):
+                con.execute("UPDATE ingest_jobs SET status = 'error', message = 'Interrumpido', finished_at = ? "
+                            "WHERE job_id = ?", [_now(), r["job_id"]])
+        job = _row(con.execute(f"SELECT {_JOB_COLS} FROM ingest_jobs WHERE status = 'queued' "
+                               "ORDER BY job_id LIMIT 1").fetchone())
+        if job is not None:
+            con.execute("UPDATE ingest_jobs SET status = 'running', started_at = ?, pid = ? WHERE job_id = ?",
+                        [_now(), os.getpid(), job["job_id"]])
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    return job
+
+def _run(job: dict) -> None:
+    from .data_sources import update_incremental
+    job_id = int(job["job_id"])
+
+    def progress(done: int, total: int, item: Optional[dict]):
+        msg = None if item is None else f"{item['official']}: {item['status']} ({item['source']})"
+        _set(job_id, done=done, total=total, message=msg)
+        _heartbeat()
+
+    report = update_incremental(season_hint=job["params"].get("season_hint"), progress=progress)
+    storage.publish_snapshot()
+    errors = [r for r in report if r["status"] == "error"]
+    status = "error" if errors else "done"
+    if report:
+        msg = f"{len(report) - len(errors)} GP(s) procesados, {len(errors)} con error"
+    else:
+        msg = "La base ya estaba al día"
+    _set(job_id, status=status, done=len(report), message=msg, finished_at=_now())
+
+def run_worker(drain: bool = False, wake: Optional[threading.Event] = None, poll: float = 5.0) -> int:
+    """Bucle del trabajador: consume la cola en orden. drain=True: sale cuando la cola queda vacía."""
+    wake = wake or threading.Event()
+    n = 0
+    while True:
+        _heartbeat()
+        job = _claim_next()
+        if job is None:
+            if drain:
+                return n
+            wake.wait(timeout=poll)
+            wake.clear()
+            continue
+        try:
+            _run(job)
+        except Exception as e:
+            traceback.print_exc()
+            _set(int(job["job_id"]), status="error", message=str(e), finished_at=_now())
+        n += 1
+
+class _Worker(threading.Thread):
+    def __init__(self):
+        super().__init__(name="f1goat-ingest-worker", daemon=True)
+        self.wake = threading.Event()
+
+    def run(self):
+        run_worker(wake=self.wake)
+
+_WORKER: Optional[_Worker] = None
+_WORKER_LOCK = threading.Lock()
+
+def ensure_worker() -> None:
+    """Arranca (una vez por proceso writer) el hilo trabajador."""
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is None or not _WORKER.is_alive():
+            _WORKER = _Worker()
+            _WORKER.start()
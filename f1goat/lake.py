@@ -0,0 +1,113 @@
+"""
+Espejo columnar (Parquet) de los resultados, particionado por temporada (estilo hive):
+
+  data/lake/gp_events/season=YYYY/data.parquet
+  data/lake/gp_driver_results/season=YYYY/data.parquet
+  data/lake/gp_team_results/season=YYYY/data.parquet
+
+- Escritura incremental: tras cada COMMIT, el proceso escritor reescribe solo las particiones de
+  las temporadas tocadas (`storage` → `write_seasons`). Cada fichero se escribe aparte y se
+  sustituye con `os.replace`: un lector nunca ve un Parquet a medias.
+- Lectura: `scan` devuelve un `pyarrow.Table`; poda particiones por temporada y empuja columnas y
+  filtros al lector Parquet. No abre DuckDB (sin lock) ni materializa pandas.
+- `rebuild` regenera todo el espejo (bases existentes, o tras borrar data/lake).
+
+Entorno:
+  F1GOAT_LAKE=0          desactiva el espejo
+  F1GOAT_LAKE_PATH       raíz del espejo (por defecto, data/lake junto a la base)
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, List, Optional
+import os, shutil
+
+# Tabla → SELECT por temporada (la columna season va en la ruta de la partición, no en el fichero)
+LAKE_TABLES = {
+    "gp_events": (
+        "SELECT e.event_key, e.round, e.official_name, e.event_date "
+        "FROM events e WHERE e.season = {season} ORDER BY e.round"
+    ),
+    "gp_driver_results": (
+        "SELECT e.event_key, e.round, d.name AS driver, t.name AS team, r.grid, r.finish, r.csi, r.rr, r.qr, "
+        "r.td, r.oq, r.wa, r.pf, r.points_gp "
+        "FROM driver_results r JOIN events e USING (event_id) JOIN drivers d USING (driver_id) "
+        "JOIN teams t USING (team_id) "
+        "WHERE e.season = {season} ORDER BY e.round, driver"
+    ),
+    "gp_team_results": (
+        "SELECT e.event_key, e.round, t.name AS team, r.parrilla_media, r.final_media, r.csi_medio, r.ops, "
+        "r.rel, r.dev, r.points_gp "
+        "FROM team_results r JOIN events e USING (event_id) JOIN teams t USING (team_id) "
+        "WHERE e.season = {season} ORDER BY e.round, team"
+    ),
+}
+
+def enabled() -> bool:
+    return os.getenv("F1GOAT_LAKE", "1").lower() not in ("0","false","no","off")
+
+def lake_root() -> Path:
+    from .storage import DB_PATH
+    return Path(os.getenv("F1GOAT_LAKE_PATH") or DB_PATH.with_name("lake"))
+
+def _partition(table: str, season: int) -> Path:
+    return lake_root() / table / f"season={int(season)}"
+
+# ---------- Escritura ----------
+
+def write_seasons(con, seasons: Iterable[int]) -> int:
+    """Reescribe las particiones de `seasons` con el cursor dado. Devuelve nº de ficheros escritos."""
+    n = 0
+    for season in sorted({int(y) for y in seasons}):
+        for table, sql in LAKE_TABLES.items():
+            part = _partition(table, season)
+            query = sql.format(season=season)
+            if con.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0] == 0:
+                # Temporada sin filas en esta tabla: fuera la partición
+                shutil.rmtree(part, ignore_errors=True)
+                continue
+            part.mkdir(parents=True, exist_ok=True)
+            # Prefijo '.': el descubrimiento de pyarrow ignora el temporal
+            tmp = part / f".data.parquet.{os.getpid()}.tmp"
+            con.execute(f"COPY ({query}) TO '{tmp.as_posix()}' (FORMAT parquet, COMPRESSION zstd)")
+            os.replace(tmp, part / "data.parquet")
+            n += 1
+    return n
+
+def rebuild(seasons: Optional[Iterable[int]] = None) -> int:
+    """Regenera el espejo (todas las temporadas o las indicadas) desde la base."""
+    from .storage import _read
+    with _read() as con:
+        present = [int(r[0]) for r in con.execute("SELECT DISTINCT season FROM events ORDER BY 1").fetchall()]
+        if seasons is None:
+            # Particiones de temporadas que ya no están en la base
+            for table in LAKE_TABLES:
+                for part in (lake_root() / table).glob("season=*"):
+                    if int(part.name.split("=", 1)[1]) not in present:
+                        shutil.rmtree(part, ignore_errors=True)
+            seasons = present
+        return write_seasons(con, seasons)
+
+# ---------- Lectura ----------
+
+def scan(table: str, seasons: Optional[Iterable[int]] = None, columns: Optional[List[str]] = None,
+         filter=None):
+    """
+    Lee el espejo como `pyarrow.Table`. `seasons` poda particiones, `columns` proyecta y `filter`
+    (expresión `pyarrow.dataset`, ej. `ds.field("round") <= 5`) se empuja al lector Parquet.
+    Requiere pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    if table not in LAKE_TABLES:
+        raise ValueError(f"Tabla desconocida en el lake: {table!r} ({', '.join(LAKE_TABLES)})")
+    root = lake_root() / table
+    if not root.exists():
+        raise FileNotFoundError(f"Sin espejo Parquet en {root} (python -m f1goat lake)")
+    dataset = ds.dataset(root, format="parquet",
+                         partitioning=ds.partitioning(pa.schema([("season", pa.int32())]), flavor="hive"))
+    expr = None
+    if seasons is not None:
+        expr = ds.field("season").isin([int(y) for y in seasons])
+    if filter is not None:
+        expr = filter if expr is None else (expr & filter)
+    return dataset.to_table(columns=columns, filter=expr)
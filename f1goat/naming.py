@@ -1,27 +1,172 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Tuple
-import re, json, urllib.request
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+import re, sys, threading
 import pandas as pd
 import yaml
 
-# === Lineajes (ya existía) ===
+# === Resolutor compilado (naming.yaml + lineage.yaml) ===
+# Ambos YAML se compilan una vez en dicts con claves case-folded (los linajes, en un índice de
+# intervalos por temporada) y se recargan solo si cambia su mtime. Las columnas se resuelven sobre
+# valores únicos y se difunden (coste ∝ nombres distintos).
+
+def _fold(name) -> str:
+    return str(name).strip().casefold()
+
+def _read_yaml(p: Path) -> Dict:
+    return (yaml.safe_load(p.read_text(encoding="utf-8")) or {}) if p.exists() else {}
+
+def _mtime(p: Path) -> Optional[int]:
+    try:
+        return p.stat().st_mtime_ns
+    except OSError:
+        return None
+
+SEASON_MIN, SEASON_MAX = 0, 9999
+
+def _lineage_entry(node) -> Tuple[str, int, int]:
+    # "Brawn GP" (todas las temporadas) | {name: Honda, from: 2006, to: 2008}
+    if isinstance(node, dict):
+        return (str(node["name"]), int(node.get("from") or SEASON_MIN), int(node.get("to") or SEASON_MAX))
+    return str(node), SEASON_MIN, SEASON_MAX
+
+class LineageIndex:
+    """
+    Índice de intervalos de config/lineage.yaml: nombre (case-folded) → tramos [desde, hasta]
+    ordenados y disjuntos → raíz del linaje. Búsqueda por (equipo, temporada) con bisect.
+    La raíz se resuelve a sí misma salvo que aparezca como nodo (entonces manda su tramo).
+    """
+    def __init__(self, lineage_map: Optional[Dict]):
+        spans: Dict[str, List[Tuple[int, int, str]]] = {}
+        nodes = {}
+        for root, entries in (lineage_map or {}).items():
+            for node in entries or []:
+                name, y0, y1 = _lineage_entry(node)
+                nodes[_fold(name)] = name
+                spans.setdefault(_fold(name), []).append((y0, y1, str(root)))
+        for root in lineage_map or {}:
+            if _fold(root) not in nodes:
+                nodes[_fold(root)] = str(root)
+                spans.setdefault(_fold(root), []).append((SEASON_MIN, SEASON_MAX, str(root)))
+        self._index: Dict[str, Tuple[List[int], List[int], List[str]]] = {}
+        for key, items in spans.items():
+            starts, ends, roots = [], [], []
+            for y0, y1, root in sorted(items):
+                if ends and y0 <= ends[-1]:
+                    print(f"[F1GOAT] lineage.yaml: tramos solapados para {nodes[key]!r} "
+                          f"({y0}-{y1} → {root}); se ignora", file=sys.stderr)
+                    continue
+                starts.append(y0); ends.append(y1); roots.append(root)
+            self._index[key] = (starts, ends, roots)
+
+    def __bool__(self) -> bool:
+        return bool(self._index)
+
+    def root(self, name, season: Optional[int] = None):
+        """Raíz de `name` en `season`; sin temporada, solo si el nombre tiene una única raíz."""
+        hit = self._index.get(_fold(name))
+        if hit is None:
+            return name
+        starts, ends, roots = hit
+        if season is None:
+            return roots[0] if len(set(roots)) == 1 else name
+        i = bisect_right(starts, int(season)) - 1
+        return roots[i] if i >= 0 and int(season) <= ends[i] else name
+
+    def frame(self) -> pd.DataFrame:
+        """Tramos como tabla (name case-folded, season_from, season_to, root) para joins en SQL."""
+        rows = [(key, y0, y1, root) for key, (starts, ends, roots) in self._index.items()
+                for y0, y1, root in zip(starts, ends, roots)]
+        return pd.DataFrame(rows, columns=["name", "season_from", "season_to", "root"])
+
+def _map_unique(s: pd.Series, fn) -> pd.Series:
+    # fn sobre valores únicos + difusión; los nulos se quedan como están
+    m = {u: fn(u) for u in s.dropna().unique()}
+    return s.map(m).where(s.notna(), s)
+
+class NameResolver:
+    def __init__(self, naming_path: str = "config/naming.yaml", lineage_path: str = "config/lineage.yaml"):
+        self.naming_path = Path(naming_path)
+        self.lineage_path = Path(lineage_path)
+        self._lock = threading.Lock()
+        self._stamp = object()
+        self.teams: Dict[str, str] = {}
+        self.drivers: Dict[str, str] = {}
+        self.lineage_map: Dict = {}
+        self.lineage = LineageIndex({})
+
+    def _ensure(self) -> "NameResolver":
+        stamp = (_mtime(self.naming_path), _mtime(self.lineage_path))
+        if stamp == self._stamp:
+            return self
+        with self._lock:
+            if stamp != self._stamp:
+                cfg = _read_yaml(self.naming_path)
+                lineage_map = _read_yaml(self.lineage_path)
+                self.teams = {_fold(k): str(v).strip() for k, v in (cfg.get("teams") or {}).items()}
+                self.drivers = {_fold(k): str(v).strip() for k, v in (cfg.get("drivers") or {}).items()}
+                self.lineage_map, self.lineage = lineage_map, LineageIndex(lineage_map)
+                self._stamp = stamp
+        return self
+
+    def team(self, name: str) -> str:
+        return self._ensure().teams.get(_fold(name), name) if name else name
+
+    def driver(self, name: str) -> str:
+        return self._ensure().drivers.get(_fold(name), name) if name else name
+
+    def lineage_root(self, name: str, season: Optional[int] = None) -> str:
+        return self._ensure().lineage.root(name, season)
+
+    def map_teams(self, s: pd.Series) -> pd.Series:
+        return _map_unique(s, self.team) if self._ensure().teams else s
+
+    def map_drivers(self, s: pd.Series) -> pd.Series:
+        return _map_unique(s, self.driver) if self._ensure().drivers else s
+
+    def lineage_index(self, lineage_map: Optional[Dict] = None) -> LineageIndex:
+        """Índice del YAML cargado; un `lineage_map` distinto se compila aparte."""
+        self._ensure()
+        return self.lineage if lineage_map is None or lineage_map == self.lineage_map else LineageIndex(lineage_map)
+
+    def map_lineage(self, s: pd.Series, lineage_map: Optional[Dict] = None, season=None) -> pd.Series:
+        """
+        Equipo → raíz de linaje en esa temporada. `season`: int, Series alineada con `s`
+        o None (solo nombres con una única raíz en toda la historia).
+        """
+        index = self.lineage_index(lineage_map)
+        if not isinstance(season, pd.Series):
+            return _map_unique(s, lambda x: index.root(x, season))
+        pairs = pd.Series(list(zip(s, season)), index=s.index)
+        m = {p: index.root(*p) for p in set(pairs)}
+        return pairs.map(m)
+
+_RESOLVERS: Dict[Tuple[str, str], NameResolver] = {}
+_RESOLVERS_LOCK = threading.Lock()
+
+def resolver(naming_path: str = "config/naming.yaml", lineage_path: str = "config/lineage.yaml") -> NameResolver:
+    """Resolutor compartido del proceso (uno por par de rutas)."""
+    key = (naming_path, lineage_path)
+    with _RESOLVERS_LOCK:
+        if key not in _RESOLVERS:
+            _RESOLVERS[key] = NameResolver(naming_path, lineage_path)
+        return _RESOLVERS[key]
+
+# === Lineajes ===
 def load_lineages(path: str = "config/lineage.yaml") -> Dict:
     p = Path(path)
     if not p.exists():
         return {}
     return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
 
-def apply_lineage_grouping(df: pd.DataFrame, team_col: str, agg_cols, sum_points: bool, lineage_map: Dict) -> pd.DataFrame:
+def apply_lineage_grouping(df: pd.DataFrame, team_col: str, agg_cols, sum_points: bool, lineage_map: Dict,
+                           season: Optional[int] = None) -> pd.DataFrame:
+    # Agrupa un frame ya agregado (GP suelto, simulación); temporadas y histórico se agrupan en storage
     if not lineage_map or df.empty:
         return df
-    rev = {}
-    for root, nodes in lineage_map.items():
-        for n in nodes:
-            rev[n] = root
-        rev[root] = root
     out = df.copy()
-    out[team_col] = out[team_col].map(lambda x: rev.get(str(x), str(x)))
+    out[team_col] = resolver().map_lineage(out[team_col].astype(str), lineage_map, season)
     if sum_points:
         agg = {c: ("sum" if c.lower().startswith("puntos") else "mean") for c in agg_cols}
     else:
@@ -29,87 +174,39 @@ def apply_lineage_grouping(df: pd.DataFrame, team_col: str, agg_cols, sum_points
     out = out.groupby(team_col, as_index=False).agg(agg)
     return out
 
-# === NUEVO: normalización de nombres ===
-def _load_naming_cfg(path: str = "config/naming.yaml") -> Tuple[Dict[str,str], Dict[str,str]]:
-    p = Path(path)
-    if not p.exists():
-        return {}, {}
-    cfg = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
-    teams = {k.strip(): v.strip() for k, v in (cfg.get("teams") or {}).items()}
-    drivers = {k.strip(): v.strip() for k, v in (cfg.get("drivers") or {}).items()}
-    return teams, drivers
-
-def _norm_lookup(name: str, mapping: Dict[str,str]) -> str:
-    if not name:
-        return name
-    # Búsqueda case-insensitive
-    for k, v in mapping.items():
-        if k.lower() == str(name).lower():
-            return v
-    return name
-
+# === Normalización de nombres ===
 def normalize_team(name: str) -> str:
-    teams, _ = _load_naming_cfg()
-    return _norm_lookup(name, teams)
+    return resolver().team(name)
 
 def normalize_driver(name: str) -> str:
-    _, drivers = _load_naming_cfg()
-    return _norm_lookup(name, drivers)
+    return resolver().driver(name)
 
 def _looks_like_broadcast_initial(name: str) -> bool:
     # "M VERSTAPPEN", "C SAINZ", "L HAMILTON"...
     return bool(re.match(r"^[A-Z]\s+[A-ZÀ-ÿ'’\-]+$", str(name).strip()))
 
-def _ergast_fullnames(season: int, rnd: int) -> Dict[str,str]:
-    """Mapa: (APELLIDO en mayúsculas) -> 'Nombre Apellido' usando Ergast del mismo GP."""
-    url = f"https://ergast.com/api/f1/{season}/{rnd}/results.json?limit=200"
-    with urllib.request.urlopen(url, timeout=25) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
-    races = data.get("MRData", {}).get("RaceTable", {}).get("Races", [])
-    out = {}
-    if not races:
-        return out
-    for r in races[0].get("Results", []):
-        drv = r.get("Driver", {})
-        given = (drv.get("givenName") or "").strip()
-        family = (drv.get("familyName") or "").strip()
-        if family:
-            out[family.upper()] = f"{given} {family}".strip()
-    return out
-
 def normalize_base(df: pd.DataFrame, season: int, rnd: int) -> pd.DataFrame:
     """
     df columnas: Piloto, Equipo, Parrilla, Final
-    - Expande 'M VERSTAPPEN' -> 'Max Verstappen' usando Ergast del mismo GP.
+    - Resuelve 'M VERSTAPPEN' -> 'Max VERSTAPPEN' con el registro local de pilotos (sin red).
     - Aplica mapping de equipos/ pilotos de config/naming.yaml
     """
     if df.empty:
         return df
     base = df.copy()
 
-    # 1) Expandir pilotos "Inicial APELLIDO" a "Nombre Apellido" si podemos
+    # 1) Nombres de retransmisión "Inicial APELLIDO" → identidad registrada de esa temporada
     try:
         need_expand = base["Piloto"].map(_looks_like_broadcast_initial).any()
     except Exception:
         need_expand = False
     if need_expand:
-        try:
-            fmap = _ergast_fullnames(season, rnd)  # {APELLIDO: Nombre Apellido}
-        except Exception:
-            fmap = {}
-        def _expand(name: str) -> str:
-            if not _looks_like_broadcast_initial(name):
-                return name
-            parts = name.strip().split()
-            last = parts[-1].upper() if parts else ""
-            return fmap.get(last, name.title())  # fallback: capitalizar
-        base["Piloto"] = base["Piloto"].map(_expand)
-
-    # 2) Normalizar por config
-    teams_map, drivers_map = _load_naming_cfg()
-    if teams_map:
-        base["Equipo"] = base["Equipo"].map(lambda x: _norm_lookup(str(x), teams_map))
-    if drivers_map:
-        base["Piloto"] = base["Piloto"].map(lambda x: _norm_lookup(str(x), drivers_map))
+        from .storage import driver_registry
+        base["Piloto"] = driver_registry().resolve_series(base["Piloto"], int(season))
+
+    # 2) Normalizar por config (sobre valores únicos)
+    r = resolver()
+    base["Equipo"] = r.map_teams(base["Equipo"])
+    base["Piloto"] = r.map_drivers(base["Piloto"])
 
     return base
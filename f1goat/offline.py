@@ -0,0 +1,145 @@
+"""
+Fuente offline de resultados Ergast (CSV), cargada una vez e indexada por (temporada, ronda).
+
+- `normalize_offline_csv`: resuelve sinónimos de columnas al esquema
+  season, round, driver, constructor, grid, position[, status] (lo usa también tools/offline_csv_prep.py).
+- `OfflineErgastSource`: lee el CSV (o su sidecar Parquet, sin canonizar, si está al día), canoniza
+  nombres sobre valores únicos y parte el frame por (season, round). Se recarga solo si cambia el mtime del CSV.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import threading
+import pandas as pd
+
+from .normalize import canonical_team, canonical_driver_from_ergast
+
+CANON_COLS = ["Piloto","Equipo","Parrilla","Final","Status"]
+
+def _col(df: pd.DataFrame, *cands) -> Optional[str]:
+    cols = {c.lower(): c for c in df.columns}
+    for c in cands:
+        if c.lower() in cols:
+            return cols[c.lower()]
+    return None
+
+def normalize_offline_csv(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas de entrada variadas → season, round, driver, constructor, grid, position[, status]."""
+    c_season = _col(df, "season","Year")
+    c_round  = _col(df, "round","Race","Rnd")
+    c_gname  = _col(df, "givenName","GivenName","forename")
+    c_fname  = _col(df, "familyName","FamilyName","surname")
+    c_driver = _col(df, "driver","Driver","DriverName","Driver Full Name")
+    c_team   = _col(df, "constructor","Constructor","Team","ConstructorName","TeamName")
+    c_grid   = _col(df, "grid","GridPosition")
+    c_pos    = _col(df, "position","Position","ResultPosition","Final","RacePosition")
+    c_status = _col(df, "status","statusText","Status")
+    if not all([c_season, c_round, c_team, (c_driver or (c_gname and c_fname)), c_grid, c_pos]):
+        raise ValueError("Faltan columnas mínimas: season, round, (driver || given/family), constructor/team, grid, position")
+
+    out = pd.DataFrame()
+    out["season"] = pd.to_numeric(df[c_season], errors="coerce").astype("Int64")
+    out["round"]  = pd.to_numeric(df[c_round], errors="coerce").astype("Int64")
+    if c_driver:
+        out["driver"] = df[c_driver].astype(str).str.strip()
+    else:
+        out["driver"] = (df[c_gname].astype(str).str.strip() + " " + df[c_fname].astype(str).str.strip())
+    out["constructor"] = df[c_team].astype(str)
+    out["grid"]        = pd.to_numeric(df[c_grid], errors="coerce")
+    out["position"]    = pd.to_numeric(df[c_pos], errors="coerce")
+    if c_status:
+        out["status"] = df[c_status].astype("string")
+    return out.dropna(subset=["season","round"])
+
+def _canon_driver(full: str) -> str:
+    parts = str(full).strip().split(" ")
+    return canonical_driver_from_ergast(parts[0], " ".join(parts[1:]), None)
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    # Canonización sobre únicos y difusión (no fila a fila)
+    drv = {u: _canon_driver(u) for u in df["driver"].dropna().unique()}
+    team = {u: canonical_team(u) for u in df["constructor"].dropna().unique()}
+    return pd.DataFrame({
+        "season": df["season"].astype(int),
+        "round": df["round"].astype(int),
+        "Piloto": df["driver"].map(drv).astype("string"),
+        "Equipo": df["constructor"].map(team).astype("string"),
+        "Parrilla": df["grid"].astype("Int64"),
+        "Final": df["position"].astype("Int64"),
+        "Status": df["status"].astype("string"),
+    })
+
+class OfflineErgastSource:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._index: Dict[Tuple[int,int], pd.DataFrame] = {}
+
+    @property
+    def sidecar(self) -> Path:
+        return self.path.with_suffix(".parquet")
+
+    def _read(self) -> pd.DataFrame:
+        # El sidecar guarda las columnas normalizadas sin canonizar: los nombres canónicos se
+        # calculan siempre al cargar, con los mapas vigentes
+        sc = self.sidecar
+        if sc.exists() and sc.stat().st_mtime >= self.path.stat().st_mtime:
+            try:
+                return _canonical(pd.read_parquet(sc, memory_map=True))
+            except Exception:
+                pass
+        df = normalize_offline_csv(pd.read_csv(self.path))
+        if "status" not in df.columns:
+            df["status"] = pd.Series(pd.NA, index=df.index, dtype="string")
+        try:
+            df.to_parquet(sc, index=False)  # requiere pyarrow; si no está, seguimos sin sidecar
+        except Exception:
+            pass
+        return _canonical(df)
+
+    def _ensure(self) -> None:
+        if not self.path.exists():
+            self._index, self._mtime = {}, None
+            return
+        mtime = self.path.stat().st_mtime
+        if self._mtime == mtime:
+            return
+        with self._lock:
+            if self._mtime == mtime:
+                return
+            df = self._read()
+            self._index = {(int(y), int(r)): g[CANON_COLS].reset_index(drop=True)
+                           for (y, r), g in df.groupby(["season","round"], sort=True)}
+            self._mtime = mtime
+
+    def results(self, season: int, rnd: int) -> pd.DataFrame:
+        self._ensure()
+        g = self._index.get((int(season), int(rnd)))
+        return pd.DataFrame(columns=CANON_COLS) if g is None else g.copy()
+
+    def rounds(self, season: int) -> List[int]:
+        self._ensure()
+        return sorted(r for (y, r) in self._index if y == int(season))
+
+    def seasons(self) -> List[int]:
+        self._ensure()
+        return sorted({y for (y, _) in self._index})
+
+    def drivers(self) -> pd.DataFrame:
+        """Pares (Piloto, season) únicos: identidades masivas para el registro de pilotos."""
+        self._ensure()
+        if not self._index:
+            return pd.DataFrame(columns=["Piloto", "season"])
+        return (pd.concat([g[["Piloto"]].assign(season=y) for (y, _), g in self._index.items()])
+                .drop_duplicates().reset_index(drop=True))
+
+_SOURCES: Dict[str, OfflineErgastSource] = {}
+_SOURCES_LOCK = threading.Lock()
+
+def offline_source(path: str | Path) -> OfflineErgastSource:
+    key = str(Path(path).resolve())
+    with _SOURCES_LOCK:
+        if key not in _SOURCES:
+            _SOURCES[key] = OfflineErgastSource(Path(path))
+        return _SOURCES[key]
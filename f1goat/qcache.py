@@ -0,0 +1,123 @@
+"""
+Caché de resultados de consultas (en memoria, por proceso).
+
+- `@cached`: memoiza una función de lectura por (función, argumentos, generación de datos).
+  La generación (`storage.data_generation`) se incrementa en cada escritura, así que un
+  resultado nunca sobrevive a una ingesta/rescore: sin datos obsoletos y sin invalidar a mano.
+- LRU acotada por bytes (tamaño real de los DataFrames); devuelve copias para que el llamante
+  pueda modificar el resultado sin tocar la caché.
+
+Entorno:
+  F1GOAT_QCACHE=0          desactiva la caché
+  F1GOAT_QCACHE_MAX_MB     tamaño máximo (por defecto 256)
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
+import copy, os, sys, threading
+import pandas as pd
+
+def _freeze(obj: Any) -> Hashable:
+    # Argumentos → clave hashable (dicts/listas de config incluidos)
+    if isinstance(obj, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple, set)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return copy.copy(value)
+
+class QueryCache:
+    def __init__(self, max_bytes: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._generation: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, generation: int) -> Tuple[bool, Any]:
+        with self._lock:
+            if generation != self._generation:
+                # Nueva generación: todo lo anterior es obsoleto
+                self._data.clear(); self._size = 0
+                self._generation = generation
+            hit = self._data.get(key)
+            if hit is None:
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, _copy(hit[0])
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        n = _nbytes(value)
+        if n > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._data[key] = (_copy(value), n)
+            self._size += n
+            while self._size > self.max_bytes and self._data:
+                _, (_, m) = self._data.popitem(last=False)
+                self._size -= m
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear(); self._size = 0
+            self._generation = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._size, "hits": self.hits, "misses": self.misses,
+                    "generation": self._generation}
+
+_CACHE = QueryCache(
+    max_bytes=int(float(os.getenv("F1GOAT_QCACHE_MAX_MB", "256")) * 1024 * 1024),
+    enabled=os.getenv("F1GOAT_QCACHE", "1").lower() not in ("0","false","no","off"),
+)
+
+def query_cache() -> QueryCache:
+    return _CACHE
+
+def cached(fn: Callable) -> Callable:
+    """Memoiza `fn` por argumentos y generación de datos (ver módulo)."""
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _CACHE.enabled:
+            return fn(*args, **kwargs)
+        from .storage import data_generation, DB_PATH
+        gen = data_generation()
+        key = (str(DB_PATH), name, _freeze(args), _freeze(kwargs))
+        found, value = _CACHE.get(key, gen)
+        if found:
+            return value
+        value = fn(*args, **kwargs)
+        _CACHE.put(key, gen, value)
+        return value
+
+    wrapper.uncached = fn  # type: ignore[attr-defined]
+    return wrapper
@@ -0,0 +1,317 @@
+"""
+Registro local de identidades de piloto: códigos, nombres de retransmisión ("M VERSTAPPEN") y
+nombres completos Ergast ("Max VERSTAPPEN") → un único `drivers.driver_id` estable.
+
+- Tabla `driver_aliases` (alias normalizado, rango de temporadas, driver_id, tipo). Los alias de
+  retransmisión y código valen solo para las temporadas reales de su piloto: "M SCHUMACHER" es
+  Michael en 1991–2012 y Mick en 2021–2022; si dos carreras se solapan el alias queda sin
+  registrar (ambiguo).
+- `sync(con, seasons)`: alta incremental de alias durante la ingesta (sin tocar los hechos).
+- `build(con)`: reconstrucción completa desde la base (nombres y temporadas de los hechos) y,
+  opcionalmente, datos masivos (CSV offline de Ergast). Informa de las carreras partidas y solo
+  las fusiona con `merge=True` (paso explícito `f1goat registry --merge`).
+- `DriverRegistry`: mapa en memoria (dict) para resolver en O(1) durante la ingesta, sin red.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+import re, unicodedata
+
+import pandas as pd
+
+OPEN_FROM, OPEN_TO = 0, 9999
+
+# ---------- Claves de alias ----------
+
+def alias_key(name: object) -> str:
+    """Clave de búsqueda: sin acentos ni puntos, minúsculas, espacios simples."""
+    s = unicodedata.normalize("NFKD", str(name or ""))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", s.replace(".", " ")).strip().casefold()
+
+def is_broadcast(name: object) -> bool:
+    # "M VERSTAPPEN", "C SAINZ", "Z GUANYU"…
+    return bool(re.match(r"^[A-Z]\s+[A-ZÀ-ÞŸ'’\- ]+$", str(name or "").strip()))
+
+def broadcast_key(full_name: object) -> Optional[str]:
+    """"Max VERSTAPPEN" → "m verstappen" (inicial del nombre + apellido)."""
+    parts = alias_key(full_name).split(" ")
+    if len(parts) < 2:
+        return None
+    return f"{parts[0][0]} {' '.join(parts[1:])}"
+
+# ---------- Resolución en memoria ----------
+
+class DriverRegistry:
+    """(clave, temporada) → (driver_id, nombre). Se construye una vez desde `driver_aliases`."""
+    def __init__(self, rows: Iterable[Tuple[str, int, int, int, str]]):
+        # alias → [(desde, hasta, driver_id, nombre)]; casi siempre un único tramo
+        self._by_alias: Dict[str, List[Tuple[int, int, int, str]]] = {}
+        for alias, y0, y1, driver_id, name in rows:
+            self._by_alias.setdefault(alias, []).append((int(y0), int(y1), int(driver_id), str(name)))
+
+    def __len__(self) -> int:
+        return len(self._by_alias)
+
+    def lookup(self, name: object, season: int) -> Optional[Tuple[int, str]]:
+        for y0, y1, driver_id, canon in self._by_alias.get(alias_key(name), ()):
+            if y0 <= season <= y1:
+                return driver_id, canon
+        return None
+
+    def resolve(self, name: object, season: int, code: object = None, full: object = None) -> str:
+        """
+        Nombre canónico del piloto; si no está registrado, el nombre tal cual. `full` (nombre y
+        apellido de la propia fuente) valida un acierto por retransmisión/código: "M SCHUMACHER"
+        con full="Mick Schumacher" no se acepta como Michael; entonces manda el nombre completo.
+        """
+        hit = self.lookup(name, season)
+        if hit is None and code:
+            hit = self.lookup(f"code:{code}", season)
+        if full is not None:
+            if hit is not None and alias_key(hit[1]) == alias_key(full):
+                return hit[1]
+            hit = self.lookup(full, season)
+            return full if hit is None else hit[1]
+        return name if hit is None else hit[1]
+
+    def resolve_series(self, names: pd.Series, season: int, codes: Optional[pd.Series] = None,
+                       fulls: Optional[pd.Series] = None) -> pd.Series:
+        # Resolución sobre valores únicos y difusión (un GP = ~20 nombres)
+        if codes is None and fulls is None:
+            m = {u: self.resolve(u, season) for u in names.dropna().unique()}
+            return names.map(lambda x: m.get(x, x))
+        codes = codes if codes is not None else pd.Series(None, index=names.index, dtype=object)
+        fulls = fulls if fulls is not None else pd.Series(None, index=names.index, dtype=object)
+        keys = pd.Series(list(zip(names, codes, fulls)), index=names.index)
+        m = {k: self.resolve(k[0], season, k[1], k[2]) for k in set(keys)}
+        return keys.map(m)
+
+def load(con) -> DriverRegistry:
+    return DriverRegistry(con.execute(
+        "SELECT a.alias, a.season_from, a.season_to, a.driver_id, d.name "
+        "FROM driver_aliases a JOIN drivers d USING (driver_id)").fetchall())
+
+# ---------- Construcción ----------
+
+def _bulk_identities(bulk: Optional[pd.DataFrame]) -> pd.DataFrame:
+    # bulk: Piloto (nombre completo canónico), season[, code]
+    if bulk is None or bulk.empty:
+        return pd.DataFrame(columns=["name", "y0", "y1", "code"])
+    b = bulk.assign(code=bulk["code"] if "code" in bulk.columns else None)
+    g = b.groupby("Piloto", as_index=False).agg(y0=("season", "min"), y1=("season", "max"), code=("code", "last"))
+    return g.rename(columns={"Piloto": "name"})
+
+def _claims(items: List[Tuple[int, int, int]]) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    [(desde, hasta, driver_id)] de un alias → los mismos tramos, limitados a las temporadas reales
+    de cada piloto (sin tramos abiertos: un novato con la misma inicial y apellido que un piloto
+    retirado no hereda su identidad). None si dos carreras se solapan.
+    """
+    items = sorted(set(items))
+    for (_, y1, _), (y0, _, _) in zip(items, items[1:]):
+        if y0 <= y1:
+            return None
+    return items
+
+def _merge_driver(con, src: int, dst: int) -> None:
+    # Filas de `src` pasan a `dst`; solo se llama sin GPs en común (no se borra ningún resultado)
+    for table in ("driver_results", "driver_inputs"):
+        con.execute(f"UPDATE {table} SET driver_id = ? WHERE driver_id = ?", [dst, src])
+    con.execute("DELETE FROM driver_aliases WHERE driver_id = ?", [src])
+    con.execute("DELETE FROM drivers WHERE driver_id = ?", [src])
+
+def _shared_events(con, src: int, dst: int) -> int:
+    return con.execute("""
+        WITH f AS (
+            SELECT driver_id, event_id FROM driver_results
+            UNION SELECT driver_id, event_id FROM driver_inputs
+        )
+        SELECT COUNT(*) FROM f a JOIN f b USING (event_id) WHERE a.driver_id = ? AND b.driver_id = ?
+    """, [src, dst]).fetchone()[0]
+
+def _drivers(con, ids: pd.DataFrame) -> pd.DataFrame:
+    # driver_id, name, temporadas con resultados (o de los datos masivos), nº de GPs, código
+    drivers = con.sql("""
+        WITH f AS (
+            SELECT driver_id, event_id FROM driver_results
+            UNION SELECT driver_id, event_id FROM driver_inputs
+        )
+        SELECT d.driver_id, d.name, MIN(f.event_id // 100) AS y0, MAX(f.event_id // 100) AS y1,
+               COUNT(f.event_id) AS n
+        FROM drivers d LEFT JOIN f USING (driver_id)
+        GROUP BY d.driver_id, d.name
+    """).df()
+    if not ids.empty:
+        # Temporadas de los datos masivos para identidades que aún no tienen resultados
+        extra = drivers.merge(ids, on="name", how="left", suffixes=("", "_bulk"))
+        drivers["y0"] = extra["y0"].fillna(extra["y0_bulk"]).to_numpy()
+        drivers["y1"] = extra["y1"].fillna(extra["y1_bulk"]).to_numpy()
+        drivers["code"] = extra["code"].to_numpy()
+    else:
+        drivers["code"] = None
+    drivers["key"] = drivers["name"].map(alias_key)
+    drivers["broadcast"] = drivers["name"].map(is_broadcast)
+    return drivers
+
+def _plan(drivers: pd.DataFrame):
+    """
+    Alias y candidatos a fusión a partir de la tabla de pilotos → (aliases, ambiguous, candidates).
+    No toca la base.
+    """
+    candidates: List[Tuple[int, int]] = []
+    # 1) Mismo nombre completo con grafías distintas (acentos, mayúsculas): una sola identidad
+    full = drivers[~drivers["broadcast"]].sort_values(["n", "driver_id"], ascending=[False, True])
+    canon_of_key: Dict[str, int] = {}
+    for r in full.itertuples():
+        dst = canon_of_key.setdefault(r.key, int(r.driver_id))
+        if dst != r.driver_id:
+            candidates.append((int(r.driver_id), dst))
+    ident = full[full["driver_id"].isin(set(canon_of_key.values()))]
+
+    # 2) Alias por temporadas: nombre completo (abierto); retransmisión y código solo en las
+    #    temporadas reales del piloto (sin ellas, no hay alias de retransmisión ni código)
+    span = {int(r.driver_id): (int(r.y0), int(r.y1)) for r in drivers.itertuples()
+            if pd.notna(r.y0) and pd.notna(r.y1)}
+    shared: Dict[Tuple[str, str], List[Tuple[int, int, int]]] = {}
+    for r in ident.itertuples():
+        if int(r.driver_id) not in span:
+            continue
+        y0, y1 = span[int(r.driver_id)]
+        bk = broadcast_key(r.name)
+        if bk and bk != r.key:
+            shared.setdefault(("broadcast", bk), []).append((y0, y1, int(r.driver_id)))
+        if r.code and isinstance(r.code, str):
+            shared.setdefault(("code", f"code:{alias_key(r.code)}"), []).append((y0, y1, int(r.driver_id)))
+    aliases = [(key, OPEN_FROM, OPEN_TO, driver_id, "full") for key, driver_id in canon_of_key.items()]
+    ambiguous = 0
+    claims: Dict[str, List[Tuple[int, int, int]]] = {}
+    for (kind, key), items in shared.items():
+        c = _claims(items)
+        if c is None:
+            ambiguous += 1
+            continue
+        claims[key] = c
+        aliases.extend((key, y0, y1, driver_id, kind) for y0, y1, driver_id in c)
+
+    # 3) Nombres de retransmisión guardados como piloto propio: candidato a fusión si toda su
+    #    carrera cae dentro del tramo de una identidad; si no, identidad propia en sus temporadas
+    for r in drivers[drivers["broadcast"]].itertuples():
+        if r.key in canon_of_key:
+            continue
+        y0, y1 = span.get(int(r.driver_id), (OPEN_FROM, OPEN_TO))
+        hits = [d for a0, a1, d in claims.get(r.key, ()) if a0 <= y0 and y1 <= a1]
+        if len(hits) == 1:
+            candidates.append((int(r.driver_id), hits[0]))
+        elif any(a0 <= y1 and y0 <= a1 for a0, a1, _ in claims.get(r.key, ())):
+            ambiguous += 1
+        else:
+            claims.setdefault(r.key, []).append((y0, y1, int(r.driver_id)))
+            aliases.append((r.key, y0, y1, int(r.driver_id), "broadcast"))
+    return aliases, ambiguous, candidates
+
+def _write_aliases(con, aliases: List[Tuple[str, int, int, int, str]]) -> None:
+    con.execute("DELETE FROM driver_aliases")
+    if aliases:
+        df = pd.DataFrame(aliases, columns=["alias", "season_from", "season_to", "driver_id", "kind"])
+        con.register("_registry_aliases", df)
+        try:
+            con.execute("INSERT INTO driver_aliases SELECT alias, season_from, season_to, driver_id, kind "
+                        "FROM _registry_aliases")
+        finally:
+            con.unregister("_registry_aliases")
+
+def build(con, bulk: Optional[pd.DataFrame] = None, merge: bool = False) -> dict:
+    """
+    Reconstruye `driver_aliases` con el cursor dado (dentro de una transacción). Las carreras
+    partidas (grafías de un mismo nombre, nombres de retransmisión guardados aparte) se informan
+    como candidatas; solo con `merge=True` se fusionan, y nunca si comparten algún GP (conflicto:
+    no se borra ningún resultado). Devuelve {identities, aliases, ambiguous, candidates, merged,
+    conflicts, seasons}; `seasons` = temporadas cuyos resultados cambiaron de piloto.
+    """
+    ids = _bulk_identities(bulk)
+    if not ids.empty:
+        reg = pd.DataFrame({"name": ids["name"].astype(str)})
+        con.register("_registry_bulk", reg)
+        try:
+            con.execute("INSERT INTO drivers (name) SELECT DISTINCT name FROM _registry_bulk "
+                        "WHERE name NOT IN (SELECT name FROM drivers) ORDER BY 1")
+        finally:
+            con.unregister("_registry_bulk")
+
+    drivers = _drivers(con, ids)
+    aliases, ambiguous, candidates = _plan(drivers)
+    names = dict(zip(drivers["driver_id"].astype(int), drivers["name"]))
+    spans = {int(r.driver_id): (int(r.y0), int(r.y1)) for r in drivers.itertuples()
+             if pd.notna(r.y0) and pd.notna(r.y1)}
+    report = [{"src": names[s], "dst": names[d], "seasons": spans.get(s)} for s, d in candidates]
+
+    merged, conflicts, seasons = [], [], set()
+    if merge and candidates:
+        for (src, dst), item in zip(candidates, report):
+            if _shared_events(con, src, dst):
+                conflicts.append(item)
+                continue
+            _merge_driver(con, src, dst)
+            merged.append(item)
+            if item["seasons"]:
+                seasons.update(range(item["seasons"][0], item["seasons"][1] + 1))
+        if merged:
+            aliases, ambiguous, _ = _plan(_drivers(con, ids))
+
+    _write_aliases(con, aliases)
+    return {"identities": len({a[3] for a in aliases}), "aliases": len(aliases), "ambiguous": ambiguous,
+            "candidates": report, "merged": merged, "conflicts": conflicts, "seasons": sorted(seasons)}
+
+def sync(con, seasons: Iterable[int]) -> int:
+    """
+    Alta incremental (durante la ingesta) de los alias de los pilotos con resultados en `seasons`:
+    nombre completo y retransmisión/código ajustados a sus temporadas. No fusiona ni toca los
+    hechos; un alias que pisa a otro piloto se deja para `build` (f1goat registry). Devuelve el
+    número de alias añadidos o ampliados.
+    """
+    seasons = sorted({int(y) for y in seasons})
+    if not seasons:
+        return 0
+    drivers = con.execute("""
+        WITH f AS (
+            SELECT driver_id, event_id FROM driver_results
+            UNION SELECT driver_id, event_id FROM driver_inputs
+        )
+        SELECT d.driver_id, d.name, MIN(f.event_id // 100), MAX(f.event_id // 100)
+        FROM drivers d JOIN f USING (driver_id)
+        WHERE d.driver_id IN (SELECT driver_id FROM f WHERE event_id // 100 IN (SELECT UNNEST(?)))
+        GROUP BY d.driver_id, d.name
+    """, [seasons]).fetchall()
+    wanted: List[Tuple[str, int, int, int, str]] = []
+    for driver_id, name, y0, y1 in drivers:
+        key = alias_key(name)
+        if is_broadcast(name):
+            wanted.append((key, int(y0), int(y1), int(driver_id), "broadcast"))
+            continue
+        wanted.append((key, OPEN_FROM, OPEN_TO, int(driver_id), "full"))
+        bk = broadcast_key(name)
+        if bk and bk != key:
+            wanted.append((bk, int(y0), int(y1), int(driver_id), "broadcast"))
+    if not wanted:
+        return 0
+    existing: Dict[str, List[Tuple[int, int, int, str]]] = {}
+    for alias, a0, a1, driver_id, kind in con.execute(
+            "SELECT alias, season_from, season_to, driver_id, kind FROM driver_aliases "
+            "WHERE alias IN (SELECT UNNEST(?))", [sorted({w[0] for w in wanted})]).fetchall():
+        existing.setdefault(alias, []).append((int(a0), int(a1), int(driver_id), kind))
+
+    changed = 0
+    for key, y0, y1, driver_id, kind in wanted:
+        rows = existing.get(key, [])
+        own = [r for r in rows if r[2] == driver_id]
+        if own and own[0][0] <= y0 and y1 <= own[0][1]:
+            continue
+        if own:
+            y0, y1 = min(y0, own[0][0]), max(y1, own[0][1])
+        if any(a0 <= y1 and y0 <= a1 for a0, a1, d, _ in rows if d != driver_id):
+            continue
+        con.execute("DELETE FROM driver_aliases WHERE alias = ? AND driver_id = ?", [key, driver_id])
+        con.execute("INSERT INTO driver_aliases VALUES (?, ?, ?, ?, ?)", [key, y0, y1, driver_id, kind])
+        existing[key] = [r for r in rows if r not in own] + [(y0, y1, driver_id, kind)]
+        changed += 1
+    return changed
@@ -0,0 +1,25 @@
+"""
+Re-puntuación de todo el histórico sin volver a descargar nada.
+
+Lee las entradas crudas (`gp_driver_inputs`: parrilla, final, status, fuente), recalcula en una
+sola pasada vectorizada todas las columnas derivadas con `compute.score_results` y sustituye
+`gp_driver_results` / `gp_team_results` en una transacción. Pensado para iterar la metodología
+(WeightsGP, fórmulas RR/QR/TD): funciona sin red.
+"""
+from __future__ import annotations
+from typing import Optional
+import time
+
+from .compute import score_results
+from .storage import load_driver_inputs, replace_scores
+
+def rescore(season: Optional[int] = None, dry_run: bool = False) -> dict:
+    """Recalcula todo el histórico (o una temporada). Devuelve un resumen con conteos y tiempo."""
+    t0 = time.perf_counter()
+    inputs = load_driver_inputs(season)
+    keys = inputs["event_key"].unique().tolist()
+    drivers, teams = score_results(inputs.drop(columns=["Fuente"]), by=["event_key"])
+    if keys and not dry_run:
+        replace_scores(drivers, teams, keys)
+    return {"events": len(keys), "drivers": len(drivers), "teams": len(teams),
+            "seconds": round(time.perf_counter() - t0, 3), "dry_run": dry_run}
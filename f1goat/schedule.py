@@ -0,0 +1,88 @@
+"""
+Proveedor de calendarios (FastF1 `get_event_schedule`) memoizado en memoria y en la DB.
+
+`season_calendar(season)` devuelve un DataFrame normalizado (round, official_name, event_date),
+sin tests de pretemporada ni ronda 0. Orden de consulta:
+  1) memoria del proceso,
+  2) DuckDB (`gp_events` + sello en `gp_calendar_fetch`),
+  3) FastF1 (y se persiste en la DB).
+Un calendario descargado con la temporada ya cerrada no caduca; el resto (temporada en curso o
+descargado antes de acabar) se refresca tras `F1GOAT_SCHEDULE_TTL` s (12 h).
+"""
+from __future__ import annotations
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+import os, threading
+import pandas as pd
+
+from .storage import save_calendar, load_calendar
+
+_MEM: Dict[int, Tuple[pd.DataFrame, datetime]] = {}
+_LOCK = threading.Lock()
+
+def official_name(season:int, official_or_event:str) -> str:
+    return f"{season} — {official_or_event}"
+
+def _is_testing_row(r) -> bool:
+    name = str(r.get("OfficialEventName") or r.get("EventName") or "").lower()
+    fmt  = str(r.get("EventFormat", "")).lower()
+    return ("testing" in name) or ("test" in name) or ("testing" in fmt) or ("test" in fmt)
+
+def _fresh(season:int, fetched_at) -> bool:
+    # Cerrada = descargada después de terminar la temporada (no basta con que hoy ya lo esté)
+    fetched = pd.to_datetime(fetched_at).to_pydatetime()
+    if fetched.year > season:
+        return True
+    ttl = float(os.getenv("F1GOAT_SCHEDULE_TTL", str(12 * 3600)))
+    return (datetime.now() - fetched).total_seconds() < ttl
+
+def _fetch(season:int) -> pd.DataFrame:
+    import fastf1 as ff1
+    sched = ff1.get_event_schedule(season)
+    rows = []
+    for _, r in sched.sort_values("RoundNumber").iterrows():
+        try:
+            rnd = int(r["RoundNumber"])
+        except Exception:
+            continue
+        if rnd <= 0 or _is_testing_row(r):
+            continue
+        official = r.get("OfficialEventName") or r.get("EventName") or f"GP {season} R{rnd}"
+        rows.append({"round": rnd, "official_name": official_name(season, official),
+                     "event_date": pd.to_datetime(r.get("EventDate")).date()})
+    return pd.DataFrame(rows, columns=["round","official_name","event_date"])
+
+def season_calendar(season:int, refresh:bool=False) -> pd.DataFrame:
+    season = int(season)
+    with _LOCK:
+        hit = _MEM.get(season)
+    if hit is not None and not refresh and _fresh(season, hit[1]):
+        return hit[0].copy()
+
+    if not refresh:
+        stored = load_calendar(season)
+        if stored is not None and _fresh(season, stored[1]):
+            cal, fetched_at = stored
+            cal["event_date"] = pd.to_datetime(cal["event_date"]).dt.date
+            with _LOCK:
+                _MEM[season] = (cal, pd.to_datetime(fetched_at).to_pydatetime())
+            return cal.copy()
+
+    cal = _fetch(season)
+    now = datetime.now()
+    save_calendar(season, cal, now)
+    with _LOCK:
+        _MEM[season] = (cal, now)
+    return cal.copy()
+
+def calendar_event(season:int, rnd:int) -> Optional[Tuple[str, date]]:
+    """(official_name, event_date) de una ronda, o None si no está en el calendario."""
+    cal = season_calendar(season)
+    rr = cal.loc[cal["round"] == int(rnd)]
+    if rr.empty:
+        return None
+    return str(rr.iloc[0]["official_name"]), rr.iloc[0]["event_date"]
+
+def clear_memory() -> None:
+    with _LOCK:
+        _MEM.clear()
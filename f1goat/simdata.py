@@ -1,6 +1,6 @@
 from typing import List, Dict, Tuple, Optional
 import pandas as pd
-from .compute import compute_gp_points_f1goat, compute_csi
+from .compute import compute_gp_points_batch, compute_csi_batch
 
 DRIVERS: List[str] = [
     "Max Verstappen","Sergio Pérez","Lewis Hamilton","George Russell","Fernando Alonso","Lance Stroll",
@@ -47,19 +47,18 @@ def simulate_gp(season:int, rnd:int):
     rows = []
     for pos, idx in enumerate(order, start=1):
         d = DRIVERS[idx]; team = TEAM_OF[d]
-        rr, qr, td, oq, wa = _components_for_pos(pos, rnd); pf = 0.0
-        pts = compute_gp_points_f1goat(rr, qr, td, oq, wa, pf)
-        csi = compute_csi(rr, qr, td, oq, wa, TEAM_STRENGTH.get(team, 1.0))
-        rows.append({
-            "Piloto": d, "Equipo": team, "Parrilla": pos, "Final": pos,
-            "CSI": csi,
-            "RR": round(rr,2), "QR": round(qr,2), "TD": round(td,2),
-            "OQ": None if oq is None else round(oq,2),
-            "WA": None if wa is None else round(wa,2),
-            "PF": pf,
-            "Puntos F1GOAT (GP)": pts
-        })
-    drivers = pd.DataFrame(rows)
+        rr, qr, td, oq, wa = _components_for_pos(pos, rnd)
+        rows.append({"Piloto": d, "Equipo": team, "Parrilla": pos, "Final": pos,
+                     "RR": rr, "QR": qr, "TD": td, "OQ": oq, "WA": wa, "PF": 0.0})
+    raw = pd.DataFrame(rows).astype({"OQ": "float64", "WA": "float64"})
+    comps = [raw[c] for c in ("RR","QR","TD","OQ","WA")]
+    strength = raw["Equipo"].map(TEAM_STRENGTH).fillna(1.0)
+    drivers = raw[["Piloto","Equipo","Parrilla","Final"]].assign(
+        CSI=compute_csi_batch(*comps, car_strength=strength),
+        RR=raw["RR"].round(2), QR=raw["QR"].round(2), TD=raw["TD"].round(2),
+        OQ=raw["OQ"].round(2), WA=raw["WA"].round(2), PF=raw["PF"],
+    )
+    drivers["Puntos F1GOAT (GP)"] = compute_gp_points_batch(*comps, pf=raw["PF"])
 
     agg = drivers.groupby("Equipo", as_index=False).agg({
         "CSI":"mean","Parrilla":"mean","Final":"mean"
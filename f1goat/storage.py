@@ -1,33 +1,107 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Iterable
+from contextlib import contextmanager
+import atexit, os, sys, threading, time
 import duckdb
 import pandas as pd
 
+from .qcache import cached
+
 DB_PATH = Path("data/f1goat.duckdb")
+SNAPSHOT_INTERVAL = float(os.getenv("F1GOAT_SNAPSHOT_INTERVAL", "60"))
 
 DDL = r"""
-CREATE TABLE IF NOT EXISTS gp_events (
-  event_key TEXT PRIMARY KEY,   -- "2025_22"
+-- Esquema normalizado: dimensiones con claves enteras + hechos codificados por diccionario.
+-- event_id = season * 100 + round (estable y ordenable); event_key "2025_22" se conserva como atributo.
+CREATE TABLE IF NOT EXISTS events (
+  event_id INTEGER PRIMARY KEY,
+  event_key TEXT NOT NULL,
   season INTEGER NOT NULL,
   round INTEGER NOT NULL,
   official_name TEXT NOT NULL,
   event_date DATE
 );
 
-CREATE TABLE IF NOT EXISTS gp_driver_results (
+CREATE SEQUENCE IF NOT EXISTS drivers_seq;
+CREATE TABLE IF NOT EXISTS drivers (
+  driver_id INTEGER PRIMARY KEY DEFAULT nextval('drivers_seq'),
+  name TEXT NOT NULL UNIQUE     -- nombre mostrado (Piloto); renombrar = un UPDATE aquí
+);
+
+-- Registro de identidades (f1goat.registry): alias normalizado → driver_id por rango de temporadas
+CREATE TABLE IF NOT EXISTS driver_aliases (
+  alias TEXT NOT NULL,          -- "max verstappen", "m verstappen", "code:ver"
+  season_from INTEGER NOT NULL,
+  season_to INTEGER NOT NULL,
+  driver_id INTEGER NOT NULL,
+  kind TEXT NOT NULL,           -- full | broadcast | code
+  PRIMARY KEY (alias, driver_id)
+);
+
+CREATE SEQUENCE IF NOT EXISTS teams_seq;
+CREATE TABLE IF NOT EXISTS teams (
+  team_id INTEGER PRIMARY KEY DEFAULT nextval('teams_seq'),
+  name TEXT NOT NULL UNIQUE     -- nombre mostrado (Equipo)
+);
+
+CREATE TABLE IF NOT EXISTS driver_results (
+  event_id INTEGER NOT NULL,
+  driver_id INTEGER NOT NULL,
+  team_id INTEGER NOT NULL,
+  grid INTEGER,
+  finish INTEGER,
+  csi DOUBLE,
+  rr DOUBLE, qr DOUBLE, td DOUBLE, oq DOUBLE, wa DOUBLE, pf DOUBLE,
+  points_gp DOUBLE,
+  PRIMARY KEY (event_id, driver_id)
+);
+
+-- Entradas crudas por GP: lo mínimo para recalcular todas las columnas derivadas (f1goat rescore)
+CREATE TABLE IF NOT EXISTS driver_inputs (
+  event_id INTEGER NOT NULL,
+  driver_id INTEGER NOT NULL,
+  team_id INTEGER NOT NULL,
+  grid INTEGER,
+  finish INTEGER,
+  status TEXT,
+  source TEXT,                  -- fastf1 | ergast | ergast_csv | legacy (sembrado desde los resultados)
+  PRIMARY KEY (event_id, driver_id)
+);
+
+CREATE TABLE IF NOT EXISTS team_results (
+  event_id INTEGER NOT NULL,
+  team_id INTEGER NOT NULL,
+  parrilla_media DOUBLE,
+  final_media DOUBLE,
+  csi_medio DOUBLE,
+  ops DOUBLE, rel DOUBLE, dev DOUBLE,
+  points_gp DOUBLE,
+  PRIMARY KEY (event_id, team_id)
+);
+
+-- Clasificaciones de temporada materializadas (se recalcula solo la temporada tocada, en la
+-- misma transacción que los upserts). *_standings: por ronda con acumulado; *_final: agregado.
+-- Valores sin redondear; `load_season` redondea al leer.
+CREATE TABLE IF NOT EXISTS season_driver_standings (
+  season INTEGER NOT NULL,
+  round INTEGER NOT NULL,
   event_key TEXT NOT NULL,
   driver TEXT NOT NULL,
-  team TEXT NOT NULL,
+  team TEXT,
   grid INTEGER,
   finish INTEGER,
   csi DOUBLE,
   rr DOUBLE, qr DOUBLE, td DOUBLE, oq DOUBLE, wa DOUBLE, pf DOUBLE,
   points_gp DOUBLE,
-  PRIMARY KEY (event_key, driver)
+  acum DOUBLE,
+  acum_100 DOUBLE
 );
+CREATE INDEX IF NOT EXISTS idx_season_driver_standings ON season_driver_standings (season);
 
-CREATE TABLE IF NOT EXISTS gp_team_results (
+CREATE TABLE IF NOT EXISTS season_team_standings (
+  season INTEGER NOT NULL,
+  round INTEGER NOT NULL,
   event_key TEXT NOT NULL,
   team TEXT NOT NULL,
   parrilla_media DOUBLE,
@@ -35,188 +109,1050 @@ CREATE TABLE IF NOT EXISTS gp_team_results (
   csi_medio DOUBLE,
   ops DOUBLE, rel DOUBLE, dev DOUBLE,
   points_gp DOUBLE,
-  PRIMARY KEY (event_key, team)
+  acum DOUBLE,
+  acum_100 DOUBLE
+);
+CREATE INDEX IF NOT EXISTS idx_season_team_standings ON season_team_standings (season);
+
+CREATE TABLE IF NOT EXISTS season_driver_final (
+  season INTEGER NOT NULL,
+  driver TEXT NOT NULL,
+  team TEXT,
+  parrilla_media DOUBLE, final_media DOUBLE, csi_medio DOUBLE,
+  rr_medio DOUBLE, qr_medio DOUBLE, td_medio DOUBLE, oq_medio DOUBLE, wa_medio DOUBLE, pf_medio DOUBLE,
+  total_gp DOUBLE,
+  acum DOUBLE,
+  acum_100 DOUBLE
+);
+CREATE INDEX IF NOT EXISTS idx_season_driver_final ON season_driver_final (season);
+
+CREATE TABLE IF NOT EXISTS season_team_final (
+  season INTEGER NOT NULL,
+  team TEXT NOT NULL,
+  parrilla_media DOUBLE, final_media DOUBLE, csi_medio DOUBLE,
+  ops DOUBLE, rel DOUBLE, dev DOUBLE,
+  total_gp DOUBLE,
+  acum DOUBLE,
+  acum_100 DOUBLE
+);
+CREATE INDEX IF NOT EXISTS idx_season_team_final ON season_team_final (season);
+
+-- Índice de sumas prefijas denso: acumulado de cada entidad tras cada ronda de la temporada
+-- (también rondas en las que no corrió). "Clasificación tras la ronda k" = una lectura por (season, round).
+CREATE TABLE IF NOT EXISTS season_prefix (
+  kind TEXT NOT NULL,           -- driver | team
+  season INTEGER NOT NULL,
+  round INTEGER NOT NULL,
+  entity TEXT NOT NULL,         -- piloto o equipo
+  team TEXT,                    -- último equipo del piloto hasta esa ronda (= entity para equipos)
+  acum DOUBLE NOT NULL,
+  gps INTEGER NOT NULL          -- GPs disputados hasta esa ronda
+);
+CREATE INDEX IF NOT EXISTS idx_season_prefix ON season_prefix (kind, season, round);
+
+-- Contadores persistentes. data_generation: +1 en cada transacción de escritura (invalida qcache).
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value BIGINT NOT NULL
 );
+INSERT OR IGNORE INTO meta VALUES ('data_generation', 0);
+
+CREATE TABLE IF NOT EXISTS ingest_state (
+  season INTEGER NOT NULL,
+  round INTEGER NOT NULL,
+  status TEXT NOT NULL,         -- ok | no_results | error
+  source TEXT,
+  payload_hash TEXT,            -- sha1 de las entradas (piloto, equipo, parrilla, final)
+  n_drivers INTEGER,
+  n_teams INTEGER,
+  message TEXT,
+  updated_at TIMESTAMP NOT NULL,
+  PRIMARY KEY (season, round)
+);
+
+CREATE TABLE IF NOT EXISTS gp_calendar_fetch (
+  season INTEGER PRIMARY KEY,   -- calendario de la temporada volcado en events
+  fetched_at TIMESTAMP NOT NULL,
+  n_events INTEGER NOT NULL
+);
+"""
+
+# Vistas de compatibilidad con el esquema anterior (columnas de texto event_key / driver / team):
+# consultas ad hoc, herramientas y notebooks siguen funcionando. El código caliente usa los IDs.
+VIEWS = r"""
+CREATE OR REPLACE VIEW gp_events AS
+SELECT event_key, season, round, official_name, event_date FROM events;
+
+CREATE OR REPLACE VIEW gp_driver_results AS
+SELECT e.event_key, d.name AS driver, t.name AS team, r.grid, r.finish, r.csi, r.rr, r.qr, r.td, r.oq, r.wa,
+       r.pf, r.points_gp
+FROM driver_results r JOIN events e USING (event_id) JOIN drivers d USING (driver_id) JOIN teams t USING (team_id);
+
+CREATE OR REPLACE VIEW gp_driver_inputs AS
+SELECT e.event_key, d.name AS driver, t.name AS team, i.grid, i.finish, i.status, i.source
+FROM driver_inputs i JOIN events e USING (event_id) JOIN drivers d USING (driver_id) JOIN teams t USING (team_id);
+
+CREATE OR REPLACE VIEW gp_team_results AS
+SELECT e.event_key, t.name AS team, r.parrilla_media, r.final_media, r.csi_medio, r.ops, r.rel, r.dev, r.points_gp
+FROM team_results r JOIN events e USING (event_id) JOIN teams t USING (team_id);
+
+-- Resultados por GP con los nombres de columna de la app
+CREATE OR REPLACE VIEW gp_driver_results_ui AS
+SELECT e.season AS "Temporada", e.round AS "Ronda", e.official_name AS "GP", d.name AS "Piloto",
+       t.name AS "Equipo", r.grid AS "Parrilla", r.finish AS "Final", r.csi AS "CSI", r.rr AS "RR", r.qr AS "QR",
+       r.td AS "TD", r.oq AS "OQ", r.wa AS "WA", r.pf AS "PF", r.points_gp AS "Puntos F1GOAT (GP)"
+FROM driver_results r JOIN events e USING (event_id) JOIN drivers d USING (driver_id) JOIN teams t USING (team_id);
+
+CREATE OR REPLACE VIEW gp_team_results_ui AS
+SELECT e.season AS "Temporada", e.round AS "Ronda", e.official_name AS "GP", t.name AS "Equipo",
+       r.parrilla_media AS "Parrilla media", r.final_media AS "Final media", r.csi_medio AS "CSI medio",
+       r.ops AS "Ops", r.rel AS "Rel", r.dev AS "Dev", r.points_gp AS "Puntos F1GOAT (GP)"
+FROM team_results r JOIN events e USING (event_id) JOIN teams t USING (team_id);
 """
 
+# ---------- CONEXIONES ----------
+
+_BUMP_GENERATION = "UPDATE meta SET value = value + 1 WHERE key = 'data_generation'"
+
+def snapshot_path(path: Optional[Path] = None) -> Path:
+    """Snapshot de solo lectura que publica el escritor: data/f1goat.snapshot.duckdb."""
+    path = path or DB_PATH
+    return path.with_name(f"{path.stem}.snapshot{path.suffix}")
+
+def _stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+def _copy_database(con, source: str, dest: Path) -> None:
+    # Copia consistente (esquema + datos) a un fichero temporal y swap atómico sobre `dest`
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    con.execute(f"ATTACH '{tmp.as_posix()}' AS f1goat_publish")
+    try:
+        con.execute(f'COPY FROM DATABASE "{source}" TO f1goat_publish')
+    finally:
+        con.execute("DETACH f1goat_publish")
+    os.replace(tmp, dest)
+
+def _bootstrap_snapshot(path: Path, snap: Path) -> None:
+    # Lector sin snapshot publicado: lo crea desde la base (si no hay escritor con el fichero
+    # abierto) o, si aún no existe base, con el esquema vacío.
+    snap.parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(":memory:")
+    try:
+        if path.exists():
+            try:
+                con.execute(f"ATTACH '{path.as_posix()}' AS f1goat_source (READ_ONLY)")
+            except duckdb.IOException as e:
+                raise RuntimeError(f"Aún no hay snapshot publicado en {snap} y la base está bloqueada por el "
+                                   f"proceso escritor; se publicará al terminar su primera escritura.") from e
+        else:
+            con.execute("ATTACH ':memory:' AS f1goat_source")
+            con.execute("USE f1goat_source")
+            con.execute(DDL)
+            con.execute(VIEWS)
+        _copy_database(con, "f1goat_source", snap)
+    finally:
+        con.close()
+
+class _ConnectionManager:
+    """
+    Gestor de conexiones DuckDB por proceso. DuckDB admite un único proceso escritor por fichero,
+    así que cada proceso elige un modo (`F1GOAT_DB_MODE`):
+
+    writer (por defecto: CLI, ingesta, trabajador de la app)
+      - una única conexión escritora (abre el fichero y ejecuta el DDL una sola vez),
+      - cursores de lectura reutilizables (hijos de la escritora: misma instancia, sin reabrir),
+      - escrituras serializadas con un lock y envueltas en una transacción,
+        que además incrementa `meta.data_generation` (invalidación de la caché de consultas),
+      - publica el snapshot para lectores (copia + `os.replace`) como mucho cada
+        `F1GOAT_SNAPSHOT_INTERVAL` s durante una ingesta larga y siempre al cerrar,
+      - tras cada COMMIT, reescribe en el espejo Parquet (`f1goat.lake`) las temporadas tocadas.
+
+    reader (app Streamlit, validación, herramientas)
+      - no abre nunca la base principal: lee el último snapshot publicado (READ_ONLY), sin DDL,
+      - si el escritor publica uno nuevo, la siguiente lectura abre el nuevo fichero
+        (los cursores en uso siguen con el anterior hasta que terminan),
+      - cualquier escritura lanza RuntimeError.
+    """
+    def __init__(self, path: Path, mode: str = "writer", pool_size: int = 8):
+        if mode not in ("writer", "reader"):
+            raise ValueError(f"F1GOAT_DB_MODE inválido: {mode!r} (writer | reader)")
+        self.path = path
+        self.mode = mode
+        self.pool_size = pool_size
+        self._con = None
+        self._pool: List = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        # reader: snapshot abierto (sello del fichero + alias del ATTACH)
+        self._snap_stamp = None
+        self._alias: Optional[str] = None
+        self._opened = 0
+        # Cursores prestados por conexión base; las bases sustituidas se cierran al devolver el último
+        self._refs: dict = {}
+        self._retired: dict = {}
+        # writer: hay escrituras sin publicar / último publish
+        self._dirty = False
+        self._published = 0.0
+
+    def _writer(self):
+        if self.mode == "reader":
+            return self._reader()
+        if self._con is None:
+            with self._lock:
+                if self._con is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    con = duckdb.connect(self.path.as_posix())
+                    con.execute(DDL)
+                    self._dirty = _migrate(con) or not snapshot_path(self.path).exists()
+                    from . import lake
+                    if lake.enabled() and not lake.lake_root().exists():
+                        self._mirror(con, [r[0] for r in con.execute("SELECT DISTINCT season FROM events").fetchall()])
+                    self._con = con
+        return self._con
+
+    def _reader(self):
+        snap = snapshot_path(self.path)
+        stamp = _stamp(snap)
+        if self._con is not None and stamp == self._snap_stamp:
+            return self._con
+        with self._lock:
+            if self._con is not None and _stamp(snap) == self._snap_stamp:
+                return self._con
+            if stamp is None:
+                _bootstrap_snapshot(self.path, snap)
+                stamp = _stamp(snap)
+            # Alias nuevo por apertura: evita la caché de instancias de DuckDB por ruta
+            self._opened += 1
+            alias = f"f1goat_snapshot_{self._opened}"
+            con = duckdb.connect(":memory:")
+            con.execute(f"ATTACH '{snap.as_posix()}' AS {alias} (READ_ONLY)")
+            con.execute(f"USE {alias}")
+            for cur in self._pool:
+                try: cur.close()
+                except Exception: pass
+            self._pool = []
+            old = self._con
+            self._con, self._alias, self._snap_stamp = con, alias, stamp
+            if old is not None:
+                self._retire(old)
+        return self._con
+
+    def _retire(self, base) -> None:
+        # Con self._lock: cierra la conexión (y el snapshot adjunto) ya, o al devolver su último cursor
+        if self._refs.get(id(base)):
+            self._retired[id(base)] = base
+            return
+        try: base.close()
+        except Exception: pass
+
+    def _cursor(self, base):
+        cur = base.cursor()
+        if self.mode == "reader":
+            cur.execute(f"USE {self._alias}")
+        return cur
+
+    @contextmanager
+    def read(self):
+        while True:
+            base = self._writer()
+            with self._lock:
+                # Si otro hilo acaba de reabrir el snapshot, se reintenta con la conexión nueva
+                if self._con is not base:
+                    continue
+                self._refs[id(base)] = self._refs.get(id(base), 0) + 1
+                cur = self._pool.pop() if self._pool else None
+                if cur is None:
+                    cur = self._cursor(base)
+                break
+        try:
+            yield cur
+        finally:
+            retired = None
+            with self._lock:
+                if self._con is base and len(self._pool) < self.pool_size:
+                    self._pool.append(cur)
+                    cur = None
+                n = self._refs[id(base)] - 1
+                if n:
+                    self._refs[id(base)] = n
+                else:
+                    del self._refs[id(base)]
+                    retired = self._retired.pop(id(base), None)
+            if cur is not None:
+                cur.close()
+            if retired is not None:
+                try: retired.close()
+                except Exception: pass
+
+    @contextmanager
+    def write(self):
+        # Reentrante: una escritura anidada en el mismo hilo reutiliza la transacción abierta.
+        cur = getattr(self._local, "cur", None)
+        if cur is not None:
+            yield cur
+            return
+        if self.mode == "reader":
+            raise RuntimeError("F1GOAT_DB_MODE=reader: este proceso solo lee el snapshot; las escrituras "
+                               "las hace el proceso escritor (python -m f1goat worker / update / backfill).")
+        writer = self._writer()
+        with self._write_lock:
+            cur = writer.cursor()
+            self._local.cur = cur
+            self._local.touched = set()
+            self._local.drivers_written = False
+            try:
+                cur.execute("BEGIN TRANSACTION")
+                yield cur
+                if self._local.drivers_written and self._local.touched:
+                    # Alias de los pilotos escritos al día en la misma transacción (incremental:
+                    # sin fusiones ni cambios en otras temporadas; eso es `f1goat registry --merge`)
+                    from . import registry
+                    registry.sync(cur, self._local.touched)
+                cur.execute(_BUMP_GENERATION)
+                cur.execute("COMMIT")
+            except BaseException:
+                try:
+                    cur.execute("ROLLBACK")
+                except Exception:
+                    pass
+                raise
+            finally:
+                self._local.cur = None
+                cur.close()
+            self._dirty = True
+            if self._local.touched:
+                with self.read() as rcur:
+                    self._mirror(rcur, self._local.touched)
+            if time.monotonic() - self._published >= SNAPSHOT_INTERVAL:
+                self.publish()
+
+    def touch(self, seasons: Iterable[int]) -> None:
+        # Temporadas modificadas por la transacción en curso (espejo Parquet tras el COMMIT)
+        touched = getattr(self._local, "touched", None)
+        if touched is not None and getattr(self._local, "cur", None) is not None:
+            touched.update(int(y) for y in seasons)
+
+    def drivers_written(self) -> None:
+        if getattr(self._local, "cur", None) is not None:
+            self._local.drivers_written = True
+
+    @staticmethod
+    def _mirror(con, seasons: Iterable[int]) -> None:
+        from . import lake
+        if not lake.enabled():
+            return
+        try:
+            lake.write_seasons(con, seasons)
+        except Exception as e:
+            # El espejo es derivado: un fallo no deshace la escritura (`f1goat lake` lo regenera)
+            print(f"[F1GOAT] No se pudo actualizar el espejo Parquet: {e}", file=sys.stderr)
+
+    def publish(self) -> bool:
+        """Publica el snapshot si hay escrituras sin publicar (solo writer). True si lo publicó."""
+        if self.mode != "writer" or self._con is None:
+            return False
+        with self._write_lock:
+            if not self._dirty:
+                return False
+            try:
+                with self.read() as cur:
+                    db = cur.execute("SELECT current_database()").fetchone()[0]
+                    _copy_database(cur, db, snapshot_path(self.path))
+            except Exception as e:
+                # Un snapshot fallido no deshace la escritura: se reintenta en la siguiente
+                print(f"[F1GOAT] No se pudo publicar el snapshot: {e}", file=sys.stderr)
+                return False
+            self._dirty = False
+            self._published = time.monotonic()
+            return True
+
+    def close(self):
+        self.publish()
+        with self._lock:
+            for cur in self._pool:
+                try: cur.close()
+                except Exception: pass
+            self._pool = []
+            for base in [self._con, *self._retired.values()]:
+                if base is not None:
+                    try: base.close()
+                    except Exception: pass
+            self._con = None
+            self._retired = {}
+            self._snap_stamp = None
+
+_LEGACY_TABLES = ("gp_events", "gp_driver_results", "gp_driver_inputs", "gp_team_results")
+
+def _normalize_legacy(con) -> bool:
+    """
+    Bases con el esquema de texto (gp_* como tablas): vuelca eventos, nombres y resultados a
+    dimensiones + hechos con IDs enteros y sustituye las tablas por las vistas de compatibilidad.
+    """
+    legacy = {r[0] for r in con.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_catalog = current_database() "
+        "AND table_schema = 'main' AND table_type = 'BASE TABLE'").fetchall()} & set(_LEGACY_TABLES)
+    if not legacy:
+        return False
+    con.execute("BEGIN TRANSACTION")
+    try:
+        if "gp_events" in legacy:
+            con.execute("INSERT OR REPLACE INTO events SELECT season * 100 + round, event_key, season, round, "
+                        "official_name, event_date FROM gp_events")
+        facts = [t for t in ("gp_driver_results", "gp_driver_inputs") if t in legacy]
+        if facts:
+            _add_names(con, "drivers", " UNION ".join(f"SELECT driver FROM {t}" for t in facts))
+        teams = [t for t in ("gp_driver_results", "gp_driver_inputs", "gp_team_results") if t in legacy]
+        if teams:
+            _add_names(con, "teams", " UNION ".join(f"SELECT team FROM {t}" for t in teams))
+        eid = _EVENT_ID_SQL.format(k="r.event_key")
+        if "gp_driver_results" in legacy:
+            con.execute(f"""
+                INSERT OR REPLACE INTO driver_results
+                SELECT {eid}, d.driver_id, t.team_id, r.grid, r.finish, r.csi, r.rr, r.qr, r.td, r.oq, r.wa, r.pf,
+                       r.points_gp
+                FROM gp_driver_results r JOIN drivers d ON d.name = r.driver JOIN teams t ON t.name = r.team
+            """)
+        if "gp_driver_inputs" in legacy:
+            con.execute(f"""
+                INSERT OR REPLACE INTO driver_inputs
+                SELECT {eid}, d.driver_id, t.team_id, r.grid, r.finish, r.status, r.source
+                FROM gp_driver_inputs r JOIN drivers d ON d.name = r.driver JOIN teams t ON t.name = r.team
+            """)
+        if "gp_team_results" in legacy:
+            con.execute(f"""
+                INSERT OR REPLACE INTO team_results
+                SELECT {eid}, t.team_id, r.parrilla_media, r.final_media, r.csi_medio, r.ops, r.rel, r.dev, r.points_gp
+                FROM gp_team_results r JOIN teams t ON t.name = r.team
+            """)
+        for table in legacy:
+            con.execute(f"DROP TABLE {table}")
+        con.execute(_BUMP_GENERATION)
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return True
+
+def _migrate(con) -> bool:
+    changed = _normalize_legacy(con)
+    con.execute(VIEWS)
+    # Bases anteriores a las entradas crudas: las siembra desde los resultados ya guardados
+    con.execute("""
+        INSERT INTO driver_inputs
+        SELECT r.event_id, r.driver_id, r.team_id, r.grid, r.finish, NULL, 'legacy'
+        FROM driver_results r
+        WHERE NOT EXISTS (SELECT 1 FROM driver_inputs i WHERE i.event_id = r.event_id)
+    """)
+    # Temporadas con resultados pero sin clasificación materializada (o sin índice prefijo)
+    missing = [int(r[0]) for r in con.execute("""
+        SELECT DISTINCT e.season FROM driver_results r JOIN events e USING (event_id)
+        WHERE e.round >= 1 AND (e.season NOT IN (SELECT DISTINCT season FROM season_driver_standings)
+                                OR e.season NOT IN (SELECT DISTINCT season FROM season_prefix))
+    """).fetchall()]
+    if missing:
+        _refresh_standings(con, missing)
+        con.execute(_BUMP_GENERATION)
+    # Registro de identidades: se construye una vez, sin fusiones (luego, alta incremental en cada escritura)
+    built = False
+    if (con.execute("SELECT COUNT(*) FROM driver_aliases").fetchone()[0] == 0
+            and con.execute("SELECT COUNT(*) FROM drivers").fetchone()[0] > 0):
+        con.execute("BEGIN TRANSACTION")
+        try:
+            _sync_registry(con)
+            con.execute(_BUMP_GENERATION)
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        built = True
+    return changed or bool(missing) or built
+
+_MANAGER: Optional[_ConnectionManager] = None
+_MANAGER_LOCK = threading.Lock()
+_DB_MODE = os.getenv("F1GOAT_DB_MODE", "writer").strip().lower()
+
+def _manager() -> _ConnectionManager:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None or _MANAGER.path != DB_PATH or _MANAGER.mode != _DB_MODE:
+            if _MANAGER is not None:
+                _MANAGER.close()
+            _MANAGER = _ConnectionManager(DB_PATH, _DB_MODE)
+        return _MANAGER
+
+def db_mode() -> str:
+    return _DB_MODE
+
+def set_db_mode(mode: str) -> None:
+    """Cambia el modo del proceso ('writer' | 'reader'); la siguiente conexión lo usa."""
+    global _DB_MODE
+    mode = mode.strip().lower()
+    if mode not in ("writer", "reader"):
+        raise ValueError(f"Modo de base inválido: {mode!r} (writer | reader)")
+    _DB_MODE = mode
+
+def publish_snapshot() -> bool:
+    """Publica ya el snapshot para los lectores (si hay escrituras pendientes de publicar)."""
+    return _manager().publish()
+
+def _read():
+    """Cursor de lectura del pool (usar con `with`)."""
+    return _manager().read()
+
+def _write():
+    """Cursor escritor dentro de una transacción (usar con `with`)."""
+    return _manager().write()
+
 def _connect():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    con = duckdb.connect(DB_PATH.as_posix())
-    con.sql(DDL)
-    return con
+    # Compat: antiguos `with _connect() as con` → cursor de lectura del pool
+    return _read()
+
+def close_connections():
+    if _MANAGER is not None:
+        _MANAGER.close()
+
+atexit.register(close_connections)
+
+def data_generation() -> int:
+    """Generación de datos persistente: cambia tras cualquier escritura (de este u otro proceso)."""
+    with _read() as con:
+        row = con.execute("SELECT value FROM meta WHERE key = 'data_generation'").fetchone()
+    return int(row[0]) if row else 0
 
 # ---------- UPSERTS ----------
 
+# Columnas de tabla ← columnas del DataFrame de la app (tipo SQL de destino)
+_DRIVER_COLS = [
+    ("driver", "Piloto", "TEXT"), ("team", "Equipo", "TEXT"),
+    ("grid", "Parrilla", "INTEGER"), ("finish", "Final", "INTEGER"),
+    ("csi", "CSI", "DOUBLE"), ("rr", "RR", "DOUBLE"), ("qr", "QR", "DOUBLE"), ("td", "TD", "DOUBLE"),
+    ("oq", "OQ", "DOUBLE"), ("wa", "WA", "DOUBLE"), ("pf", "PF", "DOUBLE"),
+    ("points_gp", "Puntos F1GOAT (GP)", "DOUBLE"),
+]
+_INPUT_COLS = [
+    ("driver", "Piloto", "TEXT"), ("team", "Equipo", "TEXT"),
+    ("grid", "Parrilla", "INTEGER"), ("finish", "Final", "INTEGER"),
+    ("status", "Status", "TEXT"), ("source", "Fuente", "TEXT"),
+]
+_TEAM_COLS = [
+    ("team", "Equipo", "TEXT"),
+    ("parrilla_media", "Parrilla media", "DOUBLE"), ("final_media", "Final media", "DOUBLE"),
+    ("csi_medio", "CSI medio", "DOUBLE"), ("ops", "Ops", "DOUBLE"), ("rel", "Rel", "DOUBLE"),
+    ("dev", "Dev", "DOUBLE"), ("points_gp", "Puntos F1GOAT (GP)", "DOUBLE"),
+]
+
+def _event_key(season:int, rnd:int) -> str:
+    return f"{season}_{rnd:02d}"
+
+def _event_id(season:int, rnd:int) -> int:
+    return int(season) * 100 + int(rnd)
+
+def _event_id_of_key(key: str) -> int:
+    season, rnd = str(key).split("_", 1)
+    return _event_id(int(season), int(rnd))
+
+# event_key ("2025_22") → event_id en SQL
+_EVENT_ID_SQL = "(CAST(split_part({k}, '_', 1) AS INTEGER) * 100 + CAST(split_part({k}, '_', 2) AS INTEGER))"
+
+# Columnas de dimensión de los hechos: driver/team → (tabla dimensión, columna ID)
+_DIMS = {"driver": ("drivers", "driver_id"), "team": ("teams", "team_id")}
+
+def _add_names(con, dim: str, source_sql: str) -> None:
+    # Alta en la dimensión (drivers | teams) de los nombres nuevos; los existentes conservan su ID
+    con.execute(f"""
+        INSERT INTO {dim} (name)
+        SELECT DISTINCT CAST(n AS TEXT) FROM ({source_sql}) s(n)
+        WHERE n IS NOT NULL AND CAST(n AS TEXT) NOT IN (SELECT name FROM {dim})
+        ORDER BY 1
+    """)
+    if dim == "drivers":
+        _manager().drivers_written()
+
+def _column_names(df) -> List[str]:
+    # DataFrame de pandas o tabla Arrow
+    return list(df.columns) if isinstance(df, pd.DataFrame) else list(df.schema.names)
+
+def _insert_results(con, table:str, cols, key: Optional[str], df) -> None:
+    """
+    INSERT OR REPLACE set-based: registra el frame en DuckDB y hace el casting en SQL
+    (NaN/None → NULL, columnas ausentes → NULL, PF ausente → 0.0). Piloto/Equipo se codifican con
+    las dimensiones `drivers`/`teams` (los nombres nuevos se dan de alta en la misma transacción).
+    Si `key` es None, el frame debe traer su propia columna `event_key` (varios eventos).
+    """
+    present = set(_column_names(df))
+    view = f"_batch_{table}"
+    names = ["event_id"]
+    exprs = ["CAST(? AS INTEGER)" if key is not None else _EVENT_ID_SQL.format(k='CAST(b."event_key" AS TEXT)')]
+    joins = []
+    con.register(view, df)
+    try:
+        for col, src, typ in cols:
+            if col in _DIMS:
+                dim, id_col = _DIMS[col]
+                names.append(id_col)
+                if src in present:
+                    _add_names(con, dim, f'SELECT "{src}" FROM {view}')
+                    joins.append(f'LEFT JOIN {dim} {col} ON {col}.name = CAST(b."{src}" AS TEXT)')
+                    exprs.append(f"{col}.{id_col}")
+                else:
+                    exprs.append("CAST(NULL AS INTEGER)")
+                continue
+            e = f'TRY_CAST(b."{src}" AS {typ})' if src in present else f"CAST(NULL AS {typ})"
+            if col == "pf":
+                e = f"COALESCE({e}, 0.0)"
+            names.append(col)
+            exprs.append(e)
+        con.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) "
+                    f"SELECT {', '.join(exprs)} FROM {view} b {' '.join(joins)}",
+                    [_event_id_of_key(key)] if key is not None else [])
+    finally:
+        con.unregister(view)
+
+# ---------- CLASIFICACIONES MATERIALIZADAS ----------
+
+def _seasons_of(keys: Iterable[str]) -> List[int]:
+    return sorted({int(str(k).split("_")[0]) for k in keys})
+
+def _refresh_standings(con, seasons: Iterable[int]) -> None:
+    """
+    Recalcula las clasificaciones (por ronda y final) de `seasons` con el cursor dado
+    (dentro de la transacción del upsert). SeasonCap = 10 × última ronda con resultados de pilotos.
+    """
+    seasons = sorted({int(y) for y in seasons})
+    if not seasons:
+        return
+    _manager().touch(seasons)
+    for table in ("season_driver_standings","season_team_standings","season_driver_final","season_team_final",
+                  "season_prefix"):
+        con.execute(f"DELETE FROM {table} WHERE list_contains(?, season)", [seasons])
+    con.execute("""
+        INSERT INTO season_driver_standings
+        WITH d AS (
+            SELECT e.season, e.round, e.event_key, dn.name AS driver, tn.name AS team, r.grid, r.finish,
+                   r.csi, r.rr, r.qr, r.td, r.oq, r.wa, r.pf, r.points_gp
+            FROM driver_results r JOIN events e USING (event_id)
+                 JOIN drivers dn USING (driver_id) JOIN teams tn USING (team_id)
+            WHERE e.round >= 1 AND list_contains(?, e.season)
+        ),
+        caps AS (SELECT season, 10.0 * MAX(round) AS cap FROM d GROUP BY season)
+        SELECT d.*, SUM(d.points_gp) OVER w AS acum, SUM(d.points_gp) OVER w / c.cap * 100.0 AS acum_100
+        FROM d JOIN caps c ON c.season = d.season
+        WINDOW w AS (PARTITION BY d.season, d.driver ORDER BY d.round ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+    """, [seasons])
+    con.execute("""
+        INSERT INTO season_team_standings
+        WITH t AS (
+            SELECT e.season, e.round, e.event_key, tn.name AS team, r.parrilla_media, r.final_media, r.csi_medio,
+                   r.ops, r.rel, r.dev, r.points_gp
+            FROM team_results r JOIN events e USING (event_id) JOIN teams tn USING (team_id)
+            WHERE e.round >= 1 AND list_contains(?, e.season)
+        ),
+        caps AS (SELECT season, 10.0 * MAX(round) AS cap FROM season_driver_standings
+                 WHERE list_contains(?, season) GROUP BY season)
+        SELECT t.*, SUM(t.points_gp) OVER w AS acum, SUM(t.points_gp) OVER w / c.cap * 100.0 AS acum_100
+        FROM t JOIN caps c ON c.season = t.season
+        WINDOW w AS (PARTITION BY t.season, t.team ORDER BY t.round ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+    """, [seasons, seasons])
+    con.execute("""
+        INSERT INTO season_driver_final
+        SELECT season, driver, team, AVG(grid), AVG(finish), AVG(csi), AVG(rr), AVG(qr), AVG(td),
+               AVG(oq), AVG(wa), AVG(pf), COALESCE(SUM(points_gp), 0.0), MAX(acum), MAX(acum_100)
+        FROM season_driver_standings WHERE list_contains(?, season)
+        GROUP BY season, driver, team
+    """, [seasons])
+    con.execute("""
+        INSERT INTO season_team_final
+        SELECT season, team, AVG(parrilla_media), AVG(final_media), AVG(csi_medio), AVG(ops), AVG(rel), AVG(dev),
+               COALESCE(SUM(points_gp), 0.0), MAX(acum), MAX(acum_100)
+        FROM season_team_standings WHERE list_contains(?, season)
+        GROUP BY season, team
+    """, [seasons])
+    # Prefijos densos: rejilla (rondas de la temporada × entidades) + suma acumulada por entidad
+    for kind, src, ent, team in (("driver", "season_driver_standings", "driver", "team"),
+                                 ("team", "season_team_standings", "team", "team")):
+        con.execute(f"""
+            INSERT INTO season_prefix
+            WITH rounds AS (SELECT DISTINCT season, round FROM season_driver_standings WHERE list_contains(?, season)),
+            ents AS (SELECT DISTINCT season, {ent} AS entity FROM {src} WHERE list_contains(?, season)),
+            grid AS (SELECT r.season, r.round, e.entity FROM rounds r JOIN ents e ON e.season = r.season)
+            SELECT '{kind}', g.season, g.round, g.entity,
+                   LAST_VALUE(s.{team} IGNORE NULLS) OVER w,
+                   COALESCE(SUM(s.points_gp) OVER w, 0.0),
+                   COUNT(s.round) OVER w
+            FROM grid g LEFT JOIN {src} s ON s.season = g.season AND s.round = g.round AND s.{ent} = g.entity
+            WINDOW w AS (PARTITION BY g.season, g.entity ORDER BY g.round ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        """, [seasons, seasons])
+
+def refresh_standings(seasons: Optional[Iterable[int]] = None) -> None:
+    """Recalcula las clasificaciones materializadas (todas las temporadas si `seasons` es None)."""
+    with _write() as con:
+        if seasons is None:
+            seasons = [int(r[0]) for r in con.execute("SELECT DISTINCT season FROM events").fetchall()]
+        _refresh_standings(con, seasons)
+
+# ---------- REGISTRO DE PILOTOS ----------
+
+def _sync_registry(con, bulk: Optional[pd.DataFrame] = None, merge: bool = False) -> dict:
+    # Reconstruye driver_aliases; con `merge`, las temporadas fusionadas se recalculan y se
+    # marcan para el lago Parquet
+    from . import registry
+    stats = registry.build(con, bulk, merge)
+    if stats["seasons"]:
+        _refresh_standings(con, stats["seasons"])
+        _manager().touch(stats["seasons"])
+    return stats
+
+def rebuild_registry(bulk: Optional[pd.DataFrame] = None, merge: bool = False) -> dict:
+    """
+    Reconstruye el registro de pilotos; `bulk` (Piloto, season[, code]) añade identidades masivas.
+    Con `merge=True` fusiona las carreras partidas sin GPs en común (el resto, como conflictos).
+    """
+    with _write() as con:
+        return _sync_registry(con, bulk, merge)
+
+@cached
+def driver_registry():
+    """`registry.DriverRegistry` en memoria (una carga por generación de datos)."""
+    from . import registry
+    with _read() as con:
+        return registry.load(con)
+
 def upsert_event(season:int, rnd:int, official_name:str, event_date) -> str:
-    key = f"{season}_{rnd:02d}"
-    with _connect() as con:
-        con.execute("INSERT OR REPLACE INTO gp_events VALUES (?, ?, ?, ?, ?)",
-                    [key, season, rnd, official_name, event_date])
+    key = _event_key(season, rnd)
+    with _write() as con:
+        con.execute("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    [_event_id(season, rnd), key, season, rnd, official_name, event_date])
+        _refresh_standings(con, [season])
     return key
 
-def upsert_driver_results(event_key:str, df: pd.DataFrame):
-    with _connect() as con:
-        con.execute("BEGIN")
-        for _, r in df.iterrows():
-            con.execute("""INSERT OR REPLACE INTO gp_driver_results
-                (event_key, driver, team, grid, finish, csi, rr, qr, td, oq, wa, pf, points_gp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                [event_key, r["Piloto"], r["Equipo"],
-                 int(r["Parrilla"]) if pd.notna(r["Parrilla"]) else None,
-                 int(r["Final"]) if pd.notna(r["Final"]) else None,
-                 float(r["CSI"]) if pd.notna(r["CSI"]) else None,
-                 *[ None if pd.isna(v) else float(v) for v in (r.get("RR"), r.get("QR"), r.get("TD"), r.get("OQ"), r.get("WA")) ],
-                 float(r.get("PF", 0.0)) if pd.notna(r.get("PF", 0.0)) else 0.0,
-                 float(r["Puntos F1GOAT (GP)"]) if pd.notna(r["Puntos F1GOAT (GP)"]) else None
-                ])
-        con.execute("COMMIT")
+def upsert_driver_results(event_key: Optional[str], df: pd.DataFrame):
+    """`event_key=None` → el frame trae columna `event_key` y puede cubrir varios GPs."""
+    with _write() as con:
+        _insert_results(con, "driver_results", _DRIVER_COLS, event_key, df)
+        _insert_results(con, "driver_inputs", _INPUT_COLS, event_key, df)
+        _refresh_standings(con, _seasons_of([event_key] if event_key is not None else df["event_key"].unique()))
 
-def upsert_team_results(event_key:str, df: pd.DataFrame):
-    with _connect() as con:
-        con.execute("BEGIN")
-        for _, r in df.iterrows():
-            con.execute("""INSERT OR REPLACE INTO gp_team_results
-                (event_key, team, parrilla_media, final_media, csi_medio, ops, rel, dev, points_gp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                [event_key, r["Equipo"],
-                 *[ None if pd.isna(v) else float(v) for v in (
-                    r.get("Parrilla media"), r.get("Final media"), r.get("CSI medio"),
-                    r.get("Ops"), r.get("Rel"), r.get("Dev"), r.get("Puntos F1GOAT (GP)")
-                 ) ]
-                ])
-        con.execute("COMMIT")
+def upsert_team_results(event_key: Optional[str], df: pd.DataFrame):
+    with _write() as con:
+        _insert_results(con, "team_results", _TEAM_COLS, event_key, df)
+        _refresh_standings(con, _seasons_of([event_key] if event_key is not None else df["event_key"].unique()))
+
+def upsert_gp_batch(items: Iterable[Tuple[int, int, str, object, pd.DataFrame, pd.DataFrame]],
+                    states: Optional[List[dict]] = None) -> List[str]:
+    """
+    Escribe varios GPs en una sola transacción.
+    items: (season, round, official_name, event_date, drivers_df, teams_df)
+    states: filas de `ingest_state` a registrar en la misma transacción (checkpoint);
+            su `source` se guarda también en `driver_inputs`.
+    """
+    sources = {(int(s["season"]), int(s["round"])): s.get("source") for s in states or []}
+    events, drivers, teams = [], [], []
+    for season, rnd, official, evdate, d, t in items:
+        key = _event_key(season, rnd)
+        events.append({"event_key": key, "season": int(season), "round": int(rnd),
+                       "official_name": official, "event_date": pd.to_datetime(evdate)})
+        if d is not None and len(d) > 0:
+            drivers.append(d.assign(event_key=key, Fuente=sources.get((int(season), int(rnd)))))
+        if t is not None and len(t) > 0:
+            teams.append(t.assign(event_key=key))
+    if not events:
+        return []
+    ev = pd.DataFrame(events)
+    with _write() as con:
+        con.register("_batch_gp_events", ev)
+        try:
+            con.execute("INSERT OR REPLACE INTO events SELECT season * 100 + round, event_key, season, round, "
+                        "official_name, CAST(event_date AS DATE) FROM _batch_gp_events")
+        finally:
+            con.unregister("_batch_gp_events")
+        if drivers:
+            dr = pd.concat(drivers, ignore_index=True)
+            _insert_results(con, "driver_results", _DRIVER_COLS, None, dr)
+            _insert_results(con, "driver_inputs", _INPUT_COLS, None, dr)
+        if teams:
+            _insert_results(con, "team_results", _TEAM_COLS, None, pd.concat(teams, ignore_index=True))
+        _refresh_standings(con, ev["season"].unique())
+        if states:
+            record_ingest_state(states)
+    return ev["event_key"].tolist()
+
+# ---------- ENTRADAS CRUDAS Y RE-PUNTUACIÓN ----------
+
+def load_driver_inputs(season: Optional[int] = None) -> pd.DataFrame:
+    """Entradas crudas (event_key, Piloto, Equipo, Parrilla, Final, Status, Fuente); todas o de una temporada."""
+    with _read() as con:
+        return con.sql(
+            "SELECT e.event_key, d.name AS Piloto, t.name AS Equipo, i.grid AS Parrilla, i.finish AS Final, "
+            "i.status AS Status, i.source AS Fuente "
+            "FROM driver_inputs i JOIN events e USING (event_id) JOIN drivers d USING (driver_id) "
+            "JOIN teams t USING (team_id) "
+            "WHERE e.round >= 1 AND (? IS NULL OR e.season = ?) ORDER BY e.event_key, Piloto",
+            params=[season, season]
+        ).df()
+
+def replace_scores(drivers: pd.DataFrame, teams: pd.DataFrame, event_keys: List[str]) -> None:
+    """
+    Sustituye en una sola transacción los resultados derivados de `event_keys`
+    (los lectores ven el estado anterior o el nuevo, nunca una mezcla).
+    drivers/teams: frames multi-GP con columna `event_key`.
+    """
+    ids = [_event_id_of_key(k) for k in event_keys]
+    with _write() as con:
+        con.execute("DELETE FROM driver_results WHERE list_contains(?, event_id)", [ids])
+        con.execute("DELETE FROM team_results WHERE list_contains(?, event_id)", [ids])
+        if len(drivers) > 0:
+            _insert_results(con, "driver_results", _DRIVER_COLS, None, drivers)
+        if len(teams) > 0:
+            _insert_results(con, "team_results", _TEAM_COLS, None, teams)
+        _refresh_standings(con, _seasons_of(event_keys))
+
+# ---------- ESTADO DE INGESTA (checkpoints para --resume) ----------
+
+_STATE_COLS = ["season","round","status","source","payload_hash","n_drivers","n_teams","message"]
+
+def record_ingest_state(states: List[dict]) -> None:
+    """Upsert por (season, round); `updated_at` = ahora."""
+    if not states:
+        return
+    df = pd.DataFrame([{c: s.get(c) for c in _STATE_COLS} for s in states], columns=_STATE_COLS)
+    with _write() as con:
+        con.register("_batch_ingest_state", df)
+        try:
+            con.execute("INSERT OR REPLACE INTO ingest_state SELECT CAST(season AS INTEGER), CAST(round AS INTEGER), "
+                        "status, source, payload_hash, CAST(n_drivers AS INTEGER), CAST(n_teams AS INTEGER), "
+                        "message, now() FROM _batch_ingest_state")
+        finally:
+            con.unregister("_batch_ingest_state")
+
+def load_ingest_state(start: Optional[int] = None, end: Optional[int] = None) -> pd.DataFrame:
+    with _read() as con:
+        return con.sql("SELECT * FROM ingest_state WHERE season BETWEEN ? AND ? ORDER BY season, round",
+                       params=[start or 0, end or 9999]).df()
 
 # ---------- ÚLTIMO GP (con resultados) ----------
 
+# Tablas de un GP (por event_id) con los nombres de columna de la app
+_GP_DRIVERS_SQL = (
+    "SELECT d.name AS Piloto, t.name AS Equipo, r.grid AS Parrilla, r.finish AS Final, "
+    "r.csi AS CSI, r.rr AS RR, r.qr AS QR, r.td AS TD, r.oq AS OQ, r.wa AS WA, r.pf AS PF, "
+    "r.points_gp AS \"Puntos F1GOAT (GP)\" "
+    "FROM driver_results r JOIN drivers d USING (driver_id) JOIN teams t USING (team_id) "
+    "WHERE r.event_id = ? ORDER BY r.points_gp DESC, r.finish ASC"
+)
+_GP_TEAMS_SQL = (
+    "SELECT t.name AS \"Equipo\", r.parrilla_media AS \"Parrilla media\", r.final_media AS \"Final media\", "
+    "r.csi_medio AS \"CSI medio\", r.ops AS \"Ops\", r.rel AS \"Rel\", r.dev AS \"Dev\", "
+    "r.points_gp AS \"Puntos F1GOAT (GP)\" "
+    "FROM team_results r JOIN teams t USING (team_id) WHERE r.event_id = ? ORDER BY r.points_gp DESC"
+)
+
+@cached
 def load_latest_gp() -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[str], Optional[int], Optional[int]]:
-    with _connect() as con:
+    with _read() as con:
         ev = con.sql("""
-            SELECT e.*
-            FROM gp_events e
-            JOIN gp_driver_results d ON d.event_key = e.event_key
-            WHERE e.round >= 1
-            GROUP BY e.event_key, e.season, e.round, e.official_name, e.event_date
+            SELECT e.event_id, e.event_key, e.season, e.round, e.official_name, e.event_date
+            FROM events e
+            WHERE e.round >= 1 AND e.event_id IN (SELECT DISTINCT event_id FROM driver_results)
             ORDER BY e.event_date DESC, e.season DESC, e.round DESC
             LIMIT 1
         """).df()
         if ev.empty:
             return None, None, None, None, None
-        key = ev.iloc[0]["event_key"]
+        eid = int(ev.iloc[0]["event_id"])
         name = ev.iloc[0]["official_name"]
         season = int(ev.iloc[0]["season"]); rnd = int(ev.iloc[0]["round"])
 
-        d = con.sql(
-            "SELECT driver AS Piloto, team AS Equipo, grid AS Parrilla, finish AS Final, "
-            "csi AS CSI, rr AS RR, qr AS QR, td AS TD, oq AS OQ, wa AS WA, pf AS PF, points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_driver_results WHERE event_key = ? ORDER BY points_gp DESC, finish ASC",
-            params=[key]
-        ).df()
+        d = con.sql(_GP_DRIVERS_SQL, params=[eid]).df()
 
-        t = con.sql(
-            "SELECT team AS \"Equipo\", parrilla_media AS \"Parrilla media\", final_media AS \"Final media\", "
-            "csi_medio AS \"CSI medio\", ops AS \"Ops\", rel AS \"Rel\", dev AS \"Dev\", "
-            "points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_team_results WHERE event_key = ? ORDER BY points_gp DESC",
-            params=[key]
-        ).df()
+        t = con.sql(_GP_TEAMS_SQL, params=[eid]).df()
 
         return d, t, name, season, rnd
 
+@cached
 def load_gp(season:int, rnd:int) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[str]]:
-    key = f"{season}_{rnd:02d}"
-    with _connect() as con:
-        ev = con.sql("SELECT official_name FROM gp_events WHERE event_key = ? AND round >= 1", params=[key]).df()
+    eid = _event_id(season, rnd)
+    with _read() as con:
+        ev = con.sql("SELECT official_name FROM events WHERE event_id = ? AND round >= 1", params=[eid]).df()
         if ev.empty:
             return None, None, None
         name = ev.iloc[0]["official_name"]
 
-        d = con.sql(
-            "SELECT driver AS Piloto, team AS Equipo, grid AS Parrilla, finish AS Final, "
-            "csi AS CSI, rr AS RR, qr AS QR, td AS TD, oq AS OQ, wa AS WA, pf AS PF, points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_driver_results WHERE event_key = ? ORDER BY points_gp DESC, finish ASC",
-            params=[key]
-        ).df()
+        d = con.sql(_GP_DRIVERS_SQL, params=[eid]).df()
 
-        t = con.sql(
-            "SELECT team AS \"Equipo\", parrilla_media AS \"Parrilla media\", final_media AS \"Final media\", "
-            "csi_medio AS \"CSI medio\", ops AS \"Ops\", rel AS \"Rel\", dev AS \"Dev\", "
-            "points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_team_results WHERE event_key = ? ORDER BY points_gp DESC",
-            params=[key]
-        ).df()
+        t = con.sql(_GP_TEAMS_SQL, params=[eid]).df()
         return d, t, name
 
+# ---------- CALENDARIO (caché persistente del schedule) ----------
+
+def save_calendar(season:int, cal: pd.DataFrame, fetched_at) -> None:
+    """cal: round, official_name, event_date. Eventos + sello de descarga en una transacción."""
+    ev = pd.DataFrame({
+        "event_key": [_event_key(season, int(r)) for r in cal["round"]],
+        "season": int(season),
+        "round": cal["round"].astype(int),
+        "official_name": cal["official_name"].astype(str),
+        "event_date": pd.to_datetime(cal["event_date"]),
+    })
+    with _write() as con:
+        if not ev.empty:
+            con.register("_batch_calendar", ev)
+            try:
+                con.execute("INSERT OR REPLACE INTO events SELECT season * 100 + round, event_key, season, round, "
+                            "official_name, CAST(event_date AS DATE) FROM _batch_calendar")
+            finally:
+                con.unregister("_batch_calendar")
+        con.execute("INSERT OR REPLACE INTO gp_calendar_fetch VALUES (?, ?, ?)", [season, fetched_at, len(ev)])
+        _manager().touch([season])
+
+def load_calendar(season:int) -> Optional[Tuple[pd.DataFrame, object]]:
+    """(calendario, fetched_at) si la temporada se descargó alguna vez; si no, None."""
+    with _read() as con:
+        st = con.execute("SELECT fetched_at FROM gp_calendar_fetch WHERE season = ?", [season]).fetchone()
+        if st is None:
+            return None
+        cal = con.sql("SELECT round, official_name, event_date FROM events "
+                      "WHERE season = ? AND round >= 1 ORDER BY round", params=[season]).df()
+    return cal, st[0]
+
 # ---------- LISTAS PARA SELECTORES ----------
 
+@cached
 def list_seasons() -> List[int]:
-    with _connect() as con:
-        df = con.sql("SELECT DISTINCT season FROM gp_events WHERE round >= 1 ORDER BY season DESC").df()
+    with _read() as con:
+        df = con.sql("SELECT DISTINCT season FROM events WHERE round >= 1 ORDER BY season DESC").df()
         return [int(x) for x in df["season"].tolist()]
 
+@cached
 def list_rounds(season:int) -> List[int]:
-    with _connect() as con:
-        df = con.sql("SELECT DISTINCT round FROM gp_events WHERE season = ? AND round >= 1 ORDER BY round ASC",
+    with _read() as con:
+        df = con.sql("SELECT DISTINCT round FROM events WHERE season = ? AND round >= 1 ORDER BY round ASC",
                      params=[season]).df()
         return [int(x) for x in df["round"].tolist()]
 
+@cached
 def list_rounds_with_names(season:int) -> List[tuple[int,str]]:
-    with _connect() as con:
-        df = con.sql("SELECT round, official_name FROM gp_events WHERE season = ? AND round >= 1 ORDER BY round ASC",
+    with _read() as con:
+        df = con.sql("SELECT round, official_name FROM events WHERE season = ? AND round >= 1 ORDER BY round ASC",
                      params=[season]).df()
         return [(int(r["round"]), str(r["official_name"])) for _, r in df.iterrows()]
 
+@cached
+def list_rounds_with_results(season:int) -> List[int]:
+    with _read() as con:
+        rows = con.execute("SELECT e.round FROM events e WHERE e.season = ? AND e.round >= 1 "
+                           "AND e.event_id IN (SELECT DISTINCT event_id FROM driver_results) ORDER BY e.round",
+                           [season]).fetchall()
+    return [int(r[0]) for r in rows]
+
 # ---------- TEMPORADA (agregados reales) ----------
 
-def load_season(season:int) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    with _connect() as con:
+# ---------- LINAJES (config/lineage.yaml, por temporada) ----------
+
+@contextmanager
+def _lineage_view(con, lineage_map: Optional[dict]):
+    """Registra `_lineage` (name case-folded, season_from, season_to, root) en el cursor."""
+    from .naming import resolver
+    con.register("_lineage", resolver().lineage_index(lineage_map).frame())
+    try:
+        yield
+    finally:
+        con.unregister("_lineage")
+
+def _lineage_root_sql(name: str, season: str, alias: str = "l") -> Tuple[str, str]:
+    # (expresión raíz, LEFT JOIN por intervalo) para un equipo `name` en la temporada `season`
+    return (f"COALESCE({alias}.root, {name})",
+            f"LEFT JOIN _lineage {alias} ON {alias}.name = lower(trim({name})) "
+            f"AND {season} BETWEEN {alias}.season_from AND {alias}.season_to")
+
+def _season_teams_by_lineage(con, season: int, lineage_map: dict) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Constructores agrupados por linaje vigente en `season`: medias promediadas, puntos sumados
+    with _lineage_view(con, lineage_map):
+        root, join = _lineage_root_sql("s.team", "s.season")
+        # Acumulado del linaje: puntos por (raíz, ronda) y suma corrida (las filas por equipo son
+        # dispersas: un miembro que deja de correr no debe restar su acumulado)
+        t_rounds = con.sql(f"""
+            WITH g AS (
+                SELECT s.round, e.official_name, {root} AS team,
+                       AVG(s.parrilla_media) AS parrilla_media, AVG(s.final_media) AS final_media,
+                       AVG(s.csi_medio) AS csi_medio, AVG(s.ops) AS ops, AVG(s.rel) AS rel, AVG(s.dev) AS dev,
+                       SUM(s.points_gp) AS points_gp
+                FROM season_team_standings s JOIN events e ON e.event_id = s.season * 100 + s.round {join}
+                WHERE s.season = ?
+                GROUP BY ALL
+            ),
+            cap AS (SELECT 10.0 * MAX(round) AS c FROM season_driver_standings WHERE season = ?)
+            SELECT g.round AS Ronda, g.official_name AS GP, g.team AS "Equipo",
+                   g.parrilla_media AS "Parrilla media", g.final_media AS "Final media", g.csi_medio AS "CSI medio",
+                   g.ops AS "Ops", g.rel AS "Rel", g.dev AS "Dev", g.points_gp AS "Puntos F1GOAT (GP)",
+                   SUM(g.points_gp) OVER w AS Acum, SUM(g.points_gp) OVER w / cap.c * 100.0 AS "Acum 0–100"
+            FROM g, cap
+            WINDOW w AS (PARTITION BY g.team ORDER BY g.round ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            ORDER BY Equipo, Ronda
+        """, params=[season, season]).df()
+        t_final = con.sql(f"""
+            SELECT {root} AS Equipo, AVG(s.parrilla_media) AS "Parrilla media", AVG(s.final_media) AS "Final media",
+                   AVG(s.csi_medio) AS "CSI medio", AVG(s.ops) AS "Ops", AVG(s.rel) AS "Rel", AVG(s.dev) AS "Dev",
+                   SUM(s.total_gp) AS "Total GP", SUM(s.acum) AS Acum, SUM(s.acum_100) AS "Acum 0–100"
+            FROM season_team_final s {join}
+            WHERE s.season = ?
+            GROUP BY ALL ORDER BY Equipo
+        """, params=[season]).df()
+    return t_rounds, t_final
+
+@cached
+def load_season(season:int, lineage_map: Optional[dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Lectura directa de las clasificaciones materializadas (ver _refresh_standings).
+    # `lineage_map`: constructores agrupados por linaje vigente en la temporada (en SQL)
+    with _read() as con:
         d_rounds = con.sql(
-            "SELECT e.round AS Ronda, e.official_name AS GP, d.driver AS Piloto, d.team AS Equipo, "
-            "d.grid AS Parrilla, d.finish AS Final, d.csi AS CSI, d.rr AS RR, d.qr AS QR, d.td AS TD, "
-            "d.oq AS OQ, d.wa AS WA, d.pf AS PF, d.points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_driver_results d JOIN gp_events e ON d.event_key = e.event_key "
-            "WHERE e.season = ? AND e.round >= 1 "
-            "ORDER BY Ronda ASC, \"Puntos F1GOAT (GP)\" DESC, Final ASC",
+            "SELECT s.round AS Ronda, e.official_name AS GP, s.driver AS Piloto, s.team AS Equipo, "
+            "s.grid AS Parrilla, s.finish AS Final, s.csi AS CSI, s.rr AS RR, s.qr AS QR, s.td AS TD, "
+            "s.oq AS OQ, s.wa AS WA, s.pf AS PF, s.points_gp AS \"Puntos F1GOAT (GP)\", "
+            "s.acum AS Acum, s.acum_100 AS \"Acum 0–100\" "
+            "FROM season_driver_standings s JOIN events e ON e.event_id = s.season * 100 + s.round "
+            "WHERE s.season = ? ORDER BY Piloto, Ronda",
             params=[season]
         ).df()
 
-        t_rounds = con.sql(
-            "SELECT e.round AS Ronda, e.official_name AS GP, t.team AS \"Equipo\", "
-            "t.parrilla_media AS \"Parrilla media\", t.final_media AS \"Final media\", t.csi_medio AS \"CSI medio\", "
-            "t.ops AS \"Ops\", t.rel AS \"Rel\", t.dev AS \"Dev\", t.points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_team_results t JOIN gp_events e ON t.event_key = e.event_key "
-            "WHERE e.season = ? AND e.round >= 1 "
-            "ORDER BY Ronda ASC, \"Puntos F1GOAT (GP)\" DESC",
-            params=[season]
-        ).df()
+        if lineage_map:
+            t_rounds, t_final = _season_teams_by_lineage(con, season, lineage_map)
+        else:
+            t_rounds = con.sql(
+                "SELECT s.round AS Ronda, e.official_name AS GP, s.team AS \"Equipo\", "
+                "s.parrilla_media AS \"Parrilla media\", s.final_media AS \"Final media\", s.csi_medio AS \"CSI medio\", "
+                "s.ops AS \"Ops\", s.rel AS \"Rel\", s.dev AS \"Dev\", s.points_gp AS \"Puntos F1GOAT (GP)\", "
+                "s.acum AS Acum, s.acum_100 AS \"Acum 0–100\" "
+                "FROM season_team_standings s JOIN events e ON e.event_id = s.season * 100 + s.round "
+                "WHERE s.season = ? ORDER BY Equipo, Ronda",
+                params=[season]
+            ).df()
+            t_final = con.sql(
+                "SELECT team AS Equipo, parrilla_media AS \"Parrilla media\", final_media AS \"Final media\", "
+                "csi_medio AS \"CSI medio\", ops AS \"Ops\", rel AS \"Rel\", dev AS \"Dev\", total_gp AS \"Total GP\", "
+                "acum AS Acum, acum_100 AS \"Acum 0–100\" "
+                "FROM season_team_final WHERE season = ? ORDER BY Equipo",
+                params=[season]
+            ).df()
 
-    if d_rounds.empty or t_rounds.empty:
-        return (pd.DataFrame(columns=["Ronda","GP","Piloto","Equipo","Parrilla","Final","CSI","RR","QR","TD","OQ","WA","PF","Puntos F1GOAT (GP)"]),
-                pd.DataFrame(columns=["Ronda","GP","Equipo","Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"]),
-                pd.DataFrame(), pd.DataFrame())
-
-    rounds = int(max(d_rounds["Ronda"]))
-    cap_max = 10.0 * rounds
-    d_rounds = d_rounds.sort_values(["Piloto","Ronda"])
-    t_rounds = t_rounds.sort_values(["Equipo","Ronda"])
-    d_rounds["Acum"] = d_rounds.groupby("Piloto")["Puntos F1GOAT (GP)"].cumsum()
-    t_rounds["Acum"] = t_rounds.groupby("Equipo")["Puntos F1GOAT (GP)"].cumsum()
-    d_rounds["Acum 0–100"] = (d_rounds["Acum"] / cap_max) * 100.0
-    t_rounds["Acum 0–100"] = (t_rounds["Acum"] / cap_max) * 100.0
-
-    d_final = d_rounds.groupby(["Piloto","Equipo"], as_index=False).agg({
-        "Parrilla":"mean","Final":"mean","CSI":"mean","RR":"mean","QR":"mean","TD":"mean",
-        "OQ":"mean","WA":"mean","PF":"mean","Puntos F1GOAT (GP)":"sum","Acum":"max","Acum 0–100":"max"
-    }).rename(columns={
-        "Parrilla":"Parrilla media","Final":"Final media","CSI":"CSI medio",
-        "RR":"RR medio","QR":"QR medio","TD":"TD medio",
-        "OQ":"OQ medio","WA":"WA medio","PF":"PF medio","Puntos F1GOAT (GP)":"Total GP"
-    })
+        if d_rounds.empty or t_rounds.empty:
+            return (pd.DataFrame(columns=["Ronda","GP","Piloto","Equipo","Parrilla","Final","CSI","RR","QR","TD","OQ","WA","PF","Puntos F1GOAT (GP)"]),
+                    pd.DataFrame(columns=["Ronda","GP","Equipo","Parrilla media","Final media","CSI medio","Ops","Rel","Dev","Puntos F1GOAT (GP)"]),
+                    pd.DataFrame(), pd.DataFrame())
 
-    t_final = t_rounds.groupby("Equipo", as_index=False).agg({
-        "Parrilla media":"mean","Final media":"mean","CSI medio":"mean",
-        "Ops":"mean","Rel":"mean","Dev":"mean",
-        "Puntos F1GOAT (GP)":"sum","Acum":"max","Acum 0–100":"max"
-    }).rename(columns={"Puntos F1GOAT (GP)":"Total GP"})
+        d_final = con.sql(
+            "SELECT driver AS Piloto, team AS Equipo, parrilla_media AS \"Parrilla media\", final_media AS \"Final media\", "
+            "csi_medio AS \"CSI medio\", rr_medio AS \"RR medio\", qr_medio AS \"QR medio\", td_medio AS \"TD medio\", "
+            "oq_medio AS \"OQ medio\", wa_medio AS \"WA medio\", pf_medio AS \"PF medio\", total_gp AS \"Total GP\", "
+            "acum AS Acum, acum_100 AS \"Acum 0–100\" "
+            "FROM season_driver_final WHERE season = ? ORDER BY Piloto, Equipo",
+            params=[season]
+        ).df()
 
     for df in (d_final, t_final):
         for col in df.columns:
@@ -225,47 +1161,71 @@ def load_season(season:int) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, p
 
     return d_rounds, t_rounds, d_final, t_final
 
+@cached
+def standings_as_of(season:int, rnd:int, top_k: Optional[int] = None, kind: str = "driver",
+                    lineage_map: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Clasificación tras la ronda `rnd` (o la última con resultados anterior) desde `season_prefix`:
+    una lectura de O(entidades), sin recorrer la temporada.
+    kind="driver" → Piloto, Equipo, GPs, Acum, Acum 0–100; kind="team" → Equipo, GPs, Acum, Acum 0–100.
+    `lineage_map` (config/lineage.yaml): agrupa equipos por su linaje en `season` (en pilotos, solo renombra el equipo).
+    Acum 0–100 usa el SeasonCap de la temporada (como `load_season`).
+    """
+    with _read() as con:
+        df = con.sql("""
+            WITH k AS (SELECT MAX(round) AS r FROM season_prefix WHERE kind = ? AND season = ? AND round <= ?),
+            cap AS (SELECT 10.0 * MAX(round) AS c FROM season_prefix WHERE kind = ? AND season = ?)
+            SELECT p.round AS Ronda, p.entity, p.team AS Equipo, p.gps AS GPs, p.acum AS Acum, cap.c AS cap
+            FROM season_prefix p, k, cap
+            WHERE p.kind = ? AND p.season = ? AND p.round = k.r AND p.gps > 0
+        """, params=[kind, season, rnd, kind, season, kind, season]).df()
+    key = "Piloto" if kind == "driver" else "Equipo"
+    cols = ([key, "Equipo"] if kind == "driver" else [key]) + ["Ronda","GPs","Acum","Acum 0–100"]
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    if lineage_map:
+        from .naming import resolver
+        df["Equipo"] = resolver().map_lineage(df["Equipo"], lineage_map, season)
+        if kind == "team":
+            df = df.groupby("Equipo", as_index=False).agg({"Ronda":"max","entity":"first","GPs":"max","Acum":"sum","cap":"max"})
+            df["entity"] = df["Equipo"]
+    df = df.rename(columns={"entity": key}) if kind == "driver" else df.drop(columns=["entity"])
+    df["Acum 0–100"] = (df["Acum"] / df.pop("cap") * 100.0).round(3)
+    df["Acum"] = df["Acum"].round(3)
+    df = df.sort_values(["Acum", key], ascending=[False, True]).head(top_k if top_k else len(df))
+    out = df[cols].reset_index(drop=True)
+    out.index = pd.RangeIndex(1, len(out)+1, name="Pos")
+    return out
+
 # ---------- HISTÓRICO Y MEJORES TEMPORADAS (para páginas 03 y 04) ----------
 
+@cached
 def load_all_driver_results() -> pd.DataFrame:
-    with _connect() as con:
-        return con.sql(
-            "SELECT e.season AS Temporada, e.round AS Ronda, e.official_name AS GP, "
-            "d.driver AS Piloto, d.team AS Equipo, d.grid AS Parrilla, d.finish AS Final, "
-            "d.csi AS CSI, d.rr AS RR, d.qr AS QR, d.td AS TD, d.oq AS OQ, d.wa AS WA, d.pf AS PF, "
-            "d.points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_driver_results d JOIN gp_events e ON d.event_key = e.event_key "
-            "WHERE e.round >= 1"
-        ).df()
+    with _read() as con:
+        return con.sql('SELECT * FROM gp_driver_results_ui WHERE "Ronda" >= 1').df()
 
+@cached
 def load_all_team_results() -> pd.DataFrame:
-    with _connect() as con:
-        return con.sql(
-            "SELECT e.season AS Temporada, e.round AS Ronda, e.official_name AS GP, "
-            "t.team AS Equipo, t.parrilla_media AS \"Parrilla media\", t.final_media AS \"Final media\", "
-            "t.csi_medio AS \"CSI medio\", t.ops AS \"Ops\", t.rel AS \"Rel\", t.dev AS \"Dev\", "
-            "t.points_gp AS \"Puntos F1GOAT (GP)\" "
-            "FROM gp_team_results t JOIN gp_events e ON t.event_key = e.event_key "
-            "WHERE e.round >= 1"
-        ).df()
+    with _read() as con:
+        return con.sql('SELECT * FROM gp_team_results_ui WHERE "Ronda" >= 1').df()
 
 # ---------- AVISO: calendario vs con resultados ----------
 
+@cached
 def get_latest_calendar_event() -> Optional[dict]:
-    with _connect() as con:
-        df = con.sql("SELECT * FROM gp_events WHERE round >= 1 ORDER BY event_date DESC, season DESC, round DESC LIMIT 1").df()
+    with _read() as con:
+        df = con.sql("SELECT * FROM events WHERE round >= 1 ORDER BY event_date DESC, season DESC, round DESC LIMIT 1").df()
         if df.empty: return None
         r = df.iloc[0]
         return {"event_key": r["event_key"], "season": int(r["season"]), "round": int(r["round"]), "official_name": r["official_name"], "date": r["event_date"]}
 
+@cached
 def get_latest_results_event() -> Optional[dict]:
-    with _connect() as con:
+    with _read() as con:
         df = con.sql("""
-            SELECT e.*
-            FROM gp_events e
-            JOIN gp_driver_results d ON d.event_key = e.event_key
-            WHERE e.round >= 1
-            GROUP BY e.event_key, e.season, e.round, e.official_name, e.event_date
+            SELECT e.event_id, e.event_key, e.season, e.round, e.official_name, e.event_date
+            FROM events e
+            WHERE e.round >= 1 AND e.event_id IN (SELECT DISTINCT event_id FROM driver_results)
             ORDER BY e.event_date DESC, e.season DESC, e.round DESC
             LIMIT 1
         """).df()
@@ -273,25 +1233,56 @@ def get_latest_results_event() -> Optional[dict]:
         r = df.iloc[0]
         return {"event_key": r["event_key"], "season": int(r["season"]), "round": int(r["round"]), "official_name": r["official_name"], "date": r["event_date"]}
 
+# ---------- COBERTURA ----------
+
+@cached
+def coverage_table(names: bool = False) -> pd.DataFrame:
+    """
+    Cobertura por temporada en una sola consulta agrupada: rondas del calendario, rondas con
+    resultados de pilotos, rondas que faltan y último estado de ingesta (`ingest_state`).
+    names=True añade "GPs sin resultados" ("R03 Nombre oficial", …) para el informe de la CLI.
+    """
+    with _read() as con:
+        df = con.sql("""
+            WITH ev AS (SELECT event_id, season, round, official_name FROM events WHERE round >= 1),
+            have AS (SELECT DISTINCT event_id FROM driver_results),
+            st AS (
+                SELECT season, arg_max(status, (updated_at, round)) AS status,
+                       arg_max(source, (updated_at, round)) AS source,
+                       MAX(updated_at) AS updated_at, COUNT(*) FILTER (WHERE status = 'error') AS errors
+                FROM ingest_state GROUP BY season
+            )
+            SELECT ev.season AS "Temporada", COUNT(*) AS "Rondas", COUNT(h.event_id) AS "Con resultados",
+                   COUNT(*) - COUNT(h.event_id) AS "Faltan",
+                   COALESCE(list(ev.round ORDER BY ev.round) FILTER (WHERE h.event_id IS NULL), [])
+                       AS "Rondas sin resultados",
+                   COALESCE(list('R' || lpad(CAST(ev.round AS TEXT), 2, '0') || ' ' || ev.official_name ORDER BY ev.round)
+                       FILTER (WHERE h.event_id IS NULL), []) AS "GPs sin resultados",
+                   any_value(st.status) AS "Último estado", any_value(st.source) AS "Fuente",
+                   any_value(st.updated_at) AS "Actualizado", COALESCE(any_value(st.errors), 0) AS "Rondas con error"
+            FROM ev LEFT JOIN have h USING (event_id) LEFT JOIN st USING (season)
+            GROUP BY ev.season
+            ORDER BY ev.season
+        """).df()
+    return df if names else df.drop(columns=["GPs sin resultados"])
+
 # ---------- DIAGNÓSTICO ----------
 
 def _debug_summary() -> str:
-    with _connect() as con:
-        ev = con.sql("SELECT COUNT(*) AS n FROM gp_events").df().iloc[0]["n"]
-        dr = con.sql("SELECT COUNT(*) AS n FROM gp_driver_results").df().iloc[0]["n"]
-        tm = con.sql("SELECT COUNT(*) AS n FROM gp_team_results").df().iloc[0]["n"]
+    with _read() as con:
+        ev = con.sql("SELECT COUNT(*) AS n FROM events").df().iloc[0]["n"]
+        dr = con.sql("SELECT COUNT(*) AS n FROM driver_results").df().iloc[0]["n"]
+        tm = con.sql("SELECT COUNT(*) AS n FROM team_results").df().iloc[0]["n"]
         latest_cal = con.sql("""
             SELECT event_key, season, round, official_name, event_date
-            FROM gp_events
+            FROM events
             ORDER BY event_date DESC, season DESC, round DESC
             LIMIT 1
         """).df()
         latest_res = con.sql("""
             SELECT e.event_key, e.season, e.round, e.official_name, e.event_date
-            FROM gp_events e
-            JOIN gp_driver_results d ON d.event_key = e.event_key
-            WHERE e.round >= 1
-            GROUP BY e.event_key, e.season, e.round, e.official_name, e.event_date
+            FROM events e
+            WHERE e.round >= 1 AND e.event_id IN (SELECT DISTINCT event_id FROM driver_results)
             ORDER BY e.event_date DESC, e.season DESC, e.round DESC
             LIMIT 1
         """).df()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import List, Tuple
 import pandas as pd
-from .storage import load_latest_gp, _connect
+from .storage import load_latest_gp, _read
 
 def _ok(b: bool) -> str: return "OK" if b else "FAIL"
 
@@ -39,7 +39,7 @@ def format_report(rows: List[Tuple[str,str,str]]) -> str:
     return sec
 
 def quick_summary() -> str:
-    with _connect() as con:
+    with _read() as con:
         ev = con.sql("SELECT COUNT(*) n FROM gp_events").df().iloc[0]["n"]
         dr = con.sql("SELECT COUNT(*) n FROM gp_driver_results").df().iloc[0]["n"]
         tm = con.sql("SELECT COUNT(*) n FROM gp_team_results").df().iloc[0]["n"]
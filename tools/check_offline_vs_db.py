@@ -1,7 +1,8 @@
 import os, sys, duckdb, pandas as pd
 
 csv_path = os.getenv("F1GOAT_ERGAST_CSV", "data/ergast_offline_norm.csv")
-db_path  = "data/f1goat.duckdb"
+# Herramienta de solo lectura: lee el snapshot que publica el escritor (no bloquea ingestas en curso)
+db_path  = "data/f1goat.snapshot.duckdb" if os.path.exists("data/f1goat.snapshot.duckdb") else "data/f1goat.duckdb"
 
 if not os.path.exists(csv_path):
     print(f"CSV no encontrado: {csv_path}")
@@ -15,7 +16,7 @@ csv_counts = (csv.groupby(["season","round"]).size()
                  .reset_index(name="csv_drivers")
                  .sort_values(["season","round"]))
 
-con = duckdb.connect(db_path)
+con = duckdb.connect(db_path, read_only=True)
 db = con.sql("""
 SELECT e.season, e.round, COUNT(*) AS db_drivers
 FROM gp_driver_results d